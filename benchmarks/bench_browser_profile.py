@@ -0,0 +1,76 @@
+"""Compare result page load times with the lean browser profile on and off.
+
+Serves the local fixture site, then for each browser profile opens a
+browser through `Scraper.open_website`, loads the search result pages a
+number of times and reads their items with the bulk extraction script.
+
+Usage:
+    python benchmarks/bench_browser_profile.py [--runs 5] [--delay 0.2]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fixture_site import FixtureSite  # noqa: E402
+from scraper import Scraper  # noqa: E402
+
+
+def measure(site, profile, runs):
+    scraper = Scraper(
+        {
+            "base_url": site.base_url,
+            "wait_time": 10,
+            "browser_profile": profile,
+            # The fixture serves its third-party tracker from localhost
+            "blocked_urls": ["*//localhost:*"],
+        }
+    )
+    durations = []
+    try:
+        scraper.open_website()
+        for run in range(runs):
+            for page_index in range(site.pages):
+                start = time.perf_counter()
+                scraper.browser.go_to(site.search_url("fixture", page_index))
+                items = scraper.result_page.extract_items()
+                durations.append(time.perf_counter() - start)
+                assert len(items) == site.items_per_page
+    finally:
+        scraper.close_browser()
+    return {
+        "profile": profile,
+        "page_loads": len(durations),
+        "mean_s": statistics.mean(durations),
+        "median_s": statistics.median(durations),
+        "max_s": max(durations),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--delay", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with FixtureSite(pages=args.pages, resource_delay=args.delay) as site:
+        results = [measure(site, profile, args.runs) for profile in ("default", "lean")]
+
+    for result in results:
+        print(
+            f"{result['profile']:>8}: mean {result['mean_s'] * 1000:.0f} ms, "
+            f"median {result['median_s'] * 1000:.0f} ms, "
+            f"max {result['max_s'] * 1000:.0f} ms over {result['page_loads']} loads"
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Measure the scraping throughput against the local fixture site.
+
+Serves the local fixture site, then runs the individual stages of the
+scraper in this process and the full `main()` pipeline in a child process,
+reading its work item from a file with the `FileAdapter`:
+
+- fetch: request one search result page
+- parse: parse the items of one result page
+- extract: turn one item into a row (money pattern, term count, date filter)
+- image: download one thumbnail
+- excel: write every row to a new Excel file
+- pipeline: the whole work item through `main()`
+
+Each stage reports its latency percentiles and items per second, and the
+pipeline also reports the peak RSS of the child process. The results are
+saved as JSON so a later run can be compared against them.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--pages 5] [--runs 3]
+        [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fixture_site import FixtureSite  # noqa: E402
+from http_scraper import HttpScraper  # noqa: E402
+from data_extractor import DataExtractor  # noqa: E402
+from excel_writer import ExcelWriter  # noqa: E402
+from image_fetcher import ImageFetcher  # noqa: E402
+from openpyxl import load_workbook  # noqa: E402
+
+SEARCH_TERM = "fixture"
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def describe(samples, items):
+    total = sum(samples)
+    return {
+        "calls": len(samples),
+        "items": items,
+        "total_s": total,
+        "items_per_s": items / total if total else None,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p90_ms": percentile(samples, 90) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+
+
+def timed_call(samples, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    samples.append(time.perf_counter() - start)
+    return result
+
+
+def bench_stages(site, runs, work_dir):
+    scraper = HttpScraper({"base_url": site.base_url, "wait_time": 10})
+    samples = {"fetch": [], "parse": [], "extract": [], "image": [], "excel": []}
+    items_count = {name: 0 for name in samples}
+    try:
+        for run in range(runs):
+            pages = []
+            for page_index in range(site.pages):
+                url = site.search_url(SEARCH_TERM, page_index)
+                response = timed_call(samples["fetch"], scraper.session.get, url)
+                pages.append((response.text, url))
+
+            items = []
+            for html, url in pages:
+                items.extend(timed_call(samples["parse"], scraper.parse_items, html, url))
+            items_count["fetch"] += len(items)
+            items_count["parse"] += len(items)
+
+            # Images are downloaded in their own stage, leave them out here
+            extractor = DataExtractor(SEARCH_TERM, "all", 2, data_dir=work_dir)
+            rows = []
+            for item in items:
+                row = timed_call(samples["extract"], extractor.extract_item, dict(item, src=""))
+                if row is not None:
+                    row["image"] = item["src"]
+                    rows.append(row)
+            items_count["extract"] += len(items)
+
+            with ImageFetcher(work_dir) as fetcher:
+                for row in rows:
+                    if row["image"]:
+                        row["image"] = timed_call(samples["image"], fetcher.download, row["image"])
+                        items_count["image"] += 1
+
+            excel_path = os.path.join(work_dir, f"stage_{run}.xlsx")
+            writer = ExcelWriter(excel_path, extractor.headers)
+            start = time.perf_counter()
+            with writer:
+                for row in rows:
+                    writer.write_row(row)
+            samples["excel"].append(time.perf_counter() - start)
+            items_count["excel"] += len(rows)
+    finally:
+        scraper.close_browser()
+
+    return {
+        name: describe(stage_samples, items_count[name])
+        for name, stage_samples in samples.items()
+        if stage_samples
+    }
+
+
+def run_main(site, backend, work_dir):
+    """Run `main()` in a child process and return its wall time and peak RSS."""
+    input_path = os.path.join(work_dir, "input.json")
+    payload = {
+        "settings": {
+            "base_url": site.base_url,
+            "wait_time": 10,
+            "backend": backend,
+            "page_size": site.items_per_page,
+            "extraction_mode": "bulk",
+        },
+        "search_term": SEARCH_TERM,
+        "month_number": 2,
+        "category": "all",
+    }
+    with open(input_path, "w") as f:
+        json.dump([{"payload": payload, "files": {}}], f)
+
+    env = dict(
+        os.environ,
+        RPA_WORKITEMS_ADAPTER="RPA.Robocorp.WorkItems.FileAdapter",
+        RPA_INPUT_WORKITEM_PATH=input_path,
+        RPA_OUTPUT_WORKITEM_PATH=os.path.join(work_dir, "output.json"),
+        ROBOT_ROOT=work_dir,
+    )
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join("src", "main.py")],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise RuntimeError(f"main() exited with code {process.returncode}")
+
+    data_dir = os.path.join(work_dir, "data")
+    workbook = load_workbook(os.path.join(data_dir, "scraped_data.xlsx"), read_only=True)
+    rows = sum(1 for _ in workbook.active.iter_rows(min_row=2, values_only=True))
+    workbook.close()
+    with open(os.path.join(data_dir, "metrics.json")) as f:
+        step_timings = json.load(f)["timings"]
+    # ru_maxrss is in kilobytes on Linux
+    return elapsed, rows, usage.ru_maxrss / 1024, step_timings
+
+
+def bench_pipeline(site, runs, backend):
+    samples = []
+    rows = 0
+    peak_rss_mb = 0
+    step_timings = {}
+    for run in range(runs):
+        with tempfile.TemporaryDirectory() as work_dir:
+            elapsed, rows, rss_mb, step_timings = run_main(site, backend, work_dir)
+        samples.append(elapsed)
+        peak_rss_mb = max(peak_rss_mb, rss_mb)
+    result = describe(samples, site.total_items * runs)
+    result.update(rows=rows, peak_rss_mb=peak_rss_mb, step_timings=step_timings)
+    return result
+
+
+def compare(results, baseline):
+    print(f"\nCompared with {baseline['label']}:")
+    for name, stage in results["stages"].items():
+        before = baseline["stages"].get(name)
+        if not before or not before.get("items_per_s") or not stage.get("items_per_s"):
+            continue
+        change = stage["items_per_s"] / before["items_per_s"] - 1
+        print(
+            f"{name:>10}: {stage['items_per_s']:.1f} items/s ({change:+.1%}), "
+            f"p90 {stage['p90_ms']:.2f} ms (was {before['p90_ms']:.2f} ms)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--items-per-page", type=int, default=20)
+    parser.add_argument("--missing-image-ratio", type=float, default=0.1)
+    parser.add_argument("--missing-time-ratio", type=float, default=0.05)
+    parser.add_argument("--out-of-range-ratio", type=float, default=0.2)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--backend", choices=["http", "selenium"], default="http")
+    parser.add_argument("--skip-pipeline", action="store_true")
+    parser.add_argument("--label", default=datetime.now().strftime("%Y%m%d-%H%M%S"))
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+
+    site = FixtureSite(
+        pages=args.pages,
+        items_per_page=args.items_per_page,
+        resource_delay=args.delay,
+        missing_image_ratio=args.missing_image_ratio,
+        missing_time_ratio=args.missing_time_ratio,
+        out_of_range_ratio=args.out_of_range_ratio,
+    )
+    with site, tempfile.TemporaryDirectory() as work_dir:
+        stages = bench_stages(site, args.runs, work_dir)
+        if not args.skip_pipeline:
+            stages["pipeline"] = bench_pipeline(site, args.runs, args.backend)
+
+    results = {"label": args.label, "settings": vars(args), "stages": stages}
+    for name, stage in stages.items():
+        print(
+            f"{name:>10}: {stage['items_per_s'] or 0:.1f} items/s, "
+            f"p50 {stage['p50_ms']:.2f} ms, p90 {stage['p90_ms']:.2f} ms, "
+            f"p99 {stage['p99_ms']:.2f} ms over {stage['calls']} calls"
+        )
+    if "pipeline" in stages:
+        pipeline = stages["pipeline"]
+        print(f"{'':>10}  {pipeline['rows']} rows stored, peak RSS {pipeline['peak_rss_mb']:.0f} MB")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{args.label}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved results to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
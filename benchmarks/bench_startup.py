@@ -0,0 +1,71 @@
+"""Time the cold start of the robot, up to the point it can start scraping.
+
+Each measurement runs in a fresh interpreter, so nothing is cached from
+an earlier import. For every module it reports the wall time of the
+interpreter importing it, the best of several runs, and the slowest
+top-level imports pulled in, read from `python -X importtime`.
+
+- main: what `python src/main.py` imports before `main()` runs
+- scraper: the Selenium backend, which imports the browser library
+- http_scraper: the HTTP backend, which needs no browser
+- data_extractor: the extraction and output stage
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--top 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+MODULES = ["main", "scraper", "http_scraper", "data_extractor"]
+
+
+def run_import(module, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", f"import {module}"]
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    start = time.perf_counter()
+    completed = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, completed.stderr
+
+
+def slowest_imports(stderr, top):
+    """Get the slowest imports nested one level under the measured module."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # Depth is given by the indentation of the name, two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            imports.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    args = parser.parse_args()
+
+    baseline = min(run_import("sys")[0] for _ in range(args.runs))
+    print(f"{'interpreter':>15}: {baseline * 1000:8.1f} ms")
+    for module in args.modules:
+        best = min(run_import(module)[0] for _ in range(args.runs))
+        print(f"{module:>15}: {best * 1000:8.1f} ms, {(best - baseline) * 1000:8.1f} ms importing")
+        for seconds, name in slowest_imports(run_import(module, importtime=True)[1], args.top):
+            print(f"{'':>17}{name:<32} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
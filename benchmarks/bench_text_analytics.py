@@ -0,0 +1,116 @@
+"""Compare the title analytics before and after precompiling them.
+
+Builds a synthetic corpus of news titles, with money amounts and search
+terms mixed in, and times three ways of finding the money pattern and
+counting the search terms of every title:
+
+- baseline: the original per-title code, joining the money patterns and
+  lowercasing the term on every call, one `str.count` per term
+- per-title: `TextAnalyzer.contains_money` and `count_terms` on each title
+- batch: `TextAnalyzer.classify` on pages of titles, counting the only
+  term on its own like `DataExtractor` does
+
+Usage:
+    python benchmarks/bench_text_analytics.py [--titles 100000] [--terms 1]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from text_analytics import TextAnalyzer  # noqa: E402
+
+WORDS = (
+    "markets stocks rise fall shares bank oil prices central rates inflation "
+    "company deal profit quarter record investors trade talks election court"
+).split()
+AMOUNTS = ["$12.50", "$1,250,000.00", "40 dollars", "300 USD"]
+TERMS = ["apple", "tesla", "nvidia", "amazon", "boeing", "pfizer", "exxon", "disney"]
+
+
+def make_titles(count, terms, seed=0):
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(count):
+        words = rng.choices(WORDS, k=rng.randint(6, 14))
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words)), rng.choice(AMOUNTS))
+        for term in terms:
+            if rng.random() < 0.2:
+                words.insert(rng.randrange(len(words)), term.capitalize())
+        titles.append(" ".join(words))
+    return titles
+
+
+def baseline(titles, terms):
+    results = []
+    for title in titles:
+        patterns = [
+            r"\$\d+\.\d{2}",
+            r"\$\d{1,3}(?:,\d{3})*\.\d{2}",
+            r"\d+ dollars",
+            r"\d+ USD",
+        ]
+        money = bool(re.search("|".join(patterns), title))
+        counts = {term: title.lower().count(term.lower()) for term in terms}
+        results.append((money, counts))
+    return results
+
+
+def per_title(analyzer, titles):
+    return [
+        (analyzer.contains_money(title), analyzer.count_terms(title)) for title in titles
+    ]
+
+
+def batch(analyzer, titles, terms, page_size):
+    term = terms[0] if len(terms) == 1 else None
+    results = []
+    for start in range(0, len(titles), page_size):
+        for result in analyzer.classify(titles[start:start + page_size], term=term):
+            counts = {term: result["term_count"]} if term else result["term_counts"]
+            results.append((result["money_pattern"], counts))
+    return results
+
+
+def measure(name, func, titles, repeat):
+    best = min(_time(func) for _ in range(repeat))
+    print(f"{name:>10}: {best * 1000:8.1f} ms, {len(titles) / best:12,.0f} titles/s")
+    return best
+
+
+def _time(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--titles", type=int, default=100000)
+    parser.add_argument("--terms", type=int, default=1)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    terms = TERMS[: args.terms]
+    titles = make_titles(args.titles, terms)
+    analyzer = TextAnalyzer({term: [] for term in terms})
+    assert baseline(titles[:1000], terms) == per_title(analyzer, titles[:1000])
+    assert batch(analyzer, titles[:1000], terms, args.page_size) == per_title(
+        analyzer, titles[:1000]
+    )
+
+    print(f"{len(titles):,} titles, {len(terms)} terms, pages of {args.page_size}")
+    measure("baseline", lambda: baseline(titles, terms), titles, args.repeat)
+    measure("per-title", lambda: per_title(analyzer, titles), titles, args.repeat)
+    measure("batch", lambda: batch(analyzer, titles, terms, args.page_size), titles, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Local copy of the news website used by the benchmarks.
+
+The site serves a home page with the search button and field that `MainPage`
+selects on, and search result pages with the same `data-testid` markup that
+`ResultPage` selects on, paginated with the "Next stories" button and the
+`offset` query parameter. Result pages also reference the kind of resources
+a real news page loads (thumbnails, web fonts and a third-party tracking
+script served from the `localhost` host name), each delayed by
+`resource_delay` seconds, so page-load strategies can be compared offline.
+
+A share of the news items can be generated without a thumbnail, without a
+publication time or with a publication date long before any date range, so
+every branch of the extraction runs. Which items are affected is fixed by
+`seed`, so two runs with the same settings serve the same pages.
+"""
+
+from datetime import datetime, timedelta, timezone
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, urlencode
+import random
+import threading
+import time
+
+# Smallest valid GIF, served for every thumbnail
+PIXEL = (
+    b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04"
+    b"\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"
+)
+
+HOME_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>Fixture News</title></head>
+<body>
+<button data-testid="Button" onclick="document.getElementById('search').style.display='block'">Search</button>
+<form action="/site-search/" method="get">
+  <input id="search" data-testid="FormField:input" name="query" style="display:none">
+</form>
+</body>
+</html>
+"""
+
+RESULTS_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<title>Search results | Fixture News</title>
+<style>
+@font-face {{ font-family: "Fixture"; src: url("/fonts/regular.woff2"); }}
+@font-face {{ font-family: "Fixture Bold"; src: url("/fonts/bold.woff2"); }}
+body {{ font-family: "Fixture"; }} h3 {{ font-family: "Fixture Bold"; }}
+</style>
+<script src="http://localhost:{port}/tracker.js"></script>
+</head>
+<body>
+<div data-testid="StickyRail">
+  <h1 data-testid="Heading">Search results for "{query}"</h1>
+  <span>Showing {first} - {last} of {total} results</span>
+  <ul class="search-results__list__2SxSK">
+{items}
+  </ul>
+  <button aria-label="Next stories" {next_state} onclick="window.location.href='{next_url}'">Next</button>
+</div>
+</body>
+</html>
+"""
+
+ITEM = """    <li class="search-results__item__2oqiX">
+{image}      <span data-testid="Label"><span>{category}</span></span>
+      <h3 data-testid="Heading"><a href="/{slug}/">{title}</a></h3>
+{time}    </li>"""
+
+CATEGORIES = ["Business", "Markets", "World", "Sports", "Technology"]
+
+
+class FixtureSite:
+    """Serve a synthetic copy of the news website on a local port.
+
+    Attributes:
+        pages (int): Number of search result pages.
+        items_per_page (int): Number of news items on each full page.
+        resource_delay (float): Seconds each image, font and script waits.
+        missing_image_ratio (float): Share of items without a thumbnail.
+        missing_time_ratio (float): Share of items without a publication time.
+        out_of_range_ratio (float): Share of items published over a year ago.
+        seed (int): Seed choosing which items are affected by the ratios.
+        base_url (str): URL of the home page once the site is started.
+
+    Methods:
+        start(): Start serving in a background thread and return the base URL.
+        stop(): Stop the server.
+        search_url(query, page_index): URL of a search result page.
+        make_item(index): Build the data of the news item at a given position.
+        count_items(predicate): Count the served items matching a predicate.
+    """
+
+    def __init__(
+        self,
+        pages=3,
+        items_per_page=20,
+        resource_delay=0.0,
+        missing_image_ratio=0.0,
+        missing_time_ratio=0.0,
+        out_of_range_ratio=0.0,
+        seed=0,
+    ):
+        self.pages = pages
+        self.items_per_page = items_per_page
+        self.resource_delay = resource_delay
+        self.missing_image_ratio = missing_image_ratio
+        self.missing_time_ratio = missing_time_ratio
+        self.out_of_range_ratio = out_of_range_ratio
+        self.seed = seed
+        self.base_url = None
+        self.requests = 0
+        self._server = None
+        self._now = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    @property
+    def total_items(self):
+        return self.pages * self.items_per_page
+
+    def start(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests += 1
+                status, content_type, body, delay = site.respond(self.path)
+                if delay:
+                    time.sleep(delay)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}/"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def search_url(self, query, page_index=0):
+        params = {"query": query, "offset": page_index * self.items_per_page}
+        return f"{self.base_url}site-search/?{urlencode(params)}"
+
+    def make_item(self, index):
+        rng = random.Random(f"{self.seed}-{index}")
+        published = self._now - timedelta(hours=index)
+        if rng.random() < self.out_of_range_ratio:
+            published -= timedelta(days=400)
+        return {
+            "title": f"Fixture news number {index} costs $1{index}.00",
+            "category": CATEGORIES[index % len(CATEGORIES)],
+            "slug": f"news/fixture-{index}",
+            "datetime": (
+                ""
+                if rng.random() < self.missing_time_ratio
+                else published.strftime("%Y-%m-%dT%H:%M:%SZ")
+            ),
+            "src": "" if rng.random() < self.missing_image_ratio else f"/images/{index}.gif",
+        }
+
+    def count_items(self, predicate):
+        """Count the served items for which `predicate(item)` is true."""
+        return sum(1 for index in range(self.total_items) if predicate(self.make_item(index)))
+
+    def render_item(self, item):
+        image = ""
+        if item["src"]:
+            image = (
+                f'      <div data-testid="Image"><img src="{item["src"]}" alt=""></div>\n'
+            )
+        time_element = ""
+        if item["datetime"]:
+            time_element = (
+                f'      <time data-testid="Body" datetime="{item["datetime"]}">'
+                f'{item["datetime"][:10]}</time>\n'
+            )
+        return ITEM.format(
+            image=image,
+            category=escape(item["category"]),
+            slug=item["slug"],
+            title=escape(item["title"]),
+            time=time_element,
+        )
+
+    def render_results(self, query, offset):
+        start = min(offset, self.total_items)
+        end = min(start + self.items_per_page, self.total_items)
+        items = [self.render_item(self.make_item(index)) for index in range(start, end)]
+        has_next = end < self.total_items
+        next_params = urlencode({"query": query, "offset": end})
+        return RESULTS_PAGE.format(
+            port=self._server.server_address[1],
+            query=escape(query),
+            first=start + 1,
+            last=end,
+            total=self.total_items,
+            items="\n".join(items),
+            next_state="" if has_next else "disabled",
+            next_url=f"/site-search/?{next_params}",
+        )
+
+    def respond(self, path):
+        parts = urlsplit(path)
+        if parts.path == "/":
+            return 200, "text/html; charset=utf-8", HOME_PAGE.encode(), 0
+        if parts.path == "/site-search/":
+            params = parse_qs(parts.query)
+            query = params.get("query", [""])[0]
+            offset = int(params.get("offset", ["0"])[0])
+            body = self.render_results(query, offset).encode()
+            return 200, "text/html; charset=utf-8", body, 0
+        if parts.path.startswith("/images/"):
+            return 200, "image/gif", PIXEL, self.resource_delay
+        if parts.path.startswith("/fonts/"):
+            return 200, "font/woff2", b"\x00" * 2048, self.resource_delay
+        if parts.path == "/tracker.js":
+            return 200, "application/javascript", b"window.tracked = true;", self.resource_delay
+        return 404, "text/plain", b"Not found", 0
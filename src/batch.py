@@ -0,0 +1,176 @@
+"""Batch runner for processing every pending work item in parallel.
+
+This script reserves all the input work items waiting in the queue and runs
+them across a pool of worker processes. Each worker keeps its own browser
+open between work items. The script performs the following tasks:
+
+1. Reserve every pending input work item
+2. Scrape each work item in a worker process, into its own data directory
+3. Create an output work item with the Excel file, images and logs
+4. Release each input work item as done, or as failed with the error message
+5. Report the wall time of each work item
+
+A failing work item is released as failed without aborting the others.
+The number of worker processes is read from the BATCH_WORKERS environment
+variable.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.util import Finalize
+from main import create_deadline, create_scraper, scrape, setup_logging, DATA_DIR
+from http_scraper import HttpScraper
+from cached_scraper import CachedScraper
+from utils import screenshots
+import glob
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+_browser = None
+
+
+def get_worker_browser():
+    """Return the long-lived browser of the current worker process."""
+    global _browser
+    if _browser is None:
+        from RPA.Browser.Selenium import Selenium
+
+        _browser = Selenium()
+        # Worker processes skip atexit handlers, so close it as a finalizer
+        Finalize(_browser, _browser.close_all_browsers, exitpriority=10)
+    return _browser
+
+
+def run_work_item(item_id, inputs):
+    """Scrape one work item inside a worker process.
+
+    Returns:
+        tuple: The output files, the wall time in seconds and the error
+            message, which is None when the work item succeeded.
+    """
+    global _browser
+    start = time.perf_counter()
+    data_dir = os.path.join(DATA_DIR, item_id)
+    metrics_files = [
+        os.path.join(data_dir, "metrics.json"),
+        os.path.join(data_dir, "metrics.prom"),
+    ]
+    settings = inputs["settings"]
+    # The time budget counts the browser launch too
+    deadline = create_deadline(settings, time.monotonic())
+    scraper = None
+    try:
+        # Only the Selenium backend needs the browser, and its import is slow
+        browser = None
+        if settings.get("backend", "selenium") == "selenium":
+            browser = get_worker_browser()
+        scraper = create_scraper(settings, browser=browser)
+        extractor = scrape(inputs, scraper, data_dir, deadline=deadline)
+    except Exception as e:
+        logger.critical(f"An unrecoverable error occurred: {e}")
+        # The browser may be left in an unknown state, start a new one next time
+        if _browser is not None:
+            _browser.close_all_browsers()
+            _browser = None
+        files = [path for path in metrics_files if os.path.exists(path)]
+        files += screenshots.file_paths
+        return files, time.perf_counter() - start, f"{e.__class__.__name__}: {e}"
+    finally:
+        if isinstance(scraper, CachedScraper):
+            # The browser is kept for the next work item, only the cache is closed
+            scraper.cache.close()
+            scraper = scraper.scraper
+        if isinstance(scraper, HttpScraper):
+            scraper.close_browser()
+
+    files = extractor.output_file_paths + extractor.image_file_paths
+    files += metrics_files + screenshots.file_paths
+    return files, time.perf_counter() - start, None
+
+
+def reserve_work_items(library):
+    from RPA.Robocorp.WorkItems import WorkItem, EmptyQueue
+
+    items = []
+    while True:
+        try:
+            item_id = library.adapter.reserve_input()
+        except EmptyQueue:
+            break
+        item = WorkItem(adapter=library.adapter, item_id=item_id, parent_id=None)
+        item.load()
+        items.append(item)
+    logger.info(f"Reserved {len(items)} input work items.")
+    return items
+
+
+def release_work_item(library, item, files=None, error=None):
+    from RPA.Robocorp.WorkItems import WorkItem, State
+
+    output = WorkItem(adapter=library.adapter, item_id=None, parent_id=item.id)
+    for path in (files or []) + glob.glob("./logs/*.log"):
+        output.add_file(path)
+    output.save()
+
+    if error is None:
+        library.adapter.release_input(item.id, State.DONE)
+    else:
+        fail_work_item(library, item, error)
+
+
+def fail_work_item(library, item, error):
+    """Release an input work item as failed, without creating an output."""
+    from RPA.Robocorp.WorkItems import State, Error
+
+    exception = {"type": Error.APPLICATION.value, "code": None, "message": error}
+    library.adapter.release_input(item.id, State.FAILED, exception=exception)
+
+
+def main():
+    """Process every pending work item across a pool of worker processes."""
+    from RPA.Robocorp.WorkItems import WorkItems
+
+    setup_logging()
+    workers = int(os.environ.get("BATCH_WORKERS", 2))
+    library = WorkItems(autoload=False)
+    items = reserve_work_items(library)
+
+    start = time.perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(run_work_item, item.id, item.payload): item
+            for item in items
+        }
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                files, elapsed, error = future.result()
+            except Exception as e:
+                # The worker died, e.g. with a BrokenProcessPool
+                files, elapsed, error = [], 0.0, f"{e.__class__.__name__}: {e}"
+            try:
+                release_work_item(library, item, files, error)
+            except Exception as e:
+                logger.error(f"Failed to release work item {item.id}: {e}")
+                error = error or f"{e.__class__.__name__}: {e}"
+                try:
+                    fail_work_item(library, item, error)
+                except Exception as e:
+                    logger.error(f"Failed to release work item {item.id} as failed: {e}")
+            if error is None:
+                logger.info(f"Work item {item.id} done in {elapsed:.1f}s.")
+            else:
+                failed += 1
+                logger.error(f"Work item {item.id} failed after {elapsed:.1f}s: {error}")
+
+    logger.info(
+        f"Processed {len(items)} work items with {workers} workers in "
+        f"{time.perf_counter() - start:.1f}s ({failed} failed)."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+from utils import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CachedScraper:
+    """Read the result pages from a `ResultCache`, and the website otherwise.
+
+    A drop-in replacement for the other scrapers that wraps one of them. The
+    pages of a search found in the cache are read from it, and the website
+    is only opened and searched once a page is missing, then moved to that
+    page. The pages loaded from the website are added to the cache, with
+    their items as plain dicts, so the category and date filters of each
+    work item are applied when the items are extracted.
+
+    Attributes:
+        scraper (Scraper): Scraper loading the pages missing from the cache.
+        cache (ResultCache): Cache of the result pages.
+        scope (str): Scope of the search in the cache.
+        extraction_mode (str): Always "bulk", the items are plain dicts.
+        page_index (int): Index of the current result page.
+        items_seen (int): Number of items on the result pages yielded.
+
+    Methods:
+        open_website(): Wait until a page is missing from the cache to open the website.
+        search_for_term_by_category(term, category): Start reading the pages of a search.
+        load_page(page_index): Get the items of a page, from the cache or the website.
+        iter_pages(item_filter): Yield the items of every page, loading them on demand.
+        go_to_page(page_index): Move to a result page to resume a crawl on it.
+        count_skipped_pages(pages_visited, page_size): Count the result pages not visited.
+        close_browser(): Close the scraper and the cache.
+    """
+
+    def __init__(self, scraper, cache, scope):
+        self.scraper = scraper
+        self.cache = cache
+        self.scope = scope
+        self.extraction_mode = "bulk"
+        self.term = None
+        self.category = None
+        self.page_index = 0
+        self.items_seen = 0
+        # Index of the page the scraper is on, None until the website is searched
+        self._live_index = None
+        self._loaded = None
+
+    @property
+    def recorder(self):
+        return self.scraper.recorder
+
+    @recorder.setter
+    def recorder(self, recorder):
+        # Only the pages loaded from the website can be recorded
+        self.scraper.recorder = recorder
+
+    def open_website(self):
+        logger.info("Opening the website only for the result pages not cached.")
+
+    def search_for_term_by_category(self, term, category):
+        self.term = term
+        self.category = category
+        self.page_index = 0
+        self._live_index = None
+        self._loaded = None
+        return None
+
+    def load_page(self, page_index):
+        """Get the items of a result page, from the cache or the website.
+
+        Returns:
+            tuple: The items of the page and whether it is the last one, or
+                None when the search has no such page.
+        """
+        if self._loaded is not None and self._loaded[0] == page_index:
+            return self._loaded[1]
+        page = self.cache.get(self.scope, self.term, page_index)
+        if page is not None:
+            metrics.increment("result_pages_cached")
+            logger.info(f"Read results page {page_index + 1} from the result cache")
+        else:
+            page = self._load_live_page(page_index)
+        self._loaded = (page_index, page)
+        return page
+
+    def _load_live_page(self, page_index):
+        if self._live_index is None:
+            self.scraper.open_website()
+            self.scraper.search_for_term_by_category(self.term, self.category)
+            self._live_index = 0
+        if page_index != self._live_index:
+            if page_index == self._live_index + 1:
+                exists = self.scraper.go_to_next_page()
+            else:
+                exists = self.scraper.go_to_page(page_index)
+            self._live_index = page_index
+            if not exists:
+                if page_index > 0:
+                    self.cache.mark_last(self.scope, self.term, page_index - 1)
+                return None
+        items = self.scraper.get_page_items()
+        metrics.increment("result_pages_fetched")
+        # A page without results ends the search
+        is_last = not items
+        self.cache.put(self.scope, self.term, page_index, items, is_last)
+        return items, is_last
+
+    def iter_pages(self, item_filter=None):
+        # Items are plain dicts, filtered when they are extracted
+        while True:
+            page = self.load_page(self.page_index)
+            if page is None:
+                return
+            items, is_last = page
+            self.items_seen += len(items)
+            yield items
+            if is_last:
+                return
+            self.page_index += 1
+
+    def go_to_page(self, page_index):
+        self.page_index = page_index
+        page = self.load_page(page_index)
+        return page is not None and bool(page[0])
+
+    def count_skipped_pages(self, pages_visited, page_size):
+        if self._live_index is None:
+            return None
+        return self.scraper.count_skipped_pages(pages_visited, page_size)
+
+    def close_browser(self):
+        self.scraper.close_browser()
+        self.cache.close()
@@ -0,0 +1,146 @@
+from datetime import datetime
+import hashlib
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpoint:
+    """Durable per-page progress of a paginated crawl.
+
+    The checkpoint is a JSON Lines file. Its first line identifies the work
+    item, and one line is appended and flushed to disk after every completed
+    result page, holding the rows extracted from that page, the images
+    downloaded so far and the state the extractor needs to carry on. A line
+    cut short by a crash is ignored when the file is loaded, so a re-run of
+    the same work item resumes after the last page fully written.
+
+    Attributes:
+        file_path (str): Path of the checkpoint file.
+        key (str): Identity of the work item the checkpoint belongs to.
+        pages_completed (int): Number of result pages completed.
+        rows (list): Rows of the completed pages read by `load`.
+        images (dict): File names of the downloaded images by their URL.
+        extractor_state (dict): Extractor state of the completed pages read by `load`.
+
+    Methods:
+        make_key(inputs): Build the key of a work item from its variables.
+        load(): Read the progress of a previous run of the same work item.
+        save_page(page_number, rows, images, extractor_state): Record a completed page.
+        keep_position(): Drop the rows once they are stored, keeping where to resume.
+        clear(): Remove the checkpoint once the work item is stored.
+    """
+
+    def __init__(self, file_path, key):
+        self.file_path = file_path
+        self.key = key
+        self.pages_completed = 0
+        self.rows = []
+        self.images = {}
+        self.extractor_state = {}
+
+    @staticmethod
+    def make_key(inputs):
+        identity = {
+            "base_url": inputs["settings"].get("base_url"),
+            "search_term": inputs["search_term"],
+            "category": inputs["category"],
+            "month_number": inputs["month_number"],
+        }
+        return hashlib.sha1(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+
+    def load(self):
+        """Load the previous progress, returning the number of pages completed."""
+        if not os.path.exists(self.file_path):
+            return 0
+        with open(self.file_path, "r") as f:
+            lines = f.read().splitlines()
+        try:
+            header = json.loads(lines[0]) if lines else {}
+        except json.JSONDecodeError:
+            header = {}
+        if header.get("key") != self.key:
+            logger.info(f"Ignoring checkpoint {self.file_path} of another work item")
+            os.remove(self.file_path)
+            return 0
+
+        for line in lines[1:]:
+            try:
+                page = json.loads(line)
+            except json.JSONDecodeError:
+                # Only the last line can be cut short by a crash
+                break
+            self.pages_completed = page["page"]
+            self.rows.extend(page["rows"])
+            self.images.update(page["images"])
+            self._merge_extractor_state(page["extractor"])
+        logger.info(
+            f"Resuming after page {self.pages_completed} with {len(self.rows)} rows "
+            f"and {len(self.images)} images from {self.file_path}"
+        )
+        return self.pages_completed
+
+    def save_page(self, page_number, rows, images, extractor_state):
+        dir_path = os.path.dirname(self.file_path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        new_images = {
+            url: file_name for url, file_name in images.items() if url not in self.images
+        }
+        lines = []
+        if not os.path.exists(self.file_path):
+            lines.append({"key": self.key, "created_at": datetime.now().isoformat()})
+        lines.append(
+            {
+                "page": page_number,
+                "rows": rows,
+                "images": new_images,
+                "extractor": extractor_state,
+            }
+        )
+        with open(self.file_path, "a") as f:
+            for line in lines:
+                f.write(json.dumps(line) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.pages_completed = page_number
+        self.images.update(new_images)
+        self._merge_extractor_state(extractor_state)
+
+    def keep_position(self):
+        """Rewrite the checkpoint as a single page without rows.
+
+        Once the output holding the rows is stored, a resumed run must not
+        store them again, but still needs the page to resume after, the
+        downloaded images and the extractor state.
+        """
+        if not os.path.exists(self.file_path):
+            return
+        lines = [
+            {"key": self.key, "created_at": datetime.now().isoformat()},
+            {
+                "page": self.pages_completed,
+                "rows": [],
+                "images": self.images,
+                "extractor": self.extractor_state,
+            },
+        ]
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, "w") as f:
+            for line in lines:
+                f.write(json.dumps(line) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.file_path)
+        self.rows = []
+
+    def _merge_extractor_state(self, state):
+        # Each page only holds the articles it marked as seen
+        seen = self.extractor_state.get("seen", []) + state.get("seen", [])
+        self.extractor_state = dict(state, seen=seen)
+
+    def clear(self):
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
@@ -1,11 +1,10 @@
-from RPA.Excel.Files import Files
-from utils import resilient_action
-import re
+from utils import resilient_action, timed, metrics
+from text_analytics import TextAnalyzer
+from date_window import DateWindow, parse_iso_datetime
 from requests import get
-from uuid import uuid4
+from image_store import ImageStore
 import os
 import logging
-from datetime import datetime, timedelta, timezone
 
 logger = logging.getLogger(__name__)
 
@@ -20,30 +19,77 @@ class DataExtractor:
 
     Attributes:
         term (str): The search term to look for.
-        category (str): The category to filter results by.
+        synonyms (list): Optional; Other spellings of the term counted with it.
+        analyzer (TextAnalyzer): Money pattern and term matcher compiled for the term.
+        category (str): The category to filter results by, "all" to keep every category.
+        filter_category (bool): Optional; Whether to leave out items of other categories.
         month_number (int): The number of months to consider for filtering by date.
+        date_window (DateWindow): Range of dates to collect, computed once per run.
         excel_file_path (str): Optional; Path where the Excel file will be saved.
+        output_file_paths (list): Paths of the output files written by the last writer opened.
         robot_root (str): The root directory for robot operations.
+        data_dir (str): Optional; Directory where the images and Excel file are saved.
         headers (list): List of headers for the Excel file.
+        image_fetcher (ImageFetcher): Optional; Downloads images in the background.
+        image_store (ImageStore): Optional; Image cache used when there is no image fetcher.
+        image_file_paths (list): Paths of the images referenced by the stored rows.
+        consecutive_out_of_range (int): Dated items in a row found older than the range.
+        seen_index (SeenIndex): Optional; Index of the articles collected by previous runs.
+        sorted_by_date (bool): Optional; Whether the results are sorted newest-first.
+        high_water_mark (datetime): Newest article datetime collected by the last run,
+            only used when the results are sorted newest-first.
+        reached_high_water_mark (bool): Whether an item at or before the mark was found.
+        skipped_seen (int): Number of items skipped because they were already seen.
 
     Methods:
         ensure_dir_exists(dir_path): Ensure the directory exists, create it otherwise.
-        process_image(url): Download and save an image from a URL.
+        process_image(url): Download an image from a URL and save it in the image store.
         contains_money_patterns(input_str): Check if a string contains patterns related to money.
         count_searched_term(title): Count occurrences of the search term in a title.
         extract_from_page(page): Extract data from a page of search results.
+        parse_date(date_time_str): Parse a datetime string, returning None if invalid.
+        earliest_date_in_range(current_time): Get the start of the defined time range.
         is_date_in_range(date_time_str): Check if a date is in the defined time range.
+        is_date_before_range(date_time_str): Check if a date is older than the time range.
+        filter_page(items): Check the category and date of a whole page of items at once.
+        has_left_date_range(limit): Check if the last items were all older than the range.
+        is_new_item(item, date_time): Check the seen index and mark the item as seen.
+        save_seen_index(): Move the high-water mark forward and commit the seen index.
+        get_state(): Get the counters and the articles marked seen since the last call.
+        restore_state(state): Carry on from the state of an interrupted run.
         is_in_category_defined(category): Check if an item belongs to a defined category.
-        extract_data(search_result): Extract relevant data from a search result element.
+        read_search_result(search_result): Read search result elements into a plain dict.
+        extract_data(search_result, keep): Extract relevant data from a search result element.
+        extract_item(item, analysis, keep): Extract relevant data from a plain search result dict.
+        classify_titles(titles): Find money amounts and count the term in many titles at once.
+        extract_from_items(items): Extract data from a page of plain search result dicts.
+        iter_rows(results, from_elements, prefiltered): Yield the rows extracted from a page of results.
         store_data_to_excel(data): Store extracted data in an Excel file.
+        open_excel_writer(batch_size): Open a batched Excel writer session.
+        open_output_writer(formats, batch_size): Open a writer session for several output formats.
 
     """
 
-    def __init__(self, term, category, month_number, excel_file_path=None):
+    def __init__(
+        self,
+        term,
+        category,
+        month_number,
+        excel_file_path=None,
+        image_fetcher=None,
+        seen_index=None,
+        data_dir=None,
+        synonyms=None,
+        filter_category=True,
+        image_store=None,
+        sorted_by_date=False,
+    ):
         self.robot_root = os.environ.get("ROBOT_ROOT", ".")
+        self.data_dir = data_dir or os.path.join(self.robot_root, "data")
         self.excel_file_path = excel_file_path or os.path.join(
-            self.robot_root, "data", "scraped_data.xlsx"
+            self.data_dir, "scraped_data.xlsx"
         )
+        self.output_file_paths = [self.excel_file_path]
         self.headers = [
             "money_pattern",
             "count_term",
@@ -52,83 +98,213 @@ class DataExtractor:
             "date",
         ]
         self.term = term
+        self.synonyms = list(synonyms or [])
+        self.analyzer = TextAnalyzer({term: self.synonyms})
         self.category = category
+        self.filter_category = filter_category
         self.month_number = month_number
+        self.date_window = DateWindow(month_number)
+        self.image_fetcher = image_fetcher
+        self.image_store = image_store
+        self.image_file_paths = []
+        self.consecutive_out_of_range = 0
+        self.seen_index = seen_index
+        self.sorted_by_date = sorted_by_date
+        self.high_water_mark = None
+        self.reached_high_water_mark = False
+        self.newest_date = None
+        self.skipped_seen = 0
+        self._new_seen = []
+        # Unsorted results can follow older ones, so only the seen index
+        # tells whether they were collected
+        if seen_index is not None and sorted_by_date:
+            self.high_water_mark = self.parse_date(
+                seen_index.get_high_water_mark(term, category) or ""
+            )
 
     def ensure_dir_exists(self, dir_path):
         if not os.path.exists(dir_path):
             os.makedirs(dir_path)
 
+    @timed("extractor.process_image")
     def process_image(self, url):
         try:
             response = get(url)
             response.raise_for_status()
-            id = uuid4()
-            file_path = os.path.join(self.robot_root, "data", f"image_{id}.png")
-            file_name = f"image_{id}.png"
-            self.ensure_dir_exists(os.path.dirname(file_path))
-            with open(file_path, "wb") as f:
-                f.write(response.content)
-            return file_name
+            if self.image_store is None:
+                self.image_store = ImageStore(self.data_dir)
+            return self.image_store.put(url, response.content)
         except Exception as e:
             logging.error(f"Failed to download image: {e}")
             raise e
 
     def contains_money_patterns(self, input_str):
-        patterns = [
-            r"\$\d+\.\d{2}",  # $xx.x
-            r"\$\d{1,3}(?:,\d{3})*\.\d{2}",  # $xxx,xxx.xx
-            r"\d+ dollars",  # xx dollars
-            r"\d+ USD",  # xx USD
-        ]
+        return self.analyzer.contains_money(input_str)
 
-        compound_pattern = "|".join(patterns)
+    def count_searched_term(self, title):
+        return self.analyzer.count_terms(title)[self.term]
 
-        if re.search(compound_pattern, input_str):
-            return True
+    def classify_titles(self, titles):
+        """Classify a page of titles in one pass, see `TextAnalyzer.classify`."""
+        return self.analyzer.classify(titles, term=self.term)
+
+    def extract_from_page(self, page):
+        return list(self.iter_rows(page, from_elements=True))
+
+    def extract_from_items(self, items):
+        return list(self.iter_rows(items))
+
+    def iter_rows(self, results, from_elements=False, prefiltered=False):
+        """Yield the rows extracted from a page of results, one at a time.
+
+        Results filtered out by category, by date or by the seen index are
+        skipped. Set `from_elements` when the results are scraped elements
+        rather than plain dicts, and `prefiltered` when they were already
+        kept by `filter_page`. Plain dicts are filtered before their titles
+        are classified and their images downloaded.
+        """
+        if from_elements:
+            keep = True if prefiltered else None
+            rows = (self.extract_data(result, keep) for result in results)
         else:
-            return False
+            if not prefiltered:
+                mask = self.filter_page(results)
+                results = [item for item, keep in zip(results, mask) if keep]
+            analyses = self.classify_titles([item.get("title", "") for item in results])
+            rows = (
+                self.extract_item(item, analysis, keep=True)
+                for item, analysis in zip(results, analyses)
+            )
+        for row in rows:
+            if row is not None:
+                yield row
 
-    def count_searched_term(self, title):
-        return title.lower().count(self.term.lower())
+    def parse_date(self, date_time_str):
+        return parse_iso_datetime(date_time_str)
 
-    def extract_from_page(self, page):
-        data = []
-        for item in page:
-            extract = self.extract_data(item)
-            if extract is not None:
-                data.append(extract)
-        return data
+    def earliest_date_in_range(self, current_time):
+        return DateWindow.earliest(current_time, self.month_number)
 
     def is_date_in_range(self, date_time_str):
-        try:
-            date_time = datetime.strptime(date_time_str, "%Y-%m-%dT%H:%M:%SZ")
-            date_time = date_time.replace(tzinfo=timezone.utc)
-        except ValueError:
-            # Handle other date formats or raise an error
+        return self.date_window.contains(self.parse_date(date_time_str))
+
+    def is_date_before_range(self, date_time_str):
+        return self.date_window.is_before(self.parse_date(date_time_str))
+
+    def filter_page(self, items):
+        """Check the category and date of a whole page of items at once.
+
+        Only the "category" and "datetime" keys of the items are read, so the
+        items left out never need their other fields or images looked up. The
+        consecutive out-of-range count follows the dates of every item,
+        whatever its category, as the results are sorted by date only.
+
+        Returns:
+            list: Whether to keep each item, in the same order.
+        """
+        mask = []
+        out_of_range = other_category = 0
+        for item in items:
+            date_time = self.parse_date(item.get("datetime", ""))
+            in_range = self.date_window.contains(date_time)
+            if in_range:
+                self.consecutive_out_of_range = 0
+            else:
+                out_of_range += 1
+                if self.date_window.is_before(date_time):
+                    self.consecutive_out_of_range += 1
+            keep = in_range
+            if in_range and self.filter_category:
+                keep = self.is_in_category_defined(item.get("category", ""))
+                other_category += not keep
+            mask.append(keep)
+        metrics.increment("items_out_of_range", out_of_range)
+        metrics.increment("items_other_category", other_category)
+        return mask
+
+    def has_left_date_range(self, limit):
+        """Check if the last `limit` dated items were all older than the range.
+
+        Only meaningful when the results are sorted newest-first, as every
+        following item is then out of range too.
+        """
+        return self.consecutive_out_of_range >= limit
+
+    def is_new_item(self, item, date_time):
+        if self.high_water_mark is not None and date_time <= self.high_water_mark:
+            # Everything from here on was collected by a previous run
+            self.reached_high_water_mark = True
             return False
 
-        current_time = datetime.now(timezone.utc)
-        earliest_date_in_range = current_time.replace(
-            day=1, hour=0, minute=0, second=0, microsecond=0
-        ) - timedelta(days=(self.month_number - 1) * 30)
+        key = self.seen_index.make_key(item)
+        if self.seen_index.is_seen(key):
+            self.skipped_seen += 1
+            return False
+
+        published = date_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+        self.seen_index.mark_seen(key, self.term, self.category, published)
+        self._new_seen.append([key, published])
+        if self.newest_date is None or date_time > self.newest_date:
+            self.newest_date = date_time
+        return True
+
+    def save_seen_index(self):
+        if self.newest_date is not None:
+            self.seen_index.update_high_water_mark(
+                self.term,
+                self.category,
+                self.newest_date.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            )
+        self.seen_index.commit()
+        logger.info(f"Skipped {self.skipped_seen} already seen articles")
 
-        return earliest_date_in_range <= date_time <= current_time
+    def get_state(self):
+        """Get the state needed to resume extracting on the next page.
+
+        The articles marked as seen are only returned once, so each call holds
+        the ones marked since the previous call.
+        """
+        state = {
+            "consecutive_out_of_range": self.consecutive_out_of_range,
+            "skipped_seen": self.skipped_seen,
+            "newest_date": (
+                self.newest_date.strftime("%Y-%m-%dT%H:%M:%SZ") if self.newest_date else None
+            ),
+            "seen": self._new_seen,
+        }
+        self._new_seen = []
+        return state
+
+    def restore_state(self, state):
+        self.consecutive_out_of_range = state.get("consecutive_out_of_range", 0)
+        self.skipped_seen = state.get("skipped_seen", 0)
+        self.newest_date = self.parse_date(state.get("newest_date") or "")
+        if self.seen_index is not None:
+            for key, published in state.get("seen", []):
+                self.seen_index.mark_seen(key, self.term, self.category, published)
 
     def is_in_category_defined(self, category):
-        return self.category.lower() == category.lower()
+        # Items without a label cannot be told apart, so they are kept
+        if not self.category or self.category.lower() == "all" or not category:
+            return True
+        return self.category.strip().lower() == category.strip().lower()
 
-    @resilient_action
-    def extract_data(self, search_result):
-        extracted_data = {}
+    def read_search_result(self, search_result):
+        item = {}
         element_mapping = {
             "title": ("title_element", "text", ""),
-            "image": ("image_element", "src", ""),
-            "date": ("time_element", "datetime", ""),
+            "category": ("category_element", "text", ""),
+            "url": ("title_element", "href", ""),
+            "datetime": ("time_element", "datetime", ""),
+            "src": ("image_element", "src", ""),
         }
 
-        # Extract the data
+        # Read the elements into plain data
         for key, (element_key, attribute, default) in element_mapping.items():
+            if key in search_result:
+                # Already read as plain data by the page filter
+                item[key] = search_result[key] or default
+                continue
             element = search_result.get(element_key)
 
             if attribute == "text":
@@ -136,31 +312,62 @@ class DataExtractor:
             else:
                 value = element.get_attribute(attribute) if element else default
 
-            # Special cases
-            if key == "title":
-                extracted_data["money_pattern"] = (
-                    self.contains_money_patterns(value) if value else ""
-                )
-                extracted_data["count_term"] = (
-                    self.count_searched_term(value) if value else ""
-                )
-            elif key == "date":
-                if not self.is_date_in_range(value):
-                    return None
-            elif key == "category":
-                if not self.is_in_category_defined(value):
-                    return None
-
-            extracted_data[key] = value
+            item[key] = value or default
+
+        return item
+
+    @timed("extractor.extract_data")
+    @resilient_action
+    def extract_data(self, search_result, keep=None):
+        return self.extract_item(self.read_search_result(search_result), keep=keep)
+
+    # Only reading the elements can raise the errors retried by
+    # `resilient_action`, so it is left to `extract_data`
+    @timed("extractor.extract_item")
+    def extract_item(self, item, analysis=None, keep=None):
+        title = item.get("title", "")
+        if title and analysis is not None:
+            money_pattern = analysis["money_pattern"]
+            count_term = analysis["term_count"]
+        elif title:
+            money_pattern = self.contains_money_patterns(title)
+            count_term = self.count_searched_term(title)
+        else:
+            money_pattern = count_term = ""
+        extracted_data = {
+            "money_pattern": money_pattern,
+            "count_term": count_term,
+            "title": title,
+            "image": item.get("src", ""),
+            "date": item.get("datetime", ""),
+        }
+
+        # Items kept by filter_page were already checked and counted
+        if keep is None:
+            keep = self.filter_page([item])[0]
+        if not keep:
+            return None
+
+        if self.seen_index is not None:
+            date_time = self.parse_date(extracted_data["date"])
+            if not self.is_new_item(item, date_time):
+                return None
 
         # Special case: process the image if it exists
         if extracted_data["image"]:
-            extracted_data["image"] = self.process_image(extracted_data["image"])
+            if self.image_fetcher is not None:
+                # The file name is filled in once the download finishes
+                self.image_fetcher.submit(extracted_data["image"], extracted_data)
+            else:
+                extracted_data["image"] = self.process_image(extracted_data["image"])
 
         return extracted_data
 
+    @timed("excel.store_data")
     @resilient_action
     def store_data_to_excel(self, data):
+        from RPA.Excel.Files import Files
+
         self.ensure_dir_exists(os.path.dirname(self.excel_file_path))
 
         excel = Files()
@@ -186,3 +393,31 @@ class DataExtractor:
         except Exception as e:
             logging.error(f"An error occurred while saving to Excel: {e}")
             raise e
+
+    def open_excel_writer(self, batch_size=100):
+        """Open a session-scoped writer for the Excel file.
+
+        Use it as a context manager to write many rows with a single open
+        and save, instead of calling `store_data_to_excel` once per row.
+        """
+        # The writers import openpyxl, only needed once there is data to store
+        from excel_writer import ExcelWriter
+
+        return ExcelWriter(self.excel_file_path, self.headers, batch_size)
+
+    def open_output_writer(self, formats=("excel",), batch_size=100):
+        """Open a session-scoped writer for each of the output formats.
+
+        Every format is written next to the Excel file with its own extension
+        and the same `headers`, see `output_writers.OUTPUT_WRITERS`.
+        """
+        from output_writers import create_output_writer, MultiWriter
+
+        base_path = os.path.splitext(self.excel_file_path)[0]
+        writer = create_output_writer(base_path, self.headers, formats, batch_size)
+        writers = writer.writers if isinstance(writer, MultiWriter) else [writer]
+        # Parquet sessions write their own part file inside the dataset
+        self.output_file_paths = [
+            getattr(writer, "part_path", writer.file_path) for writer in writers
+        ]
+        return writer
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+import re
+
+ISO_DATETIME = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})"
+    r"(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:[.,](\d+))?)?)?"
+    r"\s*(Z|[+-]\d{2}(?::?\d{2})?)?$",
+    re.IGNORECASE,
+)
+
+
+def parse_iso_datetime(value):
+    """Parse an ISO-8601 datetime string into an aware UTC datetime.
+
+    The format of the website, "2023-07-10T20:00:00Z", is read by slicing.
+    Other variants go through a regex: fractional seconds, UTC offsets,
+    a space instead of the "T", minutes without seconds and plain dates.
+    Datetimes without an offset are taken as UTC.
+
+    Returns:
+        datetime: The datetime in UTC, or None if the string is not valid.
+    """
+    if not value:
+        return None
+    if len(value) == 20 and value[19] == "Z" and value[10] == "T":
+        if value[4] == value[7] == "-" and value[13] == value[16] == ":":
+            try:
+                return datetime(
+                    int(value[0:4]),
+                    int(value[5:7]),
+                    int(value[8:10]),
+                    int(value[11:13]),
+                    int(value[14:16]),
+                    int(value[17:19]),
+                    tzinfo=timezone.utc,
+                )
+            except ValueError:
+                return None
+
+    match = ISO_DATETIME.match(value.strip())
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+    tzinfo = timezone.utc
+    if offset and offset.upper() != "Z":
+        sign = -1 if offset[0] == "-" else 1
+        digits = offset[1:].replace(":", "")
+        tzinfo = timezone(sign * timedelta(hours=int(digits[:2]), minutes=int(digits[2:] or 0)))
+    try:
+        date_time = datetime(
+            int(year),
+            int(month),
+            int(day),
+            int(hour or 0),
+            int(minute or 0),
+            int(second or 0),
+            int((fraction or "0")[:6].ljust(6, "0")),
+            tzinfo=tzinfo,
+        )
+    except ValueError:
+        return None
+    return date_time.astimezone(timezone.utc)
+
+
+class DateWindow:
+    """Range of publication dates to collect, computed once per run.
+
+    The range starts on the first day of the month `month_number - 1`
+    months ago (one month being 30 days) and ends now. The end is only
+    read again from the clock when a date past it is checked, so items
+    published while the run goes on are still in range.
+
+    Attributes:
+        month_number (int): Number of months in the range, 0 and 1 meaning the current one.
+        start (datetime): Earliest datetime in the range.
+        end (datetime): Latest datetime known to be in the range.
+
+    Methods:
+        earliest(current_time, month_number): Get the start of the range at a given time.
+        contains(date_time): Check if a datetime is in the range.
+        is_before(date_time): Check if a datetime is older than the range.
+        mask(date_times): Check a list of datetimes at once.
+    """
+
+    def __init__(self, month_number, now=None):
+        self.month_number = month_number
+        self.end = now or datetime.now(timezone.utc)
+        self.start = self.earliest(self.end, month_number)
+
+    @staticmethod
+    def earliest(current_time, month_number):
+        # 0 would start a month after the current one
+        month_number = max(month_number, 1)
+        return current_time.replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        ) - timedelta(days=(month_number - 1) * 30)
+
+    def contains(self, date_time):
+        if date_time is None or date_time < self.start:
+            return False
+        if date_time > self.end:
+            self.end = datetime.now(timezone.utc)
+        return date_time <= self.end
+
+    def is_before(self, date_time):
+        return date_time is not None and date_time < self.start
+
+    def mask(self, date_times):
+        return [self.contains(date_time) for date_time in date_times]
@@ -0,0 +1,79 @@
+from utils import metrics
+import math
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Deadline:
+    """Wall-clock budget of a run, to stop in time to save the output.
+
+    Robocorp kills a run that goes over its time limit, and with it all the
+    rows not saved yet. The cost of a result page and of an image download
+    are measured as the run goes on, and before each new page the remaining
+    time is checked against the cost of one more page, of the image
+    downloads still pending and of the `reserve` kept to save and upload
+    the output. Once it no longer fits, the crawl stops, the pending
+    downloads get what is left before the reserve and the output is saved.
+
+    Attributes:
+        budget (float): Seconds the run may take, from its start.
+        reserve (float): Seconds kept at the end to save and upload the output.
+        started (float): Monotonic time the run started at, now unless given.
+        page_seconds (float): Moving average of the seconds taken by a result page.
+        image_seconds (float): Seconds taken by an image download, before any is measured.
+
+    Methods:
+        remaining(): Get the seconds left in the budget.
+        record_page(seconds): Add the time taken by a result page to its average.
+        image_cost(): Get the measured seconds of an image download.
+        drain_seconds(pending_images, workers): Estimate the time to finish the pending downloads.
+        allows_page(pending_images, workers): Check if one more result page fits in the budget.
+        drain_timeout(): Get the seconds the pending downloads may still take.
+    """
+
+    # Weight of the last page in the moving average of the page cost
+    SMOOTHING = 0.3
+
+    def __init__(self, budget, reserve=30, image_seconds=1.0, clock=time.monotonic, started=None):
+        self.budget = float(budget)
+        self.reserve = float(reserve)
+        self.image_seconds = image_seconds
+        self._clock = clock
+        self.started = clock() if started is None else started
+        self.page_seconds = None
+
+    def remaining(self):
+        return self.budget - (self._clock() - self.started)
+
+    def record_page(self, seconds):
+        if self.page_seconds is None:
+            self.page_seconds = seconds
+        else:
+            self.page_seconds += self.SMOOTHING * (seconds - self.page_seconds)
+
+    def image_cost(self):
+        timing = metrics.timings.get("images.download")
+        if not timing or not timing["count"]:
+            return self.image_seconds
+        return timing["total_seconds"] / timing["count"]
+
+    def drain_seconds(self, pending_images, workers):
+        return math.ceil(pending_images / max(1, workers)) * self.image_cost()
+
+    def allows_page(self, pending_images=0, workers=1):
+        # Before the first page is timed, only the reserve is known
+        page_seconds = self.page_seconds or 0.0
+        needed = page_seconds + self.drain_seconds(pending_images, workers) + self.reserve
+        remaining = self.remaining()
+        if remaining < needed:
+            logger.warning(
+                f"{remaining:.1f}s left in the time budget, {needed:.1f}s needed for "
+                f"another page, {pending_images} pending images and the output"
+            )
+            return False
+        return True
+
+    def drain_timeout(self):
+        return max(0.0, self.remaining() - self.reserve)
@@ -0,0 +1,119 @@
+from openpyxl import Workbook, load_workbook
+from utils import timed
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ExcelWriter:
+    """Write scraped rows to an Excel file in a single session.
+
+    The workbook is opened once, rows are buffered in memory and flushed in
+    batches to a write-only (streaming) worksheet, and the file is saved a
+    single time when the session is closed. If the file already exists its
+    rows are streamed into the new workbook first, so new rows are appended
+    after them.
+
+    Attributes:
+        file_path (str): Path of the Excel file.
+        headers (list): Column order used for the header row and every data row.
+        batch_size (int): Number of buffered rows that triggers a flush.
+        rows_written (int): Number of data rows written during the session.
+
+    Methods:
+        open(): Open the workbook and stream the existing rows, if any.
+        write_row(data): Buffer a row, flushing when the batch is full.
+        flush(): Append the buffered rows to the worksheet.
+        close(): Flush the remaining rows and save the workbook.
+        discard(): Drop the session without saving the workbook.
+    """
+
+    def __init__(self, file_path, headers, batch_size=100):
+        self.file_path = file_path
+        self.headers = list(headers)
+        self.batch_size = max(1, int(batch_size))
+        self.rows_written = 0
+        self._buffer = []
+        self._workbook = None
+        self._worksheet = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def open(self):
+        dir_path = os.path.dirname(self.file_path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+
+        self._workbook = Workbook(write_only=True)
+        if os.path.exists(self.file_path):
+            existing = load_workbook(self.file_path, read_only=True)
+            try:
+                source = existing.active
+                self._worksheet = self._workbook.create_sheet(source.title)
+                for row in source.iter_rows(values_only=True):
+                    self._worksheet.append(row)
+            finally:
+                existing.close()
+            logger.info(f"Appending rows to existing file {self.file_path}")
+        else:
+            self._worksheet = self._workbook.create_sheet("Sheet")
+            self._worksheet.append(self.headers)
+            logger.info(f"Creating new file {self.file_path}")
+
+    def write_row(self, data):
+        self._buffer.append([data.get(header, "") for header in self.headers])
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    @timed("excel.flush")
+    def flush(self):
+        if self._worksheet is None:
+            raise RuntimeError("ExcelWriter is not open.")
+        for row in self._buffer:
+            self._worksheet.append(row)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    @timed("excel.close")
+    def close(self):
+        if self._workbook is None:
+            return
+        try:
+            self.flush()
+            # Write-only workbooks can be saved a single time, so save to a
+            # temporary file and swap it in to never leave a half-written file
+            self._workbook.save(self._tmp_path)
+            os.replace(self._tmp_path, self.file_path)
+            logger.info(f"Saved {self.rows_written} rows to {self.file_path}")
+        except Exception as e:
+            logger.error(f"An error occurred while saving to Excel: {e}")
+            raise e
+        finally:
+            self._workbook = None
+            self._worksheet = None
+
+    @property
+    def _tmp_path(self):
+        return f"{self.file_path}.tmp"
+
+    def discard(self):
+        if self._workbook is not None:
+            # Saving is how a write-only workbook releases the file its rows
+            # were streamed to, so save to the temporary path and remove it
+            try:
+                self._workbook.save(self._tmp_path)
+            except Exception as e:
+                logger.warning(f"Could not release the discarded workbook: {e}")
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+        self._buffer = []
+        self._workbook = None
+        self._worksheet = None
+        logger.info(f"Discarded the rows written to {self.file_path}")
@@ -0,0 +1,167 @@
+from bs4 import BeautifulSoup
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib.parse import urljoin
+from utils import resilient_action, set_url_params, timed
+from result_page import ResultPage
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class HttpScraper:
+    """Scrape search results over plain HTTP, without a browser.
+
+    This class is a drop-in replacement for `Scraper` that requests the
+    search result pages directly through a pooled `requests.Session` and
+    parses them with BeautifulSoup, using the same selectors as `ResultPage`.
+    Pages are addressed by their offset in the search URL, and every item is
+    returned as the same plain dict that `ResultPage.extract_items` produces.
+
+    Attributes:
+        config (dict): Configuration parameters for the scraper.
+        session (Session): Shared keep-alive HTTP session.
+        extraction_mode (str): Always "bulk", the items are plain dicts.
+        search_url (str): URL of the search page for the current term.
+        offset (int): Offset of the current result page.
+        page_size (int): Number of results per page.
+        recorder (PageRecorder): Optional; Records the HTML of every page loaded.
+        items_seen (int): Number of items on the result pages yielded.
+
+    Methods:
+        open_website(): Open the HTTP session to the base website.
+        search_for_term_by_category(term, category): Load the first result page.
+        load_page(): Request and parse the result page at the current offset.
+        get_page_items(): Get the items of the current page as plain dicts.
+        parse_items(html, page_url): Parse the items of a result page.
+        go_to_next_page(): Load the next result page if there is one.
+        iter_pages(item_filter): Yield the items of every page, loading them on demand.
+        go_to_page(page_index): Load a result page to resume a crawl on it.
+        count_skipped_pages(pages_visited, page_size): Count the result pages not visited.
+        close_browser(): Close the HTTP session.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.session = Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = config.get(
+            "user_agent", "Mozilla/5.0 (X11; Linux x86_64) NewsScraper"
+        )
+        self.extraction_mode = "bulk"
+        self.search_url = None
+        self.offset = 0
+        self.page_size = config.get("page_size", 20)
+        self.recorder = None
+        self.items_seen = 0
+        self._page_url = None
+        self._soup = None
+
+    @resilient_action
+    def open_website(self):
+        response = self.session.get(
+            self.config["base_url"], timeout=self.config["wait_time"]
+        )
+        response.raise_for_status()
+        logger.info("Successfully opened the website.")
+
+    def search_for_term_by_category(self, term, category):
+        self.search_url = set_url_params(
+            urljoin(self.config["base_url"], self.config.get("search_path", "site-search/")),
+            query=term,
+        )
+        if self.config.get("sort_by_date", False):
+            self.search_url = set_url_params(
+                self.search_url, **{ResultPage.SORT_PARAM: ResultPage.SORT_NEWEST}
+            )
+        self.offset = 0
+        self.load_page()
+        return None
+
+    @timed("http.load_page")
+    @resilient_action
+    def load_page(self):
+        page_url = set_url_params(self.search_url, offset=self.offset)
+        response = self.session.get(page_url, timeout=self.config["wait_time"])
+        response.raise_for_status()
+        self._page_url = page_url
+        self._soup = BeautifulSoup(response.text, "lxml")
+        if self.recorder is not None:
+            self.recorder.record(page_url, response.text)
+        logger.info(f"Successfully loaded results page {page_url}")
+
+    def get_page_items(self):
+        return self.parse_items(self._soup, self._page_url)
+
+    def parse_items(self, html, page_url):
+        soup = html if isinstance(html, BeautifulSoup) else BeautifulSoup(html, "lxml")
+        items = []
+        for li in soup.select(ResultPage.IL):
+            title_element = li.select_one(ResultPage.TITLE_ITEM)
+            category_element = li.select_one(ResultPage.CATEGORY_ITEM)
+            time_element = li.select_one(ResultPage.TIME_ITEM)
+            div_element = li.select_one(ResultPage.DIV_IMAGE_ITEM)
+            image_element = (
+                div_element.find(ResultPage.IMAGE_ITEM) if div_element else None
+            )
+            items.append(
+                {
+                    "title": self._text(title_element),
+                    "category": self._text(category_element),
+                    "url": self._link(title_element, "href", page_url),
+                    "datetime": time_element.get("datetime", "") if time_element else "",
+                    "src": self._link(image_element, "src", page_url),
+                }
+            )
+        logger.info(f"Successfully parsed {len(items)} items")
+        return items
+
+    def _text(self, element):
+        # Collapse whitespace the way the browser's innerText does
+        return " ".join(element.get_text().split()) if element else ""
+
+    def _link(self, element, attribute, page_url):
+        if element is None or not element.get(attribute):
+            return ""
+        return urljoin(page_url, element[attribute])
+
+    def go_to_next_page(self):
+        next_button = self._soup.select_one(ResultPage.NEXT_BUTTON)
+        if next_button is None or next_button.has_attr("disabled"):
+            logger.info("No next button to click")
+            return False
+        self.offset += self.page_size
+        self.load_page()
+        return True
+
+    def iter_pages(self, item_filter=None):
+        # Items are plain dicts, filtered when they are extracted
+        while True:
+            items = self.get_page_items()
+            self.items_seen += len(items)
+            yield items
+            if not self.go_to_next_page():
+                return
+
+    def go_to_page(self, page_index):
+        self.offset = page_index * self.page_size
+        self.load_page()
+        return self._soup.select_one(ResultPage.IL) is not None
+
+    def count_skipped_pages(self, pages_visited, page_size):
+        container = self._soup.select_one(ResultPage.DIV_SEARCH)
+        if container is None or page_size == 0:
+            return None
+        match = re.search(ResultPage.TOTAL_RESULTS_PATTERN, container.get_text(" "))
+        if match is None:
+            return None
+        total_results = int((match.group(1) or match.group(2)).replace(",", ""))
+        total_pages = -(-total_results // page_size)
+        return max(0, total_pages - pages_visited)
+
+    def close_browser(self):
+        self.session.close()
+        logger.info("Successfully closed the HTTP session.")
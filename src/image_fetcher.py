@@ -0,0 +1,214 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from urllib.parse import urlparse
+import threading
+import time
+import os
+from utils import timed, metrics
+from image_store import ImageStore
+import logging
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class ImageFetcher:
+    """Download images in the background while scraping goes on.
+
+    Downloads run on a bounded thread pool and share a single keep-alive
+    `requests.Session`, so connections to the image host are pooled. The
+    number of simultaneous downloads per host is limited separately from the
+    pool size. When a download finishes the file name is written into the
+    `image` column of the row it belongs to. Images already downloaded, by
+    this run or by the interrupted run it resumes, are not downloaded again.
+
+    Images are saved in a content-addressed `ImageStore`. An image cached by
+    a previous run is revalidated with a conditional request, and only
+    downloaded again when it changed, or without a request at all while it
+    was checked less than `max_age` seconds ago.
+
+    Attributes:
+        data_dir (str): Directory where the images are saved.
+        max_workers (int): Size of the download thread pool.
+        host_limit (int): Maximum simultaneous downloads per host.
+        timeout (float): Timeout in seconds for each request.
+        session (Session): Shared keep-alive HTTP session.
+        store (ImageStore): Content-addressed cache the images are saved in.
+        max_age (float): Seconds during which a cached image is used without revalidating it.
+        offline (bool): Only use the cached images, leaving the others out without a request.
+        downloaded (dict): File names of the downloaded images by their URL.
+
+    Methods:
+        submit(url, row): Schedule a download and fill `row["image"]` when done.
+        wait_for(row, timeout): Block until the download of a row finishes.
+        download(url): Download an image and return the saved file name.
+        wait(timeout): Block until the pending downloads finish.
+        pending(): Count the downloads not finished yet.
+        drain(timeout): Give the pending downloads a deadline and skip the late ones.
+        close(): Wait for the pending downloads and release the resources.
+    """
+
+    def __init__(
+        self,
+        data_dir,
+        max_workers=8,
+        host_limit=4,
+        timeout=10,
+        downloaded=None,
+        store=None,
+        max_age=0,
+        offline=False,
+    ):
+        self.data_dir = data_dir
+        self.store = store or ImageStore(data_dir)
+        self.max_age = max_age
+        self.offline = offline
+        self.downloaded = dict(downloaded or {})
+        self.max_workers = max_workers
+        self.host_limit = host_limit
+        self.timeout = timeout
+        self.session = Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_workers, pool_maxsize=max_workers
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="image-fetcher"
+        )
+        self._host_semaphores = {}
+        self._lock = threading.Lock()
+        # Pending downloads by the id of the row they fill in
+        self._futures = {}
+        # Set once drained, so nothing waits on the skipped downloads
+        self._drained = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(
+                    self.host_limit
+                )
+            return self._host_semaphores[host]
+
+    def _get(self, url, headers=None):
+        with self._host_semaphore(url):
+            return self.session.get(url, timeout=self.timeout, headers=headers or {})
+
+    @timed("images.download")
+    def download(self, url):
+        with self._lock:
+            file_name = self.downloaded.get(url)
+        if file_name and os.path.exists(os.path.join(self.data_dir, file_name)):
+            return file_name
+        entry = self.store.lookup(url)
+        file_name = None
+        if entry is not None and (
+            self.offline or time.time() - entry["checked_at"] < self.max_age
+        ):
+            # None when another session evicted the image since the lookup
+            file_name = self.store.touch(url)
+            if file_name is not None:
+                metrics.increment("images_cached")
+        if file_name is None and self.offline:
+            logger.info(f"Image {url} is not cached, leaving it out")
+            return ""
+        if file_name is None:
+            response = self._get(url, self.store.conditional_headers(entry))
+            if response.status_code == 304 and entry is not None:
+                file_name = self.store.touch(url)
+                if file_name is None:
+                    # Evicted since the lookup, so download it in full
+                    response = self._get(url)
+                else:
+                    metrics.increment("images_not_modified")
+            if file_name is None:
+                response.raise_for_status()
+                metrics.increment("images_downloaded")
+                file_name = self.store.put(
+                    url,
+                    response.content,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    content_type=response.headers.get("Content-Type"),
+                )
+        with self._lock:
+            self.downloaded[url] = file_name
+        return file_name
+
+    def _fetch_into(self, url, row):
+        try:
+            row["image"] = self.download(url)
+        except Exception as e:
+            logger.error(f"Failed to download image {url}: {e}")
+
+    def submit(self, url, row):
+        row["image"] = ""
+        future = self._executor.submit(self._fetch_into, url, row)
+        with self._lock:
+            self._futures[id(row)] = future
+        future.add_done_callback(partial(self._discard, id(row)))
+        return future
+
+    def _discard(self, row_id, future):
+        with self._lock:
+            if self._futures.get(row_id) is future:
+                del self._futures[row_id]
+
+    def wait_for(self, row, timeout=None):
+        with self._lock:
+            future = self._futures.get(id(row))
+        if future is not None:
+            wait([future], timeout=0 if self._drained else timeout)
+
+    def wait(self, timeout=None):
+        with self._lock:
+            pending = set(self._futures.values())
+        done, not_done = wait(pending, timeout=timeout)
+        if not_done:
+            logger.warning(f"{len(not_done)} image downloads did not finish in time")
+        return not_done
+
+    def pending(self):
+        with self._lock:
+            return len(self._futures)
+
+    def drain(self, timeout):
+        """Wait for the pending downloads until a deadline, then skip the others.
+
+        The requests sent from now on time out within the deadline. The
+        downloads not started by then are cancelled and the ones still
+        running are no longer waited for, so their rows are saved without
+        an image.
+
+        Returns:
+            int: Number of downloads skipped.
+        """
+        self.timeout = max(1, min(self.timeout, timeout))
+        not_done = self.wait(timeout)
+        if not not_done:
+            return 0
+        self._drained = True
+        for future in not_done:
+            future.cancel()
+        metrics.increment("images_skipped", len(not_done))
+        logger.warning(f"Skipped {len(not_done)} image downloads to finish in time")
+        return len(not_done)
+
+    def close(self):
+        if self._drained:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        else:
+            self.wait()
+            self._executor.shutdown(wait=True)
+        self.session.close()
+        self.store.close()
@@ -0,0 +1,259 @@
+from uuid import uuid4
+import hashlib
+import mimetypes
+import sqlite3
+import threading
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Leading bytes of the image formats served by news sites
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"BM", ".bmp"),
+    (b"II*\x00", ".tif"),
+    (b"MM\x00*", ".tif"),
+]
+
+
+def sniff_extension(content, content_type=None):
+    """Get the file extension of an image from its content.
+
+    Falls back on the Content-Type header when the format is not recognised.
+
+    Returns:
+        str: The extension with its leading dot, ".bin" when unknown.
+    """
+    for signature, extension in IMAGE_SIGNATURES:
+        if content.startswith(signature):
+            return extension
+    if content[:4] == b"RIFF" and content[8:12] == b"WEBP":
+        return ".webp"
+    if content[4:8] == b"ftyp" and content[8:12] in (b"avif", b"avis"):
+        return ".avif"
+    head = content[:256].lstrip().lower()
+    if head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in head):
+        return ".svg"
+    if isinstance(content_type, str):
+        extension = mimetypes.guess_extension(content_type.split(";")[0].strip())
+        if extension:
+            return ".jpg" if extension in (".jpe", ".jpeg") else extension
+    return ".bin"
+
+
+class ImageStore:
+    """Content-addressed cache of the downloaded images, shared across runs.
+
+    Each image is saved once in `dir_path`, named after the SHA-256 of its
+    content and with the extension of its real format, so the same picture
+    found at several URLs, or in several runs, is stored once. A SQLite index
+    maps each URL to its image, with the ETag and Last-Modified validators of
+    the response, so a known URL can be revalidated with a conditional
+    request. When the images take more than `max_bytes`, the least recently
+    used ones are deleted, except the ones used since the start of the
+    oldest session still open, so batch workers sharing the store never
+    delete the images of each other's runs. The total size of the images is
+    kept up to date by triggers, so it is never summed again.
+
+    Attributes:
+        dir_path (str): Directory where the images are saved.
+        db_path (str): Path of the SQLite index.
+        max_bytes (int): Size of the images above which the oldest are evicted.
+        started (float): Time the session started, the images used since are kept.
+
+    Methods:
+        lookup(url): Get the cached image of a URL, if its file still exists.
+        conditional_headers(entry): Get the headers revalidating a cached image.
+        touch(url): Mark the cached image of a URL as used and revalidated, if still cached.
+        put(url, content, etag, last_modified, content_type): Store a downloaded image.
+        evict(): Delete the least recently used images over the size limit.
+        close(): Close the index.
+    """
+
+    # Sessions left open longer than this are taken as crashed
+    SESSION_MAX_AGE = 24 * 3600
+
+    def __init__(self, dir_path, max_bytes=512 * 1024 * 1024, db_path=None):
+        self.dir_path = dir_path
+        self.db_path = db_path or os.path.join(dir_path, "images.db")
+        self.max_bytes = max_bytes
+        os.makedirs(dir_path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._session_id = uuid4().hex
+        self.started = time.time()
+        # Batch workers may share the store, so wait for their commits
+        self.connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        # The index can be rebuilt from scratch, so commits need not wait for the disk
+        self.connection.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = OFF;
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS images (
+                digest TEXT PRIMARY KEY,
+                file_name TEXT,
+                size INTEGER,
+                last_used REAL
+            );
+            CREATE INDEX IF NOT EXISTS images_last_used ON images (last_used);
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                digest TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                checked_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                started REAL
+            );
+            CREATE TABLE IF NOT EXISTS totals (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                size INTEGER
+            );
+            INSERT OR IGNORE INTO totals
+                SELECT 0, COALESCE(SUM(size), 0) FROM images;
+            CREATE TRIGGER IF NOT EXISTS images_added AFTER INSERT ON images BEGIN
+                UPDATE totals SET size = size + new.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS images_removed AFTER DELETE ON images BEGIN
+                UPDATE totals SET size = size - old.size WHERE id = 0;
+            END;
+            COMMIT;
+            """
+        )
+        # Open sessions, the images they use are never evicted
+        self.connection.execute(
+            "DELETE FROM sessions WHERE started < ?", (self.started - self.SESSION_MAX_AGE,)
+        )
+        self.connection.execute(
+            "INSERT INTO sessions VALUES (?, ?)", (self._session_id, self.started)
+        )
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def lookup(self, url):
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT images.file_name, urls.etag, urls.last_modified, urls.checked_at "
+                "FROM urls JOIN images ON images.digest = urls.digest WHERE urls.url = ?",
+                (url,),
+            ).fetchone()
+        if row is None or not os.path.exists(os.path.join(self.dir_path, row[0])):
+            return None
+        return dict(zip(("file_name", "etag", "last_modified", "checked_at"), row))
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def touch(self, url):
+        """Mark the cached image of a URL as used and revalidated.
+
+        Returns:
+            str: The file name of the image, or None when another session
+                evicted it since it was looked up.
+        """
+        now = time.time()
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT images.digest, images.file_name "
+                "FROM urls JOIN images ON images.digest = urls.digest WHERE urls.url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute("UPDATE urls SET checked_at = ? WHERE url = ?", (now, url))
+            self.connection.execute(
+                "UPDATE images SET last_used = ? WHERE digest = ?", (now, row[0])
+            )
+            self.connection.commit()
+        return row[1]
+
+    def put(self, url, content, etag=None, last_modified=None, content_type=None):
+        digest = hashlib.sha256(content).hexdigest()
+        file_name = f"image_{digest}{sniff_extension(content, content_type)}"
+        file_path = os.path.join(self.dir_path, file_name)
+        if not os.path.exists(file_path):
+            # Write to a temporary file so a crash never leaves a partial image
+            tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, file_path)
+        else:
+            logger.debug(f"Image of {url} already stored as {file_name}")
+        now = time.time()
+        with self._lock:
+            # Replacing a row would skip the trigger of its deletion
+            self.connection.execute(
+                "INSERT INTO images VALUES (?, ?, ?, ?) ON CONFLICT (digest) "
+                "DO UPDATE SET file_name = excluded.file_name, last_used = excluded.last_used",
+                (digest, file_name, len(content), now),
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?, ?)",
+                (url, digest, etag, last_modified, now),
+            )
+            self.connection.commit()
+        self.evict()
+        return file_name
+
+    def evict(self):
+        with self._lock:
+            oldest_session = self.connection.execute(
+                "SELECT MIN(started) FROM sessions WHERE started > ?",
+                (time.time() - self.SESSION_MAX_AGE,),
+            ).fetchone()[0]
+            cutoff = min(self.started, oldest_session or self.started)
+            total = self.connection.execute(
+                "SELECT size FROM totals WHERE id = 0"
+            ).fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            # Through the last_used index, so the images of the open sessions
+            # over the limit on their own do not cost a scan on every put
+            rows = self.connection.execute(
+                "SELECT digest, file_name, size FROM images WHERE last_used < ? "
+                "ORDER BY last_used",
+                (cutoff,),
+            ).fetchall()
+            if not rows:
+                return 0
+            evicted = 0
+            for digest, file_name, size in rows:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.dir_path, file_name))
+                except FileNotFoundError:
+                    pass
+                self.connection.execute("DELETE FROM images WHERE digest = ?", (digest,))
+                self.connection.execute("DELETE FROM urls WHERE digest = ?", (digest,))
+                total -= size
+                evicted += 1
+            self.connection.commit()
+        logger.info(f"Evicted {evicted} images from the image store")
+        return evicted
+
+    def close(self):
+        with self._lock:
+            self.connection.execute("DELETE FROM sessions WHERE id = ?", (self._session_id,))
+            self.connection.commit()
+            self.connection.close()
@@ -9,8 +9,8 @@ The script performs the following tasks:
 4. Retrieve search results
 5. Filter results by category and months
 6. Extract relevant data from each result
-7. Store extracted data in an Excel file
-8. Upload the Excel file to Robocloud Artifacts
+7. Store extracted data in an Excel file, or the other output formats selected
+8. Upload the output files to Robocloud Artifacts
 9. Write work items for output
 10. Close the web browser
 
@@ -21,10 +21,19 @@ TODO:
 - Investigate if using assets is more efficient for uploading Excel and PNG files
 """
 
-from scraper import Scraper
 from data_extractor import DataExtractor
-from RPA.Robocorp.WorkItems import WorkItems
+from image_fetcher import ImageFetcher
+from image_store import ImageStore
+from seen_index import SeenIndex
+from checkpoint import Checkpoint
+from output_sink import OutputSink
+from deadline import Deadline
+from result_cache import ResultCache
+from cached_scraper import CachedScraper
+from utils import retry_state, metrics, screenshots, start_queue_logging
 import json
+import os
+import time
 import logging.config
 
 
@@ -32,30 +41,167 @@ def setup_logging():
     with open("./logs/config.json", "r") as f:
         config = json.load(f)
     logging.config.dictConfig(config)
+    start_queue_logging()
 
 
-setup_logging()
 logger = logging.getLogger()
 
 
-def main():
-    """Execute the main workflow for web scraping from Reuters."""
-    try:
-        # Initialize and fetch work items
-        library = WorkItems()
-        library.get_input_work_item()
-        inputs = library.get_work_item_variables()
-        library.create_output_work_item()
+DATA_DIR = os.path.join(os.environ.get("ROBOT_ROOT", "."), "data")
+
+
+def resolve_settings(settings):
+    """Turn on the settings that others depend on.
+
+    `stop_when_out_of_range` stops at the first page of results older than
+    the date range, which only means the following ones are older too when
+    they are sorted newest-first, so it turns on `sort_by_date`.
+    """
+    if settings.get("stop_when_out_of_range") and not settings.get("sort_by_date"):
+        logger.info("Sorting the results by date, as stop_when_out_of_range requires it.")
+        settings = dict(settings, sort_by_date=True)
+    return settings
+
+
+def create_scraper(settings, browser=None):
+    """Create the scraper backend selected in the settings.
+
+    Each backend is imported on demand, so the backends without a browser
+    never pay for importing the browser libraries. With the `result_cache`
+    setting, the backend only loads the result pages missing from the cache.
+    """
+    settings = resolve_settings(settings)
+    backend = settings.get("backend", "selenium")
+    if backend == "replay":
+        from replay_scraper import ReplayScraper
+
+        return ReplayScraper(settings)
+    if settings.get("result_cache", False):
+        # The cache holds the items as plain dicts, before any filter
+        settings = dict(settings, extraction_mode="bulk")
+    if backend == "http":
+        from http_scraper import HttpScraper
+
+        scraper = HttpScraper(settings)
+    else:
+        from scraper import Scraper
+
+        scraper = Scraper(settings, browser=browser)
+    if not settings.get("result_cache", False):
+        return scraper
+    cache = ResultCache(
+        os.path.join(DATA_DIR, "result_cache.db"),
+        ttl=settings.get("result_cache_ttl", 3600),
+        max_pages=settings.get("result_cache_max_pages", 1000),
+    )
+    return CachedScraper(scraper, cache, ResultCache.make_scope(settings))
+
+
+def create_deadline(settings, started=None):
+    """Create the deadline of a run with a `time_budget`, counted from `started`."""
+    if not settings.get("time_budget"):
+        return None
+    return Deadline(
+        settings["time_budget"],
+        reserve=settings.get("time_budget_reserve", 30),
+        started=started,
+    )
+
+
+def save_checkpoint(checkpoint, image_fetcher, page_number, rows, extractor_state):
+    """Checkpoint a completed page once the file names of its images are known."""
+    for row in rows:
+        image_fetcher.wait_for(row)
+    checkpoint.save_page(page_number, rows, image_fetcher.downloaded, extractor_state)
+
+
+def scrape(inputs, scraper, data_dir=DATA_DIR, deadline=None):
+    """Run the scraping steps for one work item and store its data.
+
+    Args:
+        inputs (dict): Work item variables.
+        scraper (Scraper): Scraper backend used to reach the website.
+        data_dir (str): Directory where the output files are saved. The images
+            are saved in the image store of `DATA_DIR`, shared by every work item.
+        deadline (Deadline): Optional; Time budget of the run, created when the
+            run started. Without it, the `time_budget` is counted from now.
 
-        scraper = Scraper(inputs["settings"])
+    Returns:
+        DataExtractor: The extractor used, pointing at the stored output files.
+    """
+    settings = resolve_settings(inputs["settings"])
+    metrics.reset()
+    if deadline is None:
+        deadline = create_deadline(settings)
+    retry_state.configure(
+        max_retries=settings.get("max_retries"),
+        max_retry_seconds=settings.get("max_retry_seconds"),
+    )
+    screenshots.configure(
+        min_interval=settings.get("screenshot_interval", 10),
+        max_bytes=settings.get("screenshot_max_mb", 20) * 1024 * 1024,
+    )
+    checkpoint = None
+    if settings.get("checkpoint", False):
+        checkpoint = Checkpoint(
+            os.path.join(data_dir, "checkpoint.jsonl"), Checkpoint.make_key(inputs)
+        )
+        checkpoint.load()
+    # The images are shared by every work item, like the seen index
+    image_fetcher = ImageFetcher(
+        DATA_DIR,
+        max_workers=settings.get("image_workers", 8),
+        host_limit=settings.get("image_host_limit", 4),
+        timeout=settings.get("image_timeout", 10),
+        downloaded=checkpoint.images if checkpoint is not None else None,
+        store=ImageStore(
+            DATA_DIR, max_bytes=settings.get("image_cache_max_mb", 512) * 1024 * 1024
+        ),
+        max_age=settings.get("image_cache_max_age", 0),
+        # A replay only uses the images cached when the pages were recorded
+        offline=settings.get("backend") == "replay",
+    )
+    recorder = None
+    seen_index = None
+    stopped_by_deadline = False
+    unsaved_page = None
+    try:
+        if settings.get("seen_index", False):
+            seen_index = SeenIndex(os.path.join(DATA_DIR, "seen_index.db"))
+            if settings.get("seen_index_ttl_days"):
+                seen_index.evict_older_than(settings["seen_index_ttl_days"])
+                seen_index.compact()
         extractor = DataExtractor(
-            inputs["search_term"], inputs["category"], inputs["month_number"]
+            inputs["search_term"],
+            inputs["category"],
+            inputs["month_number"],
+            image_fetcher=image_fetcher,
+            seen_index=seen_index,
+            data_dir=data_dir,
+            synonyms=settings.get("synonyms"),
+            filter_category=settings.get("filter_by_category", True),
+            sorted_by_date=settings.get("sort_by_date", False),
         )
         logger.info("Completed Step 1: Retrieved configurations and inputs.")
 
         # Open website
+        if settings.get("record_archive"):
+            # The archive imports the HTML parser, only needed when recording
+            from page_archive import PageRecorder
+
+            recorder = PageRecorder(
+                settings["record_archive"],
+                {
+                    "base_url": settings.get("base_url"),
+                    "term": inputs["search_term"],
+                    "category": inputs["category"],
+                    "month_number": inputs["month_number"],
+                },
+            )
+            recorder.open()
+            scraper.recorder = recorder
         scraper.open_website()
-        logger.info(f"Completed Step 2: Opened {inputs['settings']['base_url']}.")
+        logger.info(f"Completed Step 2: Opened {settings.get('base_url')}.")
 
         # Perform search by term and category
         scraper.search_for_term_by_category(inputs["search_term"], inputs["category"])
@@ -63,34 +209,158 @@ def main():
             f"Completed Steps 3 and 4: Searched for term '{inputs['search_term']}' under category '{inputs['category']}'."
         )
 
-        # Initialize data container and loop through search results
-        data = []
-        scraped_iterations = 1
-        while True:
-            search_results = scraper.get_page_results()
-            scraped_results = scraper.scrape_page(search_results)
-            logger.info(
-                f"Completed Step 5.{scraped_iterations}: Retrieved {len(search_results)} search results."
-            )
+        # Stream the rows of each page to the output as they are extracted
+        batch_size = settings.get("excel_batch_size", 100)
+        sink = OutputSink(
+            extractor.open_output_writer(settings.get("output_formats", ["excel"]), batch_size),
+            image_fetcher,
+            queue_size=settings.get("output_queue_size", 100),
+        )
+        with sink:
+            scraped_iterations = 1
+            # Scraped elements are filtered by category and date before their
+            # other fields and images are looked up
+            pages = scraper.iter_pages(item_filter=extractor.filter_page)
+            if checkpoint is not None and checkpoint.pages_completed:
+                # Resume after the last page completed by the interrupted run
+                for row in checkpoint.rows:
+                    sink.put(row)
+                extractor.restore_state(checkpoint.extractor_state)
+                scraped_iterations = checkpoint.pages_completed + 1
+                if not scraper.go_to_page(checkpoint.pages_completed):
+                    pages = iter(())
+                logger.info(
+                    f"Resumed from page {scraped_iterations} with {len(checkpoint.rows)} rows."
+                )
 
-            data_extracted = extractor.extract_from_page(scraped_results)
-            if len(data_extracted) > 0:
-                data.extend(data_extracted)
+            from_elements = scraper.extraction_mode != "bulk"
+            page_started = time.monotonic()
+            # Scraped elements are yielded once filtered, so the items are
+            # counted by the scraper before the filter
+            items_seen = scraper.items_seen
+            try:
+                for search_results in pages:
+                    page_items = scraper.items_seen - items_seen
+                    items_seen = scraper.items_seen
+                    logger.info(
+                        f"Completed Step 5.{scraped_iterations}: Retrieved {page_items} search results."
+                    )
+                    page_rows = []
+                    for row in extractor.iter_rows(
+                        search_results, from_elements, prefiltered=from_elements
+                    ):
+                        sink.put(row)
+                        page_rows.append(row)
+                    metrics.increment("pages")
+                    metrics.increment("items_seen", page_items)
+                    metrics.increment("items_extracted", len(page_rows))
 
-            if not scraper.go_to_next_page():
-                break
+                    if checkpoint is not None:
+                        # A page is checkpointed once the next one is extracted, so
+                        # its images download meanwhile instead of holding up the crawl
+                        if unsaved_page is not None:
+                            save_checkpoint(checkpoint, image_fetcher, *unsaved_page)
+                        unsaved_page = (scraped_iterations, page_rows, extractor.get_state())
 
-            logger.info(f"Processed page {scraped_iterations}.")
-            scraped_iterations += 1
+                    # Results sorted newest-first: stop once we are past the date range
+                    page_size = settings.get("page_size", 20)
+                    limit = settings.get("out_of_range_limit") or page_size
+                    if settings.get("stop_when_out_of_range") and extractor.has_left_date_range(limit):
+                        skipped = scraper.count_skipped_pages(scraped_iterations, page_size)
+                        logger.info(
+                            f"Stopped pagination at page {scraped_iterations}: results are older than "
+                            f"the date range. Pages skipped: {'unknown' if skipped is None else skipped}."
+                        )
+                        break
 
-        # Store data to Excel
-        for item in data:
-            extractor.store_data_to_excel(item)
+                    if extractor.reached_high_water_mark:
+                        logger.info(
+                            f"Stopped pagination at page {scraped_iterations}: reached the "
+                            f"articles collected by the previous run."
+                        )
+                        break
+
+                    if deadline is not None:
+                        now = time.monotonic()
+                        deadline.record_page(now - page_started)
+                        page_started = now
+                        if not deadline.allows_page(image_fetcher.pending(), image_fetcher.max_workers):
+                            stopped_by_deadline = True
+                            metrics.increment("deadline_stops")
+                            logger.warning(
+                                f"Stopped pagination at page {scraped_iterations} to finish "
+                                f"within the time budget of {deadline.budget:g}s."
+                            )
+                            break
+
+                    logger.info(f"Processed page {scraped_iterations}.")
+                    scraped_iterations += 1
+
+                if deadline is not None:
+                    # The rows still waiting for their image are saved without it
+                    image_fetcher.drain(deadline.drain_timeout())
+            finally:
+                # The last completed page is recorded even when the crawl fails
+                if unsaved_page is not None:
+                    save_checkpoint(checkpoint, image_fetcher, *unsaved_page)
+
+        # Only the images of this run are uploaded, not the whole image store
+        extractor.image_file_paths = [
+            os.path.join(image_fetcher.data_dir, file_name)
+            for file_name in sorted(set(image_fetcher.downloaded.values()))
+        ]
+        if seen_index is not None:
+            extractor.save_seen_index()
+        if checkpoint is not None:
+            if stopped_by_deadline:
+                # A run stopped by the deadline is resumed from its checkpoint,
+                # without storing again the rows of this run
+                checkpoint.keep_position()
+            else:
+                checkpoint.clear()
+        if recorder is not None:
+            # The archive is attached to the output with the data files
+            recorder.close()
+            extractor.output_file_paths.append(recorder.file_path)
         logger.info("Completed Steps 6 and 7: Extracted and stored data.")
+        return extractor
+
+    finally:
+        if recorder is not None:
+            recorder.close()
+        image_fetcher.close()
+        screenshots.wait()
+        if seen_index is not None:
+            seen_index.close()
+        logger.info(f"Retry statistics: {retry_state.summary()}")
+        metrics.write(data_dir)
+        logger.info(f"Step timings: {metrics.summary()['timings']}")
+
+
+def main():
+    """Execute the main workflow for web scraping from Reuters."""
+    # The time budget counts the startup and the browser launch too
+    started = time.monotonic()
+    from RPA.Robocorp.WorkItems import WorkItems
+
+    setup_logging()
+    library = WorkItems()
+    scraper = None
+    try:
+        # Initialize and fetch work items
+        library.get_input_work_item()
+        inputs = library.get_work_item_variables()
+        library.create_output_work_item()
+        deadline = create_deadline(inputs["settings"], started)
+        scraper = create_scraper(inputs["settings"])
+
+        extractor = scrape(inputs, scraper, deadline=deadline)
 
         # Upload files
-        library.add_work_item_file(extractor.excel_file_path)
-        library.add_work_item_files("./data/*.png")
+        for file_path in extractor.output_file_paths:
+            library.add_work_item_file(file_path)
+        for file_path in extractor.image_file_paths:
+            library.add_work_item_file(file_path)
         logger.info("Completed Steps 8 and 9: Uploaded files.")
 
     except Exception as e:
@@ -98,8 +368,12 @@ def main():
 
     finally:
         # Cleanup
-        scraper.close_browser()
+        if scraper is not None:
+            scraper.close_browser()
         library.add_work_item_files("./logs/*.log")
+        for file_path in screenshots.file_paths:
+            library.add_work_item_file(file_path)
+        library.add_work_item_files(os.path.join(DATA_DIR, "metrics.*"))
         library.save_work_item()
         logger.info("Completed Step 10: Closed the web browser and saved logs.")
 
@@ -0,0 +1,109 @@
+import queue
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class OutputSink:
+    """Write extracted rows to the output while scraping goes on.
+
+    Rows are handed over through a bounded queue to a writer thread, which
+    waits for the image download of each row before writing it, so scraping,
+    image downloads and writing overlap. When the writer falls behind, `put`
+    blocks until there is room in the queue, so only a bounded number of
+    rows is held in memory however many pages are crawled.
+
+    The output is only saved when the sink is closed. Leaving the sink
+    because of an exception discards it, like a run that fails before its
+    output is stored.
+
+    Attributes:
+        writer (ExcelWriter): Writer session the rows are written to.
+        image_fetcher (ImageFetcher): Optional; Fetcher downloading the images of the rows.
+        queue_size (int): Maximum number of rows waiting to be written.
+        rows_written (int): Number of rows written so far.
+
+    Methods:
+        open(): Open the writer and start the writer thread.
+        put(row): Queue a row, blocking while the queue is full.
+        close(): Write the remaining rows and save the output.
+        abort(): Stop the writer thread and discard the output.
+    """
+
+    _DONE = object()
+
+    def __init__(self, writer, image_fetcher=None, queue_size=100):
+        self.writer = writer
+        self.image_fetcher = image_fetcher
+        self.queue_size = max(1, int(queue_size))
+        self.rows_written = 0
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._thread = None
+        self._error = None
+        self._aborted = False
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def open(self):
+        self.writer.open()
+        self._thread = threading.Thread(
+            target=self._run, name="output-sink", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            row = self._queue.get()
+            if row is self._DONE or self._aborted:
+                return
+            try:
+                if self.image_fetcher is not None:
+                    self.image_fetcher.wait_for(row)
+                self.writer.write_row(row)
+                self.rows_written += 1
+            except Exception as e:
+                logger.error(f"An error occurred while writing a row: {e}")
+                self._error = e
+                return
+
+    def put(self, row):
+        while True:
+            if self._error is not None:
+                raise self._error
+            try:
+                self._queue.put(row, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _stop(self):
+        while self._thread.is_alive():
+            try:
+                self._queue.put(self._DONE, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        self._thread.join()
+
+    def close(self):
+        self._stop()
+        if self._error is not None:
+            self.writer.discard()
+            raise self._error
+        self.writer.close()
+        logger.info(f"Wrote {self.rows_written} rows to the output")
+
+    def abort(self):
+        self._aborted = True
+        self._stop()
+        self.writer.discard()
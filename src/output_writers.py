@@ -0,0 +1,357 @@
+from abc import ABC, abstractmethod
+from uuid import uuid4
+from excel_writer import ExcelWriter
+from date_window import parse_iso_datetime
+from utils import timed, metrics
+import csv
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Column types of the Parquet output, every other column is a string
+PARQUET_TYPES = {
+    "money_pattern": "bool",
+    "count_term": "int64",
+    "date": "timestamp",
+}
+
+
+class AppendWriter(ABC):
+    """Base of the writers appending rows to a line-oriented file.
+
+    The file is opened in append mode, so writing a row costs the same
+    however large the file is, and rows are flushed to disk in batches.
+    The size of the file when the session was opened is kept, so a
+    discarded session is truncated back to it. Subclasses write each row
+    in `_write`, and flushes are timed under "<format_name>.flush".
+
+    Attributes:
+        format_name (str): Name of the output format, used in the metrics.
+        file_path (str): Path of the output file.
+        headers (list): Column order shared by every output format.
+        batch_size (int): Number of rows written between two flushes.
+        rows_written (int): Number of data rows written during the session.
+
+    Methods:
+        open(): Open the file for appending.
+        write_row(data): Append a row, flushing when the batch is full.
+        flush(): Flush the written rows to disk.
+        close(): Flush the remaining rows and close the file.
+        discard(): Remove the rows of the session and close the file.
+    """
+
+    format_name = "append"
+
+    def __init__(self, file_path, headers, batch_size=100):
+        self.file_path = file_path
+        self.headers = list(headers)
+        self.batch_size = max(1, int(batch_size))
+        self.rows_written = 0
+        self._file = None
+        self._start_size = 0
+        self._pending = 0
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def open(self):
+        dir_path = os.path.dirname(self.file_path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        self._file = open(self.file_path, "a", encoding="utf-8", newline="")
+        self._start_size = self._file.tell()
+        logger.info(f"Appending rows to {self.file_path}")
+
+    def write_row(self, data):
+        if self._file is None:
+            raise RuntimeError(f"{self.__class__.__name__} is not open.")
+        self._write(data)
+        self.rows_written += 1
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    @abstractmethod
+    def _write(self, data):
+        """Write a single row to the open file."""
+
+    def flush(self):
+        with metrics.timer(f"{self.format_name}.flush"):
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+        logger.info(f"Saved {self.rows_written} rows to {self.file_path}")
+
+    def discard(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        os.truncate(self.file_path, self._start_size)
+        logger.info(f"Discarded the rows written to {self.file_path}")
+
+
+class JsonlWriter(AppendWriter):
+    """Append rows to a JSON Lines file, one JSON object per row."""
+
+    format_name = "jsonl"
+
+    def _write(self, data):
+        row = {header: data.get(header, "") for header in self.headers}
+        self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+class CsvWriter(AppendWriter):
+    """Append rows to a CSV file, writing the header row to a new file."""
+
+    format_name = "csv"
+
+    def open(self):
+        super().open()
+        self._writer = csv.writer(self._file)
+        if self._start_size == 0:
+            self._writer.writerow(self.headers)
+
+    def discard(self):
+        super().discard()
+        if self._start_size == 0 and os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+    def _write(self, data):
+        self._writer.writerow([data.get(header, "") for header in self.headers])
+
+
+class ParquetWriter:
+    """Write rows to a Parquet file with typed columns.
+
+    Parquet files cannot be appended to, so `file_path` is a directory,
+    read as a single dataset, and every session writes its own part file.
+    Rows are buffered and written as one row group per batch. Money patterns
+    are booleans, term counts integers and dates UTC timestamps, with empty
+    values stored as nulls. Requires the optional `pyarrow` package.
+
+    Attributes:
+        file_path (str): Path of the dataset directory.
+        part_path (str): Path of the part file written by this session.
+        headers (list): Column order shared by every output format.
+        batch_size (int): Number of buffered rows that makes a row group.
+        rows_written (int): Number of data rows written during the session.
+
+    Methods:
+        open(): Start a part file in the dataset directory.
+        write_row(data): Buffer a row, writing a row group when the batch is full.
+        flush(): Write the buffered rows as a row group.
+        close(): Write the remaining rows and publish the part file.
+        discard(): Remove the part file of the session.
+    """
+
+    def __init__(self, file_path, headers, batch_size=1000):
+        self.file_path = file_path
+        self.headers = list(headers)
+        self.batch_size = max(1, int(batch_size))
+        self.rows_written = 0
+        self.part_path = os.path.join(file_path, f"part-{uuid4()}.parquet")
+        self._buffer = []
+        self._writer = None
+        self._schema = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def open(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "The parquet output format requires the pyarrow package."
+            ) from e
+        types = {
+            "bool": pa.bool_(),
+            "int64": pa.int64(),
+            "timestamp": pa.timestamp("ms", tz="UTC"),
+        }
+        self._schema = pa.schema(
+            [(header, types.get(PARQUET_TYPES.get(header), pa.string())) for header in self.headers]
+        )
+        os.makedirs(self.file_path, exist_ok=True)
+        # Readers skip files starting with a dot until the part is complete
+        self._writer = pq.ParquetWriter(self._tmp_path, self._schema)
+        logger.info(f"Writing rows to {self.part_path}")
+
+    @property
+    def _tmp_path(self):
+        return os.path.join(self.file_path, f".{os.path.basename(self.part_path)}.tmp")
+
+    def _convert(self, header, value):
+        column_type = PARQUET_TYPES.get(header)
+        if value == "" or value is None:
+            return None
+        if column_type == "bool":
+            return bool(value)
+        if column_type == "int64":
+            return int(value)
+        if column_type == "timestamp":
+            # Every datetime format accepted by the date filter, None if not valid
+            return parse_iso_datetime(value)
+        return str(value)
+
+    def write_row(self, data):
+        if self._writer is None:
+            raise RuntimeError("ParquetWriter is not open.")
+        self._buffer.append(data)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    @timed("parquet.flush")
+    def flush(self):
+        if not self._buffer:
+            return
+        import pyarrow as pa
+
+        columns = {
+            header: [self._convert(header, row.get(header, "")) for row in self._buffer]
+            for header in self.headers
+        }
+        self._writer.write_table(pa.Table.from_pydict(columns, schema=self._schema))
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self):
+        if self._writer is None:
+            return
+        try:
+            self.flush()
+            self._writer.close()
+            os.replace(self._tmp_path, self.part_path)
+            logger.info(f"Saved {self.rows_written} rows to {self.part_path}")
+        except Exception:
+            # Never leave a partial part file in the dataset directory
+            try:
+                self._writer.close()
+            except Exception:
+                pass
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+            raise
+        finally:
+            self._writer = None
+            self._buffer = []
+
+    def discard(self):
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._writer = None
+        self._buffer = []
+        os.remove(self._tmp_path)
+        logger.info(f"Discarded the rows written to {self.part_path}")
+
+
+class MultiWriter:
+    """Write every row to several output writers at once.
+
+    Attributes:
+        writers (list): The output writers.
+
+    Methods:
+        open(): Open every writer.
+        write_row(data): Write a row to every writer.
+        close(): Close every writer, raising the first error after trying them all.
+        discard(): Discard the session of every writer.
+    """
+
+    def __init__(self, writers):
+        self.writers = list(writers)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    @property
+    def rows_written(self):
+        return self.writers[0].rows_written if self.writers else 0
+
+    def open(self):
+        opened = []
+        try:
+            for writer in self.writers:
+                writer.open()
+                opened.append(writer)
+        except Exception:
+            for writer in opened:
+                writer.discard()
+            raise
+
+    def write_row(self, data):
+        for writer in self.writers:
+            writer.write_row(data)
+
+    def close(self):
+        error = None
+        for writer in self.writers:
+            try:
+                writer.close()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+    def discard(self):
+        for writer in self.writers:
+            writer.discard()
+
+
+OUTPUT_WRITERS = {
+    "excel": (ExcelWriter, ".xlsx"),
+    "jsonl": (JsonlWriter, ".jsonl"),
+    "csv": (CsvWriter, ".csv"),
+    "parquet": (ParquetWriter, ".parquet"),
+}
+
+
+def create_output_writer(base_path, headers, formats=("excel",), batch_size=100):
+    """Create the writer of one or more output formats.
+
+    Args:
+        base_path (str): Path of the output files without their extension.
+        headers (list): Column order shared by every format.
+        formats (list): Names of the output formats, see `OUTPUT_WRITERS`.
+        batch_size (int): Number of rows written between two flushes.
+
+    Returns:
+        The writer of the only format, or a `MultiWriter` of all of them.
+    """
+    unknown = [name for name in formats if name not in OUTPUT_WRITERS]
+    if unknown or not formats:
+        raise ValueError(
+            f"Unknown output formats {unknown}, expected some of {list(OUTPUT_WRITERS)}"
+        )
+    writers = []
+    for name in dict.fromkeys(formats):
+        writer_class, extension = OUTPUT_WRITERS[name]
+        writers.append(writer_class(f"{base_path}{extension}", headers, batch_size))
+    return writers[0] if len(writers) == 1 else MultiWriter(writers)
@@ -2,7 +2,9 @@ from abc import ABC
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from selenium.webdriver.common.by import By
+from utils import timed
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -11,23 +13,46 @@ class Page(ABC):
     def __init__(self, browser, config):
         self.browser = browser
         self.config = config
+        self.field_wait_seconds = 0.0
 
+    @timed("page.wait_for")
     def wait_for(self, condition, *args, **kwargs):
         return WebDriverWait(self.browser.driver, self.config["wait_time"]).until(
             condition(*args), **kwargs
         )
 
+    def field_wait_time(self):
+        """Return how long to wait for an optional field of an item.
+
+        With the "fail_fast" presence strategy the item list is already known
+        to be loaded, so a missing child element only gets the short
+        `field_grace_time` instead of the full `wait_time`.
+        """
+        if self.config.get("presence_strategy", "wait") == "fail_fast":
+            return self.config.get("field_grace_time", 0)
+        return self.config["wait_time"]
+
+    @timed("page.try_wait_for_element")
     def try_wait_for_element(self, condition, element, news):
+        timeout = self.field_wait_time()
+        start = time.perf_counter()
         try:
-            web_element = WebDriverWait(
-                self.browser.driver, self.config["wait_time"]
-            ).until(condition)
-            return web_element
+            web_element = condition(self.browser.driver)
+            if not web_element and timeout > 0:
+                web_element = WebDriverWait(self.browser.driver, timeout).until(
+                    condition
+                )
         except TimeoutException:
+            web_element = None
+        finally:
+            self.field_wait_seconds += time.perf_counter() - start
+
+        if not web_element:
             logger.warning(
                 f"The {element} of the news number {news}, was not able to be scraped"
             )
             return None
+        return web_element
 
     def find_child_element(self, parent_element, locator, selector=None):
         try:
@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from result_page import ResultPage
+import gzip
+import json
+import zlib
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT = 1
+
+
+def page_image_urls(html, page_url):
+    """Get the URLs of the item images referenced by a result page."""
+    soup = BeautifulSoup(html, "lxml")
+    urls = []
+    for div_element in soup.select(f"{ResultPage.IL} {ResultPage.DIV_IMAGE_ITEM}"):
+        image_element = div_element.find(ResultPage.IMAGE_ITEM)
+        if image_element is not None and image_element.get("src"):
+            urls.append(urljoin(page_url, image_element["src"]))
+    return urls
+
+
+class PageRecorder:
+    """Record the HTML of result pages to a compressed archive.
+
+    The archive is a gzip-compressed JSON Lines file. The first line holds
+    the search it was recorded from, and every following line a result page
+    with its URL, HTML and the URLs of its item images. The compressed stream
+    is flushed after each page, so the pages recorded before a crash can
+    still be read.
+
+    Attributes:
+        file_path (str): Path of the archive.
+        metadata (dict): Search the pages are recorded from, saved in the header.
+        pages_recorded (int): Number of pages recorded so far.
+
+    Methods:
+        open(): Create the archive and write its header.
+        record(page_url, html): Add a result page to the archive.
+        close(): Close the archive.
+    """
+
+    def __init__(self, file_path, metadata=None):
+        self.file_path = file_path
+        self.metadata = dict(metadata or {})
+        self.pages_recorded = 0
+        self._file = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def open(self):
+        dir_path = os.path.dirname(self.file_path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        self._file = gzip.open(self.file_path, "wt", encoding="utf-8")
+        header = dict(
+            self.metadata,
+            format=ARCHIVE_FORMAT,
+            recorded_at=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        )
+        self._write(header)
+        logger.info(f"Recording result pages to {self.file_path}")
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # A sync flush of the compressor, so every complete page can be read back
+        self._file.flush()
+
+    def record(self, page_url, html):
+        self._write(
+            {
+                "page": self.pages_recorded,
+                "url": page_url,
+                "html": html,
+                "images": page_image_urls(html, page_url),
+            }
+        )
+        self.pages_recorded += 1
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        logger.info(f"Recorded {self.pages_recorded} result pages to {self.file_path}")
+
+
+def read_archive(file_path):
+    """Read an archive written by `PageRecorder`.
+
+    The pages after a truncated or corrupted line, left by a run that
+    crashed while recording, are ignored.
+
+    Returns:
+        tuple: The header dict and the list of page dicts, in recorded order.
+    """
+    header = None
+    pages = []
+    try:
+        with gzip.open(file_path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if header is None:
+                    header = record
+                else:
+                    pages.append(record)
+    except (EOFError, zlib.error):
+        logger.warning(f"The archive {file_path} is truncated, reading the complete pages only")
+    if header is None:
+        raise ValueError(f"{file_path} is not a result page archive.")
+    if header.get("format") != ARCHIVE_FORMAT:
+        raise ValueError(f"Unsupported archive format {header.get('format')} in {file_path}")
+    return header, pages
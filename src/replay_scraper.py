@@ -0,0 +1,86 @@
+from bs4 import BeautifulSoup
+from http_scraper import HttpScraper
+from page_archive import read_archive
+from result_page import ResultPage
+from utils import timed
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayScraper(HttpScraper):
+    """Replay the result pages of an archive recorded by `PageRecorder`.
+
+    A drop-in replacement for `Scraper` and `HttpScraper` that reads the
+    result pages from the archive set in the `replay_archive` setting
+    instead of the website, and parses them like `HttpScraper`. No browser
+    is opened and no request is sent, so the items of a recorded crawl can
+    be extracted again with other filters in seconds.
+
+    Attributes:
+        archive_path (str): Path of the archive replayed.
+        header (dict): Search the archive was recorded from.
+        pages (list): Recorded result pages, with their URL and HTML.
+        page_index (int): Index of the current page in the archive.
+
+    Methods:
+        open_website(): Read the archive.
+        search_for_term_by_category(term, category): Load the first recorded page.
+        load_page(): Parse the recorded page at the current index.
+        go_to_next_page(): Load the next recorded page if there is one.
+        go_to_page(page_index): Load a recorded page to resume on it.
+        close_browser(): Release the recorded pages.
+    """
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.archive_path = config["replay_archive"]
+        self.header = {}
+        self.pages = []
+        self.page_index = 0
+
+    def open_website(self):
+        self.header, self.pages = read_archive(self.archive_path)
+        logger.info(
+            f"Replaying {len(self.pages)} result pages recorded on "
+            f"{self.header.get('recorded_at')} from {self.archive_path}"
+        )
+
+    def search_for_term_by_category(self, term, category):
+        recorded = (self.header.get("term"), self.header.get("category"))
+        if recorded != (term, category):
+            logger.warning(
+                f"The archive was recorded for term '{recorded[0]}' and category "
+                f"'{recorded[1]}', not '{term}' and '{category}'"
+            )
+        self.page_index = 0
+        self.load_page()
+        return None
+
+    @timed("replay.load_page")
+    def load_page(self):
+        if self.page_index < len(self.pages):
+            page = self.pages[self.page_index]
+            self._page_url = page["url"]
+            self._soup = BeautifulSoup(page["html"], "lxml")
+        else:
+            self._page_url = None
+            self._soup = BeautifulSoup("", "lxml")
+        logger.info(f"Loaded recorded results page {self.page_index + 1}")
+
+    def go_to_next_page(self):
+        if self.page_index + 1 >= len(self.pages):
+            logger.info("No more recorded pages")
+            return False
+        self.page_index += 1
+        self.load_page()
+        return True
+
+    def go_to_page(self, page_index):
+        self.page_index = page_index
+        self.load_page()
+        return self._soup.select_one(ResultPage.IL) is not None
+
+    def close_browser(self):
+        self.pages = []
+        super().close_browser()
@@ -0,0 +1,137 @@
+import json
+import sqlite3
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """On-disk cache of the result pages of a search, shared across work items.
+
+    Work items often search the same term and only differ in the category or
+    the months they collect, which are filtered after the search. The items
+    of each result page are cached as the plain dicts read from the website,
+    before any filter, keyed by the search term and the page index, so a
+    later work item can filter them its own way without loading the page.
+
+    Pages are kept `ttl` seconds, as new articles move the older ones to the
+    following pages. Past `max_pages` pages, the least recently used are
+    evicted. The `scope` of a page holds the other settings that change the
+    results of a search, like the website and the sort order.
+
+    Attributes:
+        db_path (str): Path of the SQLite database file.
+        ttl (float): Seconds a cached page is used for.
+        max_pages (int): Number of pages above which the least recently used are evicted.
+
+    Methods:
+        make_scope(config): Build the scope of the searches made with a configuration.
+        get(scope, term, page_index): Get the items of a cached page and whether it is the last.
+        put(scope, term, page_index, items, is_last): Cache the items of a page.
+        mark_last(scope, term, page_index): Record that a cached page is the last of its search.
+        evict(): Remove the expired pages and the least recently used over the limit.
+        close(): Close the database connection.
+    """
+
+    def __init__(self, db_path, ttl=3600, max_pages=1000, clock=time.time):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_pages = max_pages
+        self._clock = clock
+        dir_path = os.path.dirname(db_path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        # Batch workers may share the cache, so wait for their commits
+        self.connection = sqlite3.connect(db_path, timeout=30)
+        self.connection.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS pages (
+                scope TEXT,
+                term TEXT,
+                page_index INTEGER,
+                items TEXT,
+                is_last INTEGER,
+                fetched_at REAL,
+                last_used REAL,
+                PRIMARY KEY (scope, term, page_index)
+            );
+            CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used);
+            """
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    @staticmethod
+    def make_scope(config):
+        order = "newest" if config.get("sort_by_date", False) else "relevance"
+        return f"{config.get('base_url', '')}|{order}|{config.get('page_size', 20)}"
+
+    def get(self, scope, term, page_index):
+        key = (scope, term.strip().lower(), page_index)
+        row = self.connection.execute(
+            "SELECT items, is_last, fetched_at FROM pages "
+            "WHERE scope = ? AND term = ? AND page_index = ?",
+            key,
+        ).fetchone()
+        now = self._clock()
+        if row is None or now - row[2] >= self.ttl:
+            return None
+        self.connection.execute(
+            "UPDATE pages SET last_used = ? WHERE scope = ? AND term = ? AND page_index = ?",
+            (now, *key),
+        )
+        self.connection.commit()
+        return json.loads(row[0]), bool(row[1])
+
+    def put(self, scope, term, page_index, items, is_last=False):
+        now = self._clock()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                scope,
+                term.strip().lower(),
+                page_index,
+                json.dumps(items, ensure_ascii=False),
+                int(is_last),
+                now,
+                now,
+            ),
+        )
+        self.connection.commit()
+        self.evict()
+
+    def mark_last(self, scope, term, page_index):
+        self.connection.execute(
+            "UPDATE pages SET is_last = 1 WHERE scope = ? AND term = ? AND page_index = ?",
+            (scope, term.strip().lower(), page_index),
+        )
+        self.connection.commit()
+
+    def evict(self):
+        expired = self.connection.execute(
+            "DELETE FROM pages WHERE fetched_at <= ?", (self._clock() - self.ttl,)
+        ).rowcount
+        # Keep the most recently used pages, the others are evicted
+        evicted = self.connection.execute(
+            "DELETE FROM pages WHERE rowid NOT IN "
+            "(SELECT rowid FROM pages ORDER BY last_used DESC LIMIT ?)",
+            (self.max_pages,),
+        ).rowcount
+        self.connection.commit()
+        if expired or evicted:
+            logger.info(
+                f"Evicted {expired} expired and {evicted} least recently used pages "
+                f"from the result cache"
+            )
+        return expired + evicted
+
+    def close(self):
+        self.connection.close()
@@ -4,9 +4,10 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.common.exceptions import TimeoutException
-from utils import resilient_action
+from utils import resilient_action, set_url_params
 from page import Page
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +27,40 @@ class ResultPage(Page):
     SECTION_SELECTION = "button[data-testid='Select-Popup']"
     SECTION_LIST = "//select[@name='sectionfilter']"
     SECTION_POPUP = ""
+    SORT_PARAM = "sort"
+    SORT_NEWEST = "newest"
+    OFFSET_PARAM = "offset"
+    OPEN_TAB_SCRIPT = "window.open(arguments[0], arguments[1]);"
+    TOTAL_RESULTS_PATTERN = r"of\s+([\d,]+)\s+results|([\d,]+)\s+results"
+    EXTRACT_ITEMS_SCRIPT = """
+        const [item, title, category, time, divImage, image] = arguments;
+        return Array.from(document.querySelectorAll(item)).map((li) => {
+            const titleElement = li.querySelector(title);
+            const categoryElement = li.querySelector(category);
+            const timeElement = li.querySelector(time);
+            const divElement = li.querySelector(divImage);
+            const imageElement = divElement ? divElement.querySelector(image) : null;
+            return {
+                title: titleElement ? titleElement.innerText : "",
+                category: categoryElement ? categoryElement.innerText : "",
+                url: titleElement ? titleElement.href || "" : "",
+                datetime: timeElement ? timeElement.getAttribute("datetime") || "" : "",
+                src: imageElement ? imageElement.src || "" : "",
+            };
+        });
+    """
+
+    ITEM_FILTER_FIELDS_SCRIPT = """
+        const [items, category, time] = arguments;
+        return items.map((li) => {
+            const categoryElement = li.querySelector(category);
+            const timeElement = li.querySelector(time);
+            return {
+                category: categoryElement ? categoryElement.innerText : "",
+                datetime: timeElement ? timeElement.getAttribute("datetime") || "" : "",
+            };
+        });
+    """
 
     @resilient_action
     def verify_results(self):
@@ -66,6 +101,27 @@ class ResultPage(Page):
             return False
         return True
 
+    @resilient_action
+    def sort_by_newest(self):
+        current_url = self.browser.driver.current_url
+        sorted_url = set_url_params(current_url, **{self.SORT_PARAM: self.SORT_NEWEST})
+        if sorted_url != current_url:
+            self.browser.go_to(sorted_url)
+            logger.info(f"Successfully sorted results by date: {sorted_url}")
+        return None
+
+    def get_total_results(self):
+        try:
+            text = self.browser.driver.find_element(
+                By.CSS_SELECTOR, self.DIV_SEARCH
+            ).text
+        except NoSuchElementException:
+            return None
+        match = re.search(self.TOTAL_RESULTS_PATTERN, text)
+        if match is None:
+            return None
+        return int((match.group(1) or match.group(2)).replace(",", ""))
+
     @resilient_action
     def verify_item_list(self):
         self.wait_for(
@@ -91,6 +147,85 @@ class ResultPage(Page):
         logger.info("Successfully waited for visible list")
         return item_results
 
+    @resilient_action
+    def extract_items(self):
+        """Read every item of the current page in a single driver round trip.
+
+        Returns:
+            list: Plain dicts with the title, category, url, datetime and src keys.
+        """
+        items = self.browser.driver.execute_script(
+            self.EXTRACT_ITEMS_SCRIPT,
+            self.IL,
+            self.TITLE_ITEM,
+            self.CATEGORY_ITEM,
+            self.TIME_ITEM,
+            self.DIV_IMAGE_ITEM,
+            self.IMAGE_ITEM,
+        )
+        logger.info(f"Successfully extracted {len(items)} items in bulk")
+        return items
+
+    @resilient_action
+    def get_item_filter_fields(self, items):
+        """Read the fields the items are filtered on in a single driver round trip.
+
+        Returns:
+            list: A dict with the category and datetime of each item element,
+                empty when the item has none.
+        """
+        return self.browser.driver.execute_script(
+            self.ITEM_FILTER_FIELDS_SCRIPT, items, self.CATEGORY_ITEM, self.TIME_ITEM
+        )
+
+    def page_url(self, search_url, page_index, page_size):
+        return set_url_params(
+            search_url, **{self.OFFSET_PARAM: page_index * page_size}
+        )
+
+    def has_items(self):
+        try:
+            self.wait_for(
+                EC.presence_of_all_elements_located,
+                (By.CSS_SELECTOR, self.IL),
+            )
+            return True
+        except TimeoutException:
+            return False
+
+    @resilient_action
+    def extract_pages(self, urls, with_sources=False):
+        """Load several result pages at once in new tabs and read their items.
+
+        The tabs are opened without waiting, so the browser loads them
+        concurrently, then each one is read with `extract_items` and closed.
+
+        Returns:
+            list: The items of each page, in the same order as `urls`. A page
+                without results gives an empty list. With `with_sources`,
+                the items and HTML source of each page instead.
+        """
+        driver = self.browser.driver
+        main_window = driver.current_window_handle
+        names = [f"results_page_{number}" for number in range(len(urls))]
+        for url, name in zip(urls, names):
+            driver.execute_script(self.OPEN_TAB_SCRIPT, url, name)
+
+        pages = []
+        try:
+            for name in names:
+                driver.switch_to.window(name)
+                items = self.extract_items() if self.has_items() else []
+                pages.append((items, driver.page_source) if with_sources else items)
+        finally:
+            for handle in driver.window_handles:
+                if handle != main_window:
+                    driver.switch_to.window(handle)
+                    driver.close()
+            driver.switch_to.window(main_window)
+        logger.info(f"Successfully extracted {len(pages)} pages from tabs")
+        return pages
+
     def verify_item(self, item):
         self.wait_for(EC.visibility_of, item)
         return None
@@ -1,8 +1,8 @@
-from RPA.Browser.Selenium import Selenium
 from selenium.common.exceptions import TimeoutException
-from utils import resilient_action
+from utils import resilient_action, timed, metrics
 from main_page import MainPage
 from result_page import ResultPage
+from collections import deque
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,52 +18,246 @@ class Scraper:
 
     Attributes:
         config (dict): Configuration parameters for the scraper.
-        browser (Selenium): Browser object to interact with the webpage.
+        browser (Selenium): Browser object to interact with the webpage. A
+            browser that is already open can be passed in to be reused.
         main_page (MainPage): Object to interact with the main page.
         result_page (ResultPage): Object to interact with the results page.
+        extraction_mode (str): "elements" to scrape each item through WebElements,
+            or "bulk" to read the whole page with a single script call.
+        pagination_mode (str): "click" to follow the Next button, or "url" to
+            load several result pages at once by their offset URL.
+        search_url (str): URL of the first result page of the search.
+        recorder (PageRecorder): Optional; Records the HTML of every result page loaded.
+        items_seen (int): Number of items on the result pages yielded, before any filter.
 
     Methods:
         open_website(): Open the base website.
+        open_lean_browser(): Open the base website with the lean browser profile.
+        attach_browser(): Open the base website in a browser that is already running.
         search_for_term_by_category(term, category): Search for news by term and category.
         get_page_results(): Verify and get the list of news items from the results page.
-        scrape_news(result, number_news): Extracts the data from a specific news item.
-        scrape_page(page): Scrapes all news items on a given page.
+        get_page_items(): Verify the results page and read all its items as plain dicts.
+        fetch_pages(): Load the next result pages concurrently in browser tabs.
+        scrape_news(result, number_news, fields): Extracts the data from a specific news item.
+        scrape_page(page, mask, fields): Scrapes all news items on a given page.
         go_to_next_page(): Navigates to the next results page.
+        iter_pages(item_filter): Yield the results of every page, navigating on demand.
+        go_to_page(page_index): Load a result page to resume a crawl on it.
+        count_skipped_pages(pages_visited, page_size): Count the result pages not visited.
         close_browser(): Close all open browser windows.
     """
 
-    def __init__(self, config):
+    LEAN_BLOCKED_URLS = [
+        # Images, media and fonts
+        "*.jpg",
+        "*.jpeg",
+        "*.png",
+        "*.gif",
+        "*.webp",
+        "*.svg",
+        "*.mp4",
+        "*.webm",
+        "*.m3u8",
+        "*.woff",
+        "*.woff2",
+        "*.ttf",
+        "*.otf",
+        # Ads and tracking
+        "*doubleclick.net*",
+        "*googlesyndication.com*",
+        "*googletagmanager.com*",
+        "*google-analytics.com*",
+        "*amazon-adsystem.com*",
+        "*scorecardresearch.com*",
+        "*chartbeat.com*",
+        "*permutive.com*",
+        "*taboola.com*",
+        "*outbrain.com*",
+    ]
+
+    def __init__(self, config, browser=None):
         self.config = config
-        self.browser = Selenium()
+        if browser is None:
+            # Imported here, as it takes most of the start up time of the robot
+            from RPA.Browser.Selenium import Selenium
+
+            browser = Selenium()
+        self.browser = browser
         self.main_page = MainPage(self.browser, self.config)
         self.result_page = ResultPage(self.browser, self.config)
+        self.extraction_mode = self.config.get("extraction_mode", "elements")
+        self.pagination_mode = self.config.get("pagination_mode", "click")
+        if self.pagination_mode == "url":
+            # Tabs are closed once read, so only plain data can outlive them
+            self.extraction_mode = "bulk"
+        self.search_url = None
+        self.recorder = None
+        self.items_seen = 0
+        self._pages = deque()
+        self._next_page_index = 0
+        self._last_page_reached = False
 
     @resilient_action
     def open_website(self):
         try:
-            self.browser.open_available_browser(self.config["base_url"], headless=True)
+            if self.browser.get_browser_ids():
+                # Reuse the browser that is already open, e.g. in a batch worker
+                self.browser.go_to(self.config["base_url"])
+            elif self.config.get("attach_chrome_port") or self.config.get("remote_url"):
+                self.attach_browser()
+            elif self.config.get("browser_profile", "default") == "lean":
+                self.open_lean_browser()
+            else:
+                self.browser.open_available_browser(
+                    self.config["base_url"], headless=True
+                )
+            metrics.instrument_webdriver(self.browser.driver)
             logger.info("Successfully opened the website.")
         # Apearently I dont need to worry on this error always
         except TimeoutException as e:
             logger.warning(f"A potentially non-critical error occurred: {e}")
 
+    def open_lean_browser(self):
+        """Open Chrome with a profile that only loads what the scraper reads.
+
+        Images are disabled through the browser preferences, and images,
+        media, fonts and ad/tracking domains are blocked through CDP before
+        the website is loaded. Pages are considered loaded once the DOM is
+        ready, extensions are disabled and the viewport is fixed and small.
+        """
+        from selenium.webdriver import ChromeOptions
+
+        options = ChromeOptions()
+        options.page_load_strategy = "eager"
+        options.add_argument("--disable-extensions")
+        self.browser.open_available_browser(
+            headless=True,
+            browser_selection="Chrome",
+            options=options,
+            preferences={"profile.managed_default_content_settings.images": 2},
+        )
+        width, height = self.config.get("viewport", [1024, 768])
+        self.browser.set_window_size(width, height)
+
+        blocked_urls = self.LEAN_BLOCKED_URLS + self.config.get("blocked_urls", [])
+        self.browser.driver.execute_cdp_cmd("Network.enable", {})
+        self.browser.driver.execute_cdp_cmd(
+            "Network.setBlockedURLs", {"urls": blocked_urls}
+        )
+        self.browser.go_to(self.config["base_url"])
+
+    def attach_browser(self):
+        """Open the base website in a browser started before the robot.
+
+        A Chrome started with `--remote-debugging-port` is attached to
+        through the `attach_chrome_port` setting, and a Selenium server or
+        grid through the `remote_url` setting. Either way the browser is
+        already warm when the run starts, so its start up is not paid by
+        the run.
+        """
+        port = self.config.get("attach_chrome_port")
+        if port:
+            self.browser.attach_chrome_browser(int(port))
+            self.browser.go_to(self.config["base_url"])
+            logger.info(f"Attached to the Chrome browser on port {port}.")
+        else:
+            self.browser.open_browser(
+                self.config["base_url"],
+                browser="headlesschrome",
+                remote_url=self.config["remote_url"],
+            )
+            logger.info(f"Opened the website on the remote browser {self.config['remote_url']}.")
+
     def search_for_term_by_category(self, term, category):
         sb_element = self.main_page.verify_search_button()
         self.main_page.click_search_button(sb_element)
         is_element = self.main_page.input_search_field(term)
         self.main_page.click_to_search(term, is_element)
+        if self.config.get("sort_by_date", False):
+            self.result_page.sort_by_newest()
+        self.search_url = self.browser.driver.current_url
+        self._pages.clear()
+        self._next_page_index = 0
+        self._last_page_reached = False
         return None
 
+    @timed("scraper.get_page_results")
     @resilient_action
     def get_page_results(self):
         self.result_page.verify_item_list()
         self.result_page.verify_results()
-        return self.result_page.get_item_list()
+        results = self.result_page.get_item_list()
+        self._record_page()
+        return results
+
+    @timed("scraper.get_page_items")
+    @resilient_action
+    def get_page_items(self):
+        if self.pagination_mode == "url":
+            if not self._pages:
+                self.fetch_pages()
+            return self._pages[0] if self._pages else []
+        self.result_page.verify_item_list()
+        self.result_page.verify_results()
+        items = self.result_page.extract_items()
+        self._record_page()
+        return items
+
+    def fetch_pages(self):
+        """Fetch the next result pages concurrently by their offset URL."""
+        page_size = self.config.get("page_size", 20)
+        concurrent_pages = self.config.get("concurrent_pages", 3)
+        recording = self.recorder is not None
+        start_index = self._next_page_index
+        pages = []
+        if self._next_page_index == 0:
+            # The first page is already loaded by the search
+            self.result_page.verify_item_list()
+            items = self.result_page.extract_items()
+            pages.append((items, self.browser.driver.page_source) if recording else items)
+            self._next_page_index = 1
+            concurrent_pages -= 1
+
+        urls = [
+            self.result_page.page_url(self.search_url, index, page_size)
+            for index in range(
+                self._next_page_index, self._next_page_index + concurrent_pages
+            )
+        ]
+        if urls:
+            pages.extend(self.result_page.extract_pages(urls, with_sources=recording))
+        self._next_page_index += len(urls)
+
+        # Keep the pages up to the first empty or partial one
+        for index, page in enumerate(pages, start_index):
+            items = page
+            if recording:
+                items, source = page
+                if items:
+                    page_url = self.result_page.page_url(self.search_url, index, page_size)
+                    self.recorder.record(page_url, source)
+            if not items:
+                self._last_page_reached = True
+                break
+            self._pages.append(items)
+            if len(items) < page_size:
+                self._last_page_reached = True
+                break
+        logger.info(f"Fetched {len(self._pages)} result pages by URL")
 
     @resilient_action
-    def scrape_news(self, result, number_news):
+    def scrape_news(self, result, number_news, fields=None):
         self.result_page.verify_item(result)
         title_element = self.result_page.get_title_item(result, number_news)
+        if fields is not None:
+            # The category and datetime were already read by the page filter
+            image_element = self.result_page.get_image_item(result, number_news)
+            return {
+                "title_element": title_element,
+                "image_element": image_element,
+                "category": fields.get("category", ""),
+                "datetime": fields.get("datetime", ""),
+            }
         category_element = self.result_page.get_category_item(result, number_news)
         time_element = self.result_page.get_time_item(result, number_news)
         image_element = self.result_page.get_image_item(result, number_news)
@@ -76,21 +270,109 @@ class Scraper:
             "time_element": time_element,
         }
 
-    def scrape_page(self, page):
+    @timed("scraper.scrape_page")
+    def scrape_page(self, page, mask=None, fields=None):
+        fields = fields or [None] * len(page)
+        if mask is not None:
+            # Only read the elements of the items kept by the page filter
+            kept = [index for index, keep in enumerate(mask) if keep]
+            page = [page[index] for index in kept]
+            fields = [fields[index] for index in kept]
         scraped_data = []
         scraped_iterations = len(page)
-        for result in page:
-            data = self.scrape_news(result, scraped_iterations)
+        field_wait_start = self.result_page.field_wait_seconds
+        for result, result_fields in zip(page, fields):
+            data = self.scrape_news(result, scraped_iterations, result_fields)
             scraped_data.append(data)
             scraped_iterations -= 1
-            logger.info(f"{scraped_iterations} news remaining to scrapy")
+            logger.debug(f"{scraped_iterations} news remaining to scrapy")
 
+        field_wait = self.result_page.field_wait_seconds - field_wait_start
+        logger.info(
+            f"Spent {field_wait:.2f}s waiting for item fields on this page "
+            f"({self.result_page.field_wait_seconds:.2f}s in total)"
+        )
         return scraped_data
 
     def go_to_next_page(self):
+        if self.pagination_mode == "url":
+            if self._pages:
+                self._pages.popleft()
+            if not self._pages and not self._last_page_reached:
+                self.fetch_pages()
+            return bool(self._pages)
         return self.result_page.click_next_button()
 
-    @resilient_action
+    def iter_pages(self, item_filter=None):
+        """Yield the results of each page, from the current one to the last.
+
+        The next page is only loaded when the following page is requested,
+        so the results of a page can still be read while it is yielded. In
+        the "bulk" extraction mode the results are plain dicts, otherwise
+        they are the scraped elements of each item.
+
+        Args:
+            item_filter (callable): Optional; Takes the category and datetime
+                of each item of a page and returns whether to keep it. Only
+                used for scraped elements, so the items left out are never
+                scraped and their images never looked up.
+        """
+        while True:
+            if self.extraction_mode == "bulk":
+                items = self.get_page_items()
+                self.items_seen += len(items)
+                yield items
+            else:
+                results = self.get_page_results()
+                self.items_seen += len(results)
+                mask = fields = None
+                if item_filter is not None:
+                    fields = self.result_page.get_item_filter_fields(results)
+                    mask = item_filter(fields)
+                yield self.scrape_page(results, mask, fields)
+            if not self.go_to_next_page():
+                return
+
+    def _record_page(self):
+        # Pages loaded by URL are recorded as they are fetched
+        if self.recorder is not None and self.pagination_mode != "url":
+            driver = self.browser.driver
+            self.recorder.record(driver.current_url, driver.page_source)
+
+    def go_to_page(self, page_index):
+        """Load the result page at `page_index`, counted from 0.
+
+        The page is opened by its offset URL, or reached by clicking the Next
+        button page by page when `resume_mode` is "click".
+
+        Returns:
+            bool: Whether the page exists and has results.
+        """
+        if page_index == 0:
+            return True
+        if self.pagination_mode == "url":
+            self._pages.clear()
+            self._next_page_index = page_index
+            self._last_page_reached = False
+            self.fetch_pages()
+            return bool(self._pages)
+        if self.config.get("resume_mode", "url") == "click":
+            for _ in range(page_index):
+                if not self.result_page.click_next_button():
+                    return False
+            return True
+        page_size = self.config.get("page_size", 20)
+        self.browser.go_to(self.result_page.page_url(self.search_url, page_index, page_size))
+        return self.result_page.has_items()
+
+    def count_skipped_pages(self, pages_visited, page_size):
+        total_results = self.result_page.get_total_results()
+        if total_results is None or page_size == 0:
+            return None
+        total_pages = -(-total_results // page_size)
+        return max(0, total_pages - pages_visited)
+
+    @resilient_action(circuit_breaker=False)
     def close_browser(self):
         """Close all open browser windows."""
         self.browser.close_all_browsers()
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta, timezone
+import sqlite3
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SeenIndex:
+    """On-disk index of the articles collected by previous runs.
+
+    Articles are keyed by their URL, or by title and datetime when the URL is
+    unknown. For each search term and category the index also keeps a
+    high-water mark: the newest article datetime collected so far, so an
+    incremental run can stop crawling once it reaches it.
+
+    Articles marked as seen are kept in memory and only written when
+    `commit` is called, so articles from a run that fails before its output
+    is written are not marked as seen, and the database is never locked for
+    longer than a commit when several batch workers share it.
+
+    Attributes:
+        db_path (str): Path of the SQLite database file.
+
+    Methods:
+        make_key(item): Build the index key of a plain search result dict.
+        is_seen(key): Check if an article is already in the index.
+        mark_seen(key, term, category, published): Add an article to the index.
+        get_high_water_mark(term, category): Get the newest article datetime stored.
+        update_high_water_mark(term, category, published): Move the high-water mark forward.
+        evict_older_than(ttl_days): Remove the articles seen more than `ttl_days` ago.
+        compact(): Reclaim the space left by evicted articles.
+        commit(): Persist the changes of the current run.
+        close(): Close the database connection, discarding uncommitted changes.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        dir_path = os.path.dirname(db_path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        self._pending = {}
+        # Batch workers may share the index, so wait for their commits
+        self.connection = sqlite3.connect(db_path, timeout=30)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS articles (
+                key TEXT PRIMARY KEY,
+                term TEXT,
+                category TEXT,
+                published TEXT,
+                seen_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS articles_seen_at ON articles (seen_at);
+            CREATE TABLE IF NOT EXISTS high_water_marks (
+                term TEXT,
+                category TEXT,
+                published TEXT,
+                PRIMARY KEY (term, category)
+            );
+            """
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    @staticmethod
+    def make_key(item):
+        if item.get("url"):
+            return item["url"]
+        return f"{item.get('title', '')}|{item.get('datetime', '')}"
+
+    def is_seen(self, key):
+        if key in self._pending:
+            return True
+        row = self.connection.execute(
+            "SELECT 1 FROM articles WHERE key = ?", (key,)
+        ).fetchone()
+        return row is not None
+
+    def mark_seen(self, key, term, category, published):
+        self._pending[key] = (
+            key,
+            term.lower(),
+            category.lower(),
+            published,
+            datetime.now(timezone.utc).isoformat(),
+        )
+
+    def get_high_water_mark(self, term, category):
+        row = self.connection.execute(
+            "SELECT published FROM high_water_marks WHERE term = ? AND category = ?",
+            (term.lower(), category.lower()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def update_high_water_mark(self, term, category, published):
+        # Datetimes are stored as "%Y-%m-%dT%H:%M:%SZ", so they sort as strings
+        current = self.get_high_water_mark(term, category)
+        if current is not None and current >= published:
+            return
+        self.connection.execute(
+            "INSERT OR REPLACE INTO high_water_marks VALUES (?, ?, ?)",
+            (term.lower(), category.lower(), published),
+        )
+
+    def evict_older_than(self, ttl_days):
+        cutoff = datetime.now(timezone.utc) - timedelta(days=ttl_days)
+        cursor = self.connection.execute(
+            "DELETE FROM articles WHERE seen_at < ?", (cutoff.isoformat(),)
+        )
+        self.connection.commit()
+        logger.info(f"Evicted {cursor.rowcount} articles from the seen index")
+        return cursor.rowcount
+
+    def compact(self):
+        self.connection.commit()
+        self.connection.execute("VACUUM")
+
+    def commit(self):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?)",
+            self._pending.values(),
+        )
+        self.connection.commit()
+        self._pending = {}
+
+    def close(self):
+        self.connection.close()
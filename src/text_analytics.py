@@ -0,0 +1,146 @@
+import re
+
+MONEY_PATTERNS = [
+    r"\$\d{1,3}(?:,\d{3})*\.\d{2}",  # $xxx,xxx.xx
+    r"\$\d+\.\d{2}",  # $xx.x
+    r"\d+ dollars",  # xx dollars
+    r"\d+ USD",  # xx USD
+]
+
+MONEY_REGEX = re.compile("|".join(MONEY_PATTERNS))
+
+
+def may_contain_money(text):
+    """Check for the literal part of every money pattern, much faster than the regex."""
+    return "$" in text or " dollars" in text or " USD" in text
+
+
+class TermMatcher:
+    """Count several terms and their synonyms in a single pass over a text.
+
+    The lowercased spellings of every term are compiled once into a single
+    regex alternation, so the C regex engine scans a text once whatever the
+    number of terms. Matching is case-insensitive. Occurrences are found
+    from left to right, the longest spelling first, and do not overlap, so
+    for a single term without synonyms the count is the same as with
+    `str.count`, and "Apple Inc" counts once when both "apple" and
+    "apple inc" are spellings of the term. The occurrences of all the
+    spellings of a term are added up under the term.
+
+    Attributes:
+        terms (dict): Spellings of each term, keyed by the term.
+
+    Methods:
+        findall(lowered_text): Get the spellings found in a lowercased text.
+        count(text): Count the occurrences of each term in a text.
+        term_counter(term): Get a function counting a single term in a lowercased text.
+    """
+
+    def __init__(self, terms):
+        self.terms = {}
+        for term, spellings in terms.items():
+            spellings = {spelling.lower() for spelling in [term, *spellings] if spelling}
+            self.terms[term] = sorted(spellings)
+        self.term_of = {
+            spelling: term for term, spellings in self.terms.items() for spelling in spellings
+        }
+        alternatives = sorted(self.term_of, key=lambda spelling: (-len(spelling), spelling))
+        # A pattern that never matches when there is nothing to look for
+        self._regex = re.compile("|".join(map(re.escape, alternatives)) or "(?!)")
+        self._zero_counts = dict.fromkeys(self.terms, 0)
+
+    def findall(self, lowered_text):
+        return self._regex.findall(lowered_text)
+
+    def count(self, text):
+        counts = self._zero_counts.copy()
+        for spelling in self.findall(text.lower()):
+            counts[self.term_of[spelling]] += 1
+        return counts
+
+    def term_counter(self, term):
+        if len(self.term_of) == 1 and term in self.terms:
+            # A single spelling is counted the same by str.count, in C
+            spelling = self.terms[term][0]
+            return lambda lowered_text: lowered_text.count(spelling)
+        term_of = self.term_of
+        findall = self.findall
+        return lambda lowered_text: sum(
+            1 for spelling in findall(lowered_text) if term_of[spelling] == term
+        )
+
+
+class TextAnalyzer:
+    """Find money amounts and count search terms in news titles.
+
+    The money regex and the term matcher are compiled once, and a whole
+    page of titles can be classified with a single `classify` call, which
+    only computes what its caller asks for.
+
+    Attributes:
+        matcher (TermMatcher): Multi-term matcher of the terms and synonyms.
+
+    Methods:
+        money_matches(text): Get the money amounts found in a text.
+        contains_money(text): Check if a text contains a money amount.
+        count_terms(text): Count the occurrences of each term in a text.
+        classify(titles, term, with_matches): Get the money flags and term counts of many titles.
+    """
+
+    def __init__(self, terms):
+        self.matcher = TermMatcher(terms)
+
+    def money_matches(self, text):
+        return MONEY_REGEX.findall(text)
+
+    def contains_money(self, text):
+        return may_contain_money(text) and MONEY_REGEX.search(text) is not None
+
+    def count_terms(self, text):
+        return self.matcher.count(text)
+
+    def classify(self, titles, term=None, with_matches=False):
+        """Classify a page of titles with the compiled money regex and term matcher.
+
+        Args:
+            titles (list): Titles to classify.
+            term (str): Optional; Only count this term, as `term_count`, instead
+                of every term in `term_counts`.
+            with_matches (bool): Also get the `money_matches` of each title.
+
+        Returns:
+            list: For each title, a dict telling whether it has a `money_pattern`,
+                with its `term_count` or `term_counts`, and its `money_matches`
+                when asked for.
+        """
+        search_money = MONEY_REGEX.search
+        find_money = MONEY_REGEX.findall
+        results = []
+        if term is not None:
+            count_term = self.matcher.term_counter(term)
+            for title in titles:
+                result = {
+                    "money_pattern": may_contain_money(title) and search_money(title) is not None,
+                    "term_count": count_term(title.lower()),
+                }
+                if with_matches:
+                    result["money_matches"] = find_money(title)
+                results.append(result)
+            return results
+
+        # Inlined `TermMatcher.count`, called for every title of every page
+        find_terms = self.matcher._regex.findall
+        term_of = self.matcher.term_of
+        zero_counts = self.matcher._zero_counts
+        for title in titles:
+            counts = zero_counts.copy()
+            for spelling in find_terms(title.lower()):
+                counts[term_of[spelling]] += 1
+            result = {
+                "money_pattern": may_contain_money(title) and search_money(title) is not None,
+                "term_counts": counts,
+            }
+            if with_matches:
+                result["money_matches"] = find_money(title)
+            results.append(result)
+        return results
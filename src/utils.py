@@ -1,5 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from multiprocessing.util import Finalize
+import atexit
 import functools
+import json
 import logging
+import queue
+import random
+import threading
 import time
 import traceback
 import os
@@ -15,10 +24,13 @@ from selenium.common.exceptions import (
     InvalidSessionIdException,
 )
 import logging
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 from uuid import uuid4
 
 logger = logging.getLogger(__name__)
 
+LOG_DIR = os.path.join(".", "logs")
+
 
 class MaxRetriesReachedError(Exception):
     """Exception raised when the maximum number of retries is reached."""
@@ -26,12 +38,299 @@ class MaxRetriesReachedError(Exception):
     pass
 
 
-def resilient_action(_func=None, *, retries=3, delay=10):
+class CircuitOpenError(MaxRetriesReachedError):
+    """Exception raised when the browser session is known to be gone."""
+
+    pass
+
+
+class RetryPolicy:
+    """Retry settings for one kind of exception.
+
+    The delay before each retry grows exponentially from `base_delay` up to
+    `max_delay`, with full jitter so concurrent retries do not line up.
+
+    Attributes:
+        retries (int): Number of attempts, including the first one.
+        base_delay (float): Upper bound in seconds of the first delay.
+        max_delay (float): Upper bound in seconds of any delay.
+    """
+
+    def __init__(self, retries=3, base_delay=0.05, max_delay=10):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, max_delay=None):
+        cap = self.max_delay if max_delay is None else min(self.max_delay, max_delay)
+        return random.uniform(0, min(cap, self.base_delay * 2 ** (attempt - 1)))
+
+
+# Checked in order, so subclasses must come before WebDriverException
+RETRY_POLICIES = [
+    (StaleElementReferenceException, RetryPolicy(retries=3, base_delay=0.01, max_delay=0.5)),
+    (ElementClickInterceptedException, RetryPolicy(retries=3, base_delay=0.1, max_delay=2)),
+    (ElementNotInteractableException, RetryPolicy(retries=3, base_delay=0.1, max_delay=2)),
+    (UnexpectedAlertPresentException, RetryPolicy(retries=2, base_delay=0.1, max_delay=1)),
+    (NoSuchElementException, RetryPolicy(retries=3, base_delay=0.25, max_delay=5)),
+    # Every attempt already waited up to `wait_time`
+    (TimeoutException, RetryPolicy(retries=2, base_delay=1, max_delay=10)),
+    (WebDriverException, RetryPolicy(retries=3, base_delay=0.5, max_delay=10)),
+]
+
+# The browser session is gone, retrying cannot help
+SESSION_LOST_EXCEPTIONS = (InvalidSessionIdException, SessionNotCreatedException)
+
+
+def get_retry_policy(exception):
+    for exception_class, policy in RETRY_POLICIES:
+        if isinstance(exception, exception_class):
+            return policy
+    return RetryPolicy()
+
+
+class RetryState:
+    """Retry budget, circuit breaker and statistics shared by a whole run.
+
+    Attributes:
+        max_retries (int): Retries allowed in the run, None for no limit.
+        max_retry_seconds (float): Seconds allowed to sleep between retries
+            in the run, None for no limit.
+        retries (int): Number of retries done.
+        retries_by_exception (dict): Number of retries per exception name.
+        sleep_seconds (float): Seconds spent sleeping between retries.
+
+    Methods:
+        configure(max_retries, max_retry_seconds): Set the run budget and reset the statistics.
+        allow_retry(delay): Check if the budget allows one more retry.
+        record_retry(exception, delay): Count a retry and its delay.
+        open_circuit(browser): Mark the session of a browser as gone.
+        is_circuit_open(browser): Check if the session of a browser is gone.
+        summary(): Get the statistics as a dict.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.configure()
+
+    def configure(self, max_retries=None, max_retry_seconds=None):
+        with self._lock:
+            self.max_retries = max_retries
+            self.max_retry_seconds = max_retry_seconds
+            self.retries = 0
+            self.retries_by_exception = {}
+            self.sleep_seconds = 0.0
+            self._open_circuits = set()
+
+    def allow_retry(self, delay):
+        with self._lock:
+            if self.max_retries is not None and self.retries >= self.max_retries:
+                return False
+            if (
+                self.max_retry_seconds is not None
+                and self.sleep_seconds + delay > self.max_retry_seconds
+            ):
+                return False
+            return True
+
+    def record_retry(self, exception, delay):
+        name = exception.__class__.__name__
+        with self._lock:
+            self.retries += 1
+            self.retries_by_exception[name] = self.retries_by_exception.get(name, 0) + 1
+            self.sleep_seconds += delay
+
+    def open_circuit(self, browser):
+        with self._lock:
+            self._open_circuits.add(id(browser))
+
+    def is_circuit_open(self, browser):
+        return id(browser) in self._open_circuits
+
+    def summary(self):
+        with self._lock:
+            return {
+                "retries": self.retries,
+                "retries_by_exception": dict(self.retries_by_exception),
+                "sleep_seconds": round(self.sleep_seconds, 3),
+            }
+
+
+retry_state = RetryState()
+
+
+class ScreenshotCapturer:
+    """Take the screenshots of unrecoverable errors in the background.
+
+    Screenshots are taken and saved by a single background thread, so the
+    failing call is not held up. They are bounded in several ways: one
+    screenshot per call site of the run, none within `min_interval` seconds
+    of the previous one, and none once `max_bytes` have been saved. An error
+    going up through several resilient functions is only captured once.
+
+    Attributes:
+        dir_path (str): Directory where the screenshots are saved.
+        min_interval (float): Minimum seconds between two screenshots.
+        max_bytes (int): Total size of the screenshots of a run.
+        bytes_saved (int): Size of the screenshots saved in the run.
+        file_paths (list): Paths of the screenshots saved in the run.
+
+    Methods:
+        configure(min_interval, max_bytes): Set the limits and reset the run.
+        capture(driver, call_site, error): Schedule the screenshot of an error.
+        wait(timeout): Block until the scheduled screenshots are saved.
+    """
+
+    def __init__(self, dir_path=LOG_DIR):
+        self.dir_path = dir_path
+        self._lock = threading.Lock()
+        self._executor = None
+        self.configure()
+
+    def configure(self, min_interval=10, max_bytes=20 * 1024 * 1024):
+        with self._lock:
+            self.min_interval = min_interval
+            self.max_bytes = max_bytes
+            self.bytes_saved = 0
+            self.file_paths = []
+            self._call_sites = set()
+            self._last_capture = None
+            self._pending = set()
+
+    def _should_capture(self, call_site):
+        now = time.monotonic()
+        with self._lock:
+            if call_site in self._call_sites or self.bytes_saved >= self.max_bytes:
+                return False
+            if self._last_capture is not None and now - self._last_capture < self.min_interval:
+                return False
+            self._call_sites.add(call_site)
+            self._last_capture = now
+            return True
+
+    def capture(self, driver, call_site, error=None):
+        if error is not None:
+            if getattr(error, "_screenshot_captured", False):
+                return None
+            try:
+                error._screenshot_captured = True
+            except AttributeError:
+                pass
+        if not self._should_capture(call_site):
+            metrics.increment("screenshots_skipped")
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="screenshots"
+                )
+            future = self._executor.submit(self._save, driver, call_site)
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def _save(self, driver, call_site):
+        try:
+            png = driver.get_screenshot_as_png()
+            with self._lock:
+                if self.bytes_saved + len(png) > self.max_bytes:
+                    logger.warning(f"Screenshot of {call_site} skipped: size limit reached")
+                    return None
+                self.bytes_saved += len(png)
+            os.makedirs(self.dir_path, exist_ok=True)
+            file_path = os.path.join(self.dir_path, f"screenshot_on_error_{uuid4()}.png")
+            with open(file_path, "wb") as f:
+                f.write(png)
+            with self._lock:
+                self.file_paths.append(file_path)
+            metrics.increment("screenshots_taken")
+            logger.info(f"Saved the screenshot of the error in {call_site} to {file_path}")
+            return file_path
+        except Exception as e:
+            logger.warning(f"Could not take the screenshot of the error in {call_site}: {e}")
+            return None
+
+    def wait(self, timeout=None):
+        with self._lock:
+            pending = set(self._pending)
+        if pending:
+            wait(pending, timeout=timeout)
+
+
+def start_queue_logging():
+    """Hand the log records of the root logger over to a background thread.
+
+    The handlers of the root logger are moved behind a `QueueListener`, and
+    the root logger only puts records in a queue, so logging never blocks
+    on the disk or the console. Forked worker processes start their own
+    listener. The queue is drained when the process exits.
+
+    Returns:
+        QueueListener: The listener writing the records to the handlers.
+    """
+    global _log_listener
+    root = logging.getLogger()
+    handlers = [handler for handler in root.handlers if not isinstance(handler, QueueHandler)]
+    if not handlers:
+        return _log_listener
+    stop_queue_logging()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    log_queue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    _log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+    return _log_listener
+
+
+def stop_queue_logging():
+    """Write the queued log records and stop the listener thread."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+def _restart_queue_logging():
+    # The listener thread of the parent does not exist in a forked child
+    global _log_listener
+    if _log_listener is None:
+        return
+    log_queue = queue.SimpleQueue()
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, QueueHandler):
+            handler.queue = log_queue
+    _log_listener = QueueListener(
+        log_queue, *_log_listener.handlers, respect_handler_level=True
+    )
+    _log_listener.start()
+    # Worker processes skip atexit handlers, so drain the queue as a finalizer
+    Finalize(_log_listener, stop_queue_logging, exitpriority=0)
+
+
+_log_listener = None
+atexit.register(stop_queue_logging)
+os.register_at_fork(after_in_child=_restart_queue_logging)
+
+
+def resilient_action(_func=None, *, retries=None, delay=None, circuit_breaker=True):
     """Decorator to add resilience to a function by catching exceptions.
 
+    Retryable Selenium errors are retried following the `RetryPolicy` of
+    their exception, with exponential backoff and jitter, as long as the run
+    budget in `retry_state` allows it. Once the browser session is gone the
+    circuit breaker opens and later calls on that browser fail immediately.
+
     Args:
-        retries (int, optional): Number of retry attempts. Default is 3.
-        delay (int, optional): Delay in seconds between retries. Default is 5.
+        retries (int, optional): Number of attempts, overriding the policy.
+        delay (int, optional): Maximum delay in seconds between retries,
+            overriding the policy.
+        circuit_breaker (bool, optional): Fail fast when the session is gone.
+            Default is True.
 
     Returns:
         callable: The wrapped function with added resilience.
@@ -43,9 +342,15 @@ def resilient_action(_func=None, *, retries=3, delay=10):
             try:
                 browser = args[0].browser
                 has_browser = True
-            except AttributeError:
+            except (AttributeError, IndexError):
                 has_browser = False
-            for attempt in range(1, retries + 1):
+            if circuit_breaker and has_browser and retry_state.is_circuit_open(browser):
+                raise CircuitOpenError(
+                    f"Not executing {func.__name__}: the browser session is gone."
+                )
+
+            attempt = 1
+            while True:
                 try:
                     return func(*args, **kwargs)
                 except (
@@ -66,26 +371,35 @@ def resilient_action(_func=None, *, retries=3, delay=10):
                         f"A retryable error occurred while executing {func.__name__} at line {line}: {e} {e.__class__.__name__}"
                     )
 
-                    if attempt < retries:
+                    if isinstance(e, SESSION_LOST_EXCEPTIONS):
+                        if has_browser:
+                            retry_state.open_circuit(browser)
+                        logger.error("The browser session is gone, not retrying.")
+                        raise CircuitOpenError(
+                            f"The browser session is gone: {e.__class__.__name__}"
+                        ) from e
+
+                    policy = get_retry_policy(e)
+                    max_attempts = retries if retries is not None else policy.retries
+                    wait = policy.delay(attempt, delay)
+                    if attempt < max_attempts and retry_state.allow_retry(wait):
                         logger.warning(
-                            f"Retrying in {delay} seconds... (Attempt {attempt}/{retries})"
+                            f"Retrying in {wait:.3f} seconds... (Attempt {attempt}/{max_attempts})"
                         )
-                        time.sleep(delay)
+                        retry_state.record_retry(e, wait)
+                        time.sleep(wait)
+                        attempt += 1
                     else:
-                        logger.error(f"Failed after {retries} attempts.")
+                        logger.error(f"Failed after {attempt} attempts.")
                         raise MaxRetriesReachedError(
-                            f"Failed after {retries} attempts."
+                            f"Failed after {attempt} attempts."
                         )
                 except (MaxRetriesReachedError, Exception) as e:
                     tb = traceback.extract_tb(e.__traceback__)
                     last_trace = tb[-1] if tb else None
                     line = last_trace[1] if last_trace else "Unknown"
-                    id = uuid4()
-                    if has_browser:
-                        file_path = os.path.join(
-                            "." "logs", f"screenshot_on_error_{id}.png"
-                        )
-                        browser.driver.save_screenshot(file_path)
+                    if has_browser and not retry_state.is_circuit_open(browser):
+                        screenshots.capture(browser.driver, f"{func.__qualname__}:{line}", e)
                     logger.error(
                         f"An unrecoverable error occurred while executing {func.__name__} at line {line}: {e} {e.__class__.__name__}"
                     )
@@ -97,3 +411,140 @@ def resilient_action(_func=None, *, retries=3, delay=10):
         return decorator
     else:
         return decorator(_func)
+
+
+def set_url_params(url, **params):
+    """Return the url with the given query parameters added or replaced."""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query.update({key: str(value) for key, value in params.items()})
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class Metrics:
+    """Timings and counters of the hot paths of a run.
+
+    Timings are recorded with the `timer` context manager or the `timed`
+    decorator, and WebDriver commands are timed once `instrument_webdriver`
+    has wrapped the driver. At the end of the run the summary is written as
+    JSON and in the Prometheus text format, together with the retry
+    statistics of `retry_state`.
+
+    Methods:
+        observe(name, seconds): Record one timing.
+        increment(name, value): Increase a counter.
+        timer(name): Context manager timing its block.
+        timed(name): Decorator timing every call of a function.
+        instrument_webdriver(driver): Time every command sent to a WebDriver.
+        reset(): Clear the timings and counters.
+        summary(): Get the timings, counters and retries as a dict.
+        to_prometheus(): Get the summary in the Prometheus text format.
+        write(dir_path): Write metrics.json and metrics.prom to a directory.
+    """
+
+    PREFIX = "newsscraper"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.timings = {}
+            self.counters = {}
+
+    def observe(self, name, seconds):
+        with self._lock:
+            timing = self.timings.setdefault(
+                name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            )
+            timing["count"] += 1
+            timing["total_seconds"] += seconds
+            timing["max_seconds"] = max(timing["max_seconds"], seconds)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name=None):
+        def decorator(func):
+            metric_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(metric_name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def instrument_webdriver(self, driver):
+        executor = driver.command_executor
+        if vars(executor).get("_metrics_instrumented", False):
+            return
+        execute = executor.execute
+
+        def timed_execute(command, params):
+            with self.timer(f"webdriver.{command}"):
+                return execute(command, params)
+
+        executor.execute = timed_execute
+        executor._metrics_instrumented = True
+
+    def summary(self):
+        with self._lock:
+            timings = {
+                name: {
+                    "count": timing["count"],
+                    "total_seconds": round(timing["total_seconds"], 6),
+                    "mean_seconds": round(timing["total_seconds"] / timing["count"], 6),
+                    "max_seconds": round(timing["max_seconds"], 6),
+                }
+                for name, timing in sorted(self.timings.items())
+            }
+            counters = dict(sorted(self.counters.items()))
+        return {"timings": timings, "counters": counters, "retries": retry_state.summary()}
+
+    def to_prometheus(self):
+        summary = self.summary()
+        duration = f"{self.PREFIX}_duration_seconds"
+        lines = [f"# TYPE {duration} summary"]
+        for name, timing in summary["timings"].items():
+            lines.append(f'{duration}_count{{name="{name}"}} {timing["count"]}')
+            lines.append(f'{duration}_sum{{name="{name}"}} {timing["total_seconds"]}')
+        lines.append(f"# TYPE {self.PREFIX}_events_total counter")
+        for name, value in summary["counters"].items():
+            lines.append(f'{self.PREFIX}_events_total{{name="{name}"}} {value}')
+        lines.append(f"# TYPE {self.PREFIX}_retries_total counter")
+        for name, value in summary["retries"]["retries_by_exception"].items():
+            lines.append(f'{self.PREFIX}_retries_total{{exception="{name}"}} {value}')
+        lines.append(f"# TYPE {self.PREFIX}_retry_sleep_seconds_total counter")
+        lines.append(
+            f"{self.PREFIX}_retry_sleep_seconds_total {summary['retries']['sleep_seconds']}"
+        )
+        return "\n".join(lines) + "\n"
+
+    def write(self, dir_path):
+        os.makedirs(dir_path, exist_ok=True)
+        json_path = os.path.join(dir_path, "metrics.json")
+        prometheus_path = os.path.join(dir_path, "metrics.prom")
+        with open(json_path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        with open(prometheus_path, "w") as f:
+            f.write(self.to_prometheus())
+        return [json_path, prometheus_path]
+
+
+metrics = Metrics()
+timed = metrics.timed
+timer = metrics.timer
+screenshots = ScreenshotCapturer()
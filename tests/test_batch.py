@@ -0,0 +1,61 @@
+import unittest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch, Mock
+from src import batch
+
+
+class FakeExecutor:
+    def __init__(self, outcomes):
+        self.outcomes = iter(outcomes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def submit(self, func, *args):
+        future = Future()
+        outcome = next(self.outcomes)
+        if isinstance(outcome, Exception):
+            future.set_exception(outcome)
+        else:
+            future.set_result(outcome)
+        return future
+
+
+class TestBatch(unittest.TestCase):
+    @patch("src.batch.setup_logging")
+    @patch("RPA.Robocorp.WorkItems.WorkItems")
+    @patch("src.batch.fail_work_item")
+    @patch("src.batch.release_work_item")
+    @patch("src.batch.reserve_work_items")
+    @patch("src.batch.ProcessPoolExecutor")
+    def test_releases_every_item_when_workers_fail(
+        self, mock_executor, mock_reserve, mock_release, mock_fail, mock_work_items, _
+    ):
+        items = [Mock(id="crashed"), Mock(id="unreleased"), Mock(id="done")]
+        mock_reserve.return_value = items
+        mock_executor.return_value = FakeExecutor(
+            [BrokenProcessPool("worker died"), ([], 1.0, None), ([], 1.0, None)]
+        )
+
+        def release(library, item, files, error):
+            if item.id == "unreleased":
+                raise OSError("network down")
+
+        mock_release.side_effect = release
+
+        batch.main()
+
+        released = {call.args[1].id: call.args[3] for call in mock_release.call_args_list}
+        self.assertEqual(released["crashed"], "BrokenProcessPool: worker died")
+        self.assertEqual(set(released), {"crashed", "unreleased", "done"})
+        mock_fail.assert_called_once_with(
+            mock_work_items.return_value, items[1], "OSError: network down"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+from src.cached_scraper import CachedScraper
+from src.result_cache import ResultCache
+from src.scraper import Scraper
+
+
+class TestCachedScraper(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(os.path.join(self.tmp_dir.name, "result_cache.db"))
+        self.pages = [[{"title": "1"}, {"title": "2"}], [{"title": "3"}], [{"title": "4"}]]
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def make_live_scraper(self):
+        live = Mock()
+        live.page = 0
+        live.get_page_items.side_effect = lambda: self.pages[live.page]
+
+        def go_to_next_page():
+            if live.page + 1 >= len(self.pages):
+                return False
+            live.page += 1
+            return True
+
+        def go_to_page(page_index):
+            live.page = page_index
+            return page_index < len(self.pages)
+
+        live.go_to_next_page.side_effect = go_to_next_page
+        live.go_to_page.side_effect = go_to_page
+        return live
+
+    def crawl(self, live):
+        scraper = CachedScraper(live, self.cache, "site")
+        scraper.open_website()
+        scraper.search_for_term_by_category("apple", "all")
+        return [[item["title"] for item in items] for items in scraper.iter_pages()]
+
+    def test_second_search_reads_the_cache_only(self):
+        first = self.make_live_scraper()
+        self.assertEqual(self.crawl(first), [["1", "2"], ["3"], ["4"]])
+        self.assertEqual(first.get_page_items.call_count, 3)
+
+        second = self.make_live_scraper()
+        self.assertEqual(self.crawl(second), [["1", "2"], ["3"], ["4"]])
+        second.open_website.assert_not_called()
+        second.get_page_items.assert_not_called()
+
+    def test_loads_the_missing_pages_from_the_website(self):
+        self.cache.put("site", "apple", 0, self.pages[0])
+        self.cache.put("site", "apple", 1, self.pages[1])
+        live = self.make_live_scraper()
+
+        self.assertEqual(self.crawl(live), [["1", "2"], ["3"], ["4"]])
+        live.search_for_term_by_category.assert_called_once_with("apple", "all")
+        live.go_to_page.assert_called_once_with(2)
+        self.assertEqual(live.get_page_items.call_count, 1)
+        self.assertEqual(self.cache.get("site", "apple", 2), (self.pages[2], True))
+
+    def test_records_the_pages_loaded_from_the_website(self):
+        browser = Mock()
+        browser.driver.current_url = "https://example.com/site-search/?query=apple"
+        browser.driver.page_source = "<html></html>"
+        live = Scraper({"base_url": "https://example.com"}, browser=browser)
+        live.main_page = Mock()
+        live.result_page = Mock()
+        live.result_page.extract_items.side_effect = self.pages
+        live.result_page.click_next_button.side_effect = [True, True, False]
+        scraper = CachedScraper(live, self.cache, "site")
+        scraper.recorder = Mock()
+
+        scraper.search_for_term_by_category("apple", "all")
+        self.assertEqual(len(list(scraper.iter_pages())), 3)
+        self.assertEqual(scraper.recorder.record.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from src.checkpoint import Checkpoint
+from src.data_extractor import DataExtractor
+from src.seen_index import SeenIndex
+
+
+INPUTS = {
+    "settings": {"base_url": "https://www.reuters.com/"},
+    "search_term": "apple",
+    "category": "all",
+    "month_number": 2,
+}
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "data", "checkpoint.jsonl")
+        self.key = Checkpoint.make_key(INPUTS)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def save_pages(self, pages):
+        checkpoint = Checkpoint(self.file_path, self.key)
+        for page_number in range(1, pages + 1):
+            checkpoint.save_page(
+                page_number,
+                [{"title": f"News {page_number}", "image": f"image_{page_number}.png"}],
+                {f"https://img/{number}": f"image_{number}.png" for number in range(1, page_number + 1)},
+                {"consecutive_out_of_range": page_number, "seen": [[f"key{page_number}", "t"]]},
+            )
+        return checkpoint
+
+    def test_resumes_after_last_completed_page(self):
+        self.save_pages(3)
+        checkpoint = Checkpoint(self.file_path, self.key)
+        self.assertEqual(checkpoint.load(), 3)
+        self.assertEqual([row["title"] for row in checkpoint.rows], ["News 1", "News 2", "News 3"])
+        self.assertEqual(len(checkpoint.images), 3)
+        self.assertEqual(checkpoint.extractor_state["consecutive_out_of_range"], 3)
+        self.assertEqual(
+            checkpoint.extractor_state["seen"], [["key1", "t"], ["key2", "t"], ["key3", "t"]]
+        )
+
+    def test_ignores_page_cut_short(self):
+        self.save_pages(2)
+        with open(self.file_path, "a") as f:
+            f.write('{"page": 3, "rows": [{"tit')
+        checkpoint = Checkpoint(self.file_path, self.key)
+        self.assertEqual(checkpoint.load(), 2)
+        self.assertEqual(len(checkpoint.rows), 2)
+
+    def test_discards_checkpoint_of_another_work_item(self):
+        self.save_pages(2)
+        other_key = Checkpoint.make_key(dict(INPUTS, search_term="banana"))
+        checkpoint = Checkpoint(self.file_path, other_key)
+        self.assertEqual(checkpoint.load(), 0)
+        self.assertFalse(os.path.exists(self.file_path))
+
+    def test_keep_position_drops_the_rows(self):
+        self.save_pages(3).keep_position()
+        checkpoint = Checkpoint(self.file_path, self.key)
+        self.assertEqual(checkpoint.load(), 3)
+        self.assertEqual(checkpoint.rows, [])
+        self.assertEqual(len(checkpoint.images), 3)
+        self.assertEqual(checkpoint.extractor_state["consecutive_out_of_range"], 3)
+        self.assertEqual(
+            checkpoint.extractor_state["seen"], [["key1", "t"], ["key2", "t"], ["key3", "t"]]
+        )
+
+    def test_clear(self):
+        checkpoint = self.save_pages(1)
+        checkpoint.clear()
+        self.assertEqual(Checkpoint(self.file_path, self.key).load(), 0)
+
+    def test_extractor_state_round_trip(self):
+        published = datetime.now(timezone.utc).replace(microsecond=0)
+        db_path = os.path.join(self.tmp_dir.name, "seen_index.db")
+        with SeenIndex(db_path) as index:
+            extractor = DataExtractor("apple", "all", 2, seen_index=index)
+            item = {"url": "https://news/1", "title": "Apple news"}
+            self.assertTrue(extractor.is_new_item(item, published))
+            state = extractor.get_state()
+            self.assertEqual(extractor.get_state()["seen"], [])
+
+        with SeenIndex(db_path) as index:
+            extractor = DataExtractor("apple", "all", 2, seen_index=index)
+            extractor.restore_state(state)
+            self.assertEqual(extractor.newest_date, published)
+            self.assertTrue(index.is_seen("https://news/1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,18 @@
+import tempfile
 import unittest
+from datetime import datetime, timezone
 from unittest.mock import patch
+from selenium.common.exceptions import TimeoutException
 from src.data_extractor import DataExtractor
+# The extractor is decorated with the utils module it imports itself
+from utils import retry_state, get_retry_policy
 
 
 class MockElement:
-    def __init__(self, text=None, href=None, datetime=None):
+    def __init__(self, text=None, href=None, datetime=None, src=None):
         self.text = text
         self.href = href
+        self.src = src
         self.datetime = datetime
 
     def get_attribute(self, name):
@@ -39,7 +45,101 @@ class TestDataExtractor(unittest.TestCase):
         result = self.data_extractor.extract_data(mock_search_result)
         self.assertIsNone(result)
 
-    @patch("src.data_extractor.Files")
+    def test_read_search_result(self):
+        mock_search_result = {
+            "title_element": MockElement(
+                text="Apple announces new iPhone", href="http://news.url"
+            ),
+            "image_element": MockElement(src="http://image.url"),
+            "time_element": MockElement(datetime="2023-07-10T20:00:00Z"),
+        }
+        item = self.data_extractor.read_search_result(mock_search_result)
+        self.assertEqual(
+            item,
+            {
+                "title": "Apple announces new iPhone",
+                "category": "",
+                "url": "http://news.url",
+                "datetime": "2023-07-10T20:00:00Z",
+                "src": "http://image.url",
+            },
+        )
+
+    @patch("src.data_extractor.get")
+    def test_extract_item_plain_data(self, mock_get):
+        mock_get.return_value.content = b"fake_img_data"
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        items = [
+            {"title": "Apple pays $10.00", "category": "Business", "datetime": now, "src": "http://image.url"},
+            {"title": "Old apple news", "category": "Business", "datetime": "2022-01-10T20:00:00Z", "src": ""},
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.data_extractor.data_dir = tmp_dir
+            result = self.data_extractor.extract_from_items(items)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(list(result[0].keys()), self.data_extractor.headers)
+        self.assertTrue(result[0]["money_pattern"])
+        self.assertEqual(result[0]["count_term"], 1)
+        self.assertTrue(result[0]["image"].startswith("image_"))
+
+    def test_has_left_date_range(self):
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        old_item = {"title": "", "datetime": "2022-01-10T20:00:00Z"}
+        self.data_extractor.extract_from_items([old_item, {"title": "", "datetime": ""}])
+        self.assertEqual(self.data_extractor.consecutive_out_of_range, 1)
+        self.data_extractor.extract_from_items([{"title": "", "datetime": now}, old_item])
+        self.assertFalse(self.data_extractor.has_left_date_range(2))
+        self.data_extractor.extract_from_items([old_item])
+        self.assertTrue(self.data_extractor.has_left_date_range(2))
+
+    def test_filter_page_dates(self):
+        now = datetime.now(timezone.utc).isoformat()
+        old = "2022-01-10T20:00:00Z"
+        items = [{"datetime": date} for date in (now, old, "", old)]
+        mask = self.data_extractor.filter_page(items)
+        self.assertEqual(mask, [True, False, False, False])
+        self.assertEqual(self.data_extractor.consecutive_out_of_range, 2)
+        items = [{"title": "Apple", "datetime": now}]
+        rows = list(self.data_extractor.iter_rows(items, prefiltered=True))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(self.data_extractor.consecutive_out_of_range, 2)
+
+    @patch("src.data_extractor.get")
+    def test_filter_page_category_before_images(self, mock_get):
+        mock_get.return_value.content = b"fake_img_data"
+        now = datetime.now(timezone.utc).isoformat()
+        items = [
+            {"title": "Apple", "category": "business", "datetime": now, "src": "http://a"},
+            {"title": "Apple", "category": "Sports", "datetime": now, "src": "http://b"},
+            {"title": "Apple", "category": "", "datetime": now, "src": ""},
+        ]
+        mask = self.data_extractor.filter_page(items)
+        self.assertEqual(mask, [True, False, True])
+        self.assertEqual(self.data_extractor.consecutive_out_of_range, 0)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.data_extractor.data_dir = tmp_dir
+            rows = self.data_extractor.extract_from_items(items)
+        self.assertEqual(len(rows), 2)
+        mock_get.assert_called_once_with("http://a")
+
+        for category in ("all", "All", ""):
+            extractor = DataExtractor(term="apple", category=category, month_number=1)
+            self.assertEqual(extractor.filter_page(items), [True, True, True])
+        extractor = DataExtractor("apple", "Business", 1, filter_category=False)
+        self.assertEqual(extractor.filter_page(items), [True, True, True])
+
+    def test_read_search_result_prefiltered_fields(self):
+        mock_search_result = {
+            "title_element": MockElement(text="Apple"),
+            "category": "Business",
+            "datetime": "2023-07-10T20:00:00Z",
+        }
+        item = self.data_extractor.read_search_result(mock_search_result)
+        self.assertEqual(item["category"], "Business")
+        self.assertEqual(item["datetime"], "2023-07-10T20:00:00Z")
+
+    @patch("RPA.Excel.Files.Files")
     def test_store_data_to_excel_success(self, mock_files):
         mock_excel = mock_files.return_value
         mock_excel.open_workbook.return_value = None
@@ -60,7 +160,7 @@ class TestDataExtractor(unittest.TestCase):
         except Exception as e:
             self.fail(f"store_data_to_excel raised an exception: {e}")
 
-    @patch("src.data_extractor.Files")
+    @patch("RPA.Excel.Files.Files")
     def test_store_data_to_excel_failure(self, mock_files):
         mock_excel = mock_files.return_value
         mock_excel.open_workbook.side_effect = Exception("Excel Error")
@@ -76,6 +176,20 @@ class TestDataExtractor(unittest.TestCase):
         with self.assertRaises(Exception):
             self.data_extractor.store_data_to_excel(mock_data)
 
+    @patch("utils.time.sleep")
+    def test_extract_data_retries_once_per_attempt(self, mock_sleep):
+        retry_state.configure()
+        error = TimeoutException()
+        with patch.object(
+            self.data_extractor, "read_search_result", return_value={"title": "Apple news"}
+        ), patch.object(self.data_extractor, "filter_page", side_effect=error) as filter_page:
+            with self.assertRaises(Exception), self.assertLogs("utils", "ERROR") as logs:
+                self.data_extractor.extract_data({})
+        self.assertEqual(filter_page.call_count, get_retry_policy(error).retries)
+        # The failure is reported once, by the only wrapper
+        self.assertFalse(any("unrecoverable" in line for line in logs.output))
+        self.assertFalse(any("extract_item" in line for line in logs.output))
+
 
 if __name__ == "__main__":
     unittest.main()
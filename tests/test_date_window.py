@@ -0,0 +1,68 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from src.date_window import DateWindow, parse_iso_datetime
+
+
+class TestParseIsoDatetime(unittest.TestCase):
+    def test_website_format(self):
+        self.assertEqual(
+            parse_iso_datetime("2023-07-10T20:00:00Z"),
+            datetime(2023, 7, 10, 20, tzinfo=timezone.utc),
+        )
+
+    def test_variants(self):
+        expected = datetime(2023, 7, 10, 20, 0, 0, 123000, tzinfo=timezone.utc)
+        for value in (
+            "2023-07-10T20:00:00.123Z",
+            "2023-07-10T20:00:00.123000+00:00",
+            "2023-07-10T22:00:00.123+02:00",
+            "2023-07-10T17:00:00.123-0300",
+            "2023-07-10 20:00:00.123",
+            "2023-07-10T20:00:00,1234567z",
+        ):
+            with self.subTest(value=value):
+                parsed = parse_iso_datetime(value)
+                self.assertEqual(parsed.replace(microsecond=parsed.microsecond // 1000 * 1000), expected)
+        self.assertEqual(
+            parse_iso_datetime("2023-07-10"), datetime(2023, 7, 10, tzinfo=timezone.utc)
+        )
+
+    def test_invalid(self):
+        for value in ("", None, "yesterday", "2023-13-10T20:00:00Z", "2023/07/10T20:00:00Z"):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_iso_datetime(value))
+
+
+class TestDateWindow(unittest.TestCase):
+    def test_window_bounds(self):
+        now = datetime(2024, 3, 15, 12, tzinfo=timezone.utc)
+        window = DateWindow(2, now=now)
+        self.assertEqual(window.start, datetime(2024, 1, 31, tzinfo=timezone.utc))
+        self.assertTrue(window.contains(window.start))
+        self.assertFalse(window.contains(window.start - timedelta(seconds=1)))
+        self.assertTrue(window.is_before(window.start - timedelta(seconds=1)))
+        self.assertFalse(window.contains(None))
+        self.assertFalse(window.is_before(None))
+
+    def test_zero_months_is_the_current_one(self):
+        now = datetime(2024, 3, 15, 12, tzinfo=timezone.utc)
+        for month_number in (0, 1):
+            with self.subTest(month_number=month_number):
+                window = DateWindow(month_number, now=now)
+                self.assertEqual(window.start, datetime(2024, 3, 1, tzinfo=timezone.utc))
+                self.assertTrue(window.contains(now))
+
+    def test_end_follows_the_clock(self):
+        window = DateWindow(1, now=datetime.now(timezone.utc) - timedelta(hours=1))
+        self.assertTrue(window.contains(datetime.now(timezone.utc) - timedelta(minutes=1)))
+        self.assertFalse(window.contains(datetime.now(timezone.utc) + timedelta(days=1)))
+
+    def test_mask(self):
+        now = datetime.now(timezone.utc)
+        window = DateWindow(1, now=now)
+        dates = [now, None, now - timedelta(days=400)]
+        self.assertEqual(window.mask(dates), [True, False, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
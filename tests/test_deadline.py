@@ -0,0 +1,55 @@
+import unittest
+from src.deadline import Deadline, metrics
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline(unittest.TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.clock = FakeClock()
+        self.deadline = Deadline(100, reserve=20, clock=self.clock)
+
+    def test_remaining_and_drain_timeout(self):
+        self.clock.now = 30
+        self.assertEqual(self.deadline.remaining(), 70)
+        self.assertEqual(self.deadline.drain_timeout(), 50)
+        self.clock.now = 90
+        self.assertEqual(self.deadline.drain_timeout(), 0)
+
+    def test_counts_from_the_start_of_the_run(self):
+        self.clock.now = 30
+        deadline = Deadline(100, reserve=20, clock=self.clock, started=10)
+        self.assertEqual(deadline.remaining(), 80)
+
+    def test_page_cost_is_a_moving_average(self):
+        self.deadline.record_page(10)
+        self.assertEqual(self.deadline.page_seconds, 10)
+        self.deadline.record_page(20)
+        self.assertAlmostEqual(self.deadline.page_seconds, 13)
+
+    def test_stops_when_the_next_page_does_not_fit(self):
+        self.deadline.record_page(10)
+        self.clock.now = 60
+        self.assertTrue(self.deadline.allows_page())
+        self.clock.now = 75
+        self.assertFalse(self.deadline.allows_page())
+
+    def test_counts_the_pending_images(self):
+        metrics.observe("images.download", 2.0)
+        metrics.observe("images.download", 4.0)
+        self.deadline.record_page(10)
+        self.clock.now = 40
+        self.assertEqual(self.deadline.drain_seconds(8, 4), 6.0)
+        self.assertTrue(self.deadline.allows_page(8, 4))
+        self.assertFalse(self.deadline.allows_page(44, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
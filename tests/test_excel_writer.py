@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from openpyxl import load_workbook
+from src.excel_writer import ExcelWriter
+
+
+HEADERS = ["money_pattern", "count_term", "title", "image", "date"]
+
+
+def make_row(number):
+    return {
+        "money_pattern": False,
+        "count_term": number,
+        "title": f"Title {number}",
+        "image": f"image_{number}.png",
+        "date": "2023-07-10T20:00:00Z",
+    }
+
+
+class TestExcelWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "data", "scraped.xlsx")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_rows(self):
+        workbook = load_workbook(self.file_path, read_only=True)
+        rows = [list(row) for row in workbook.active.iter_rows(values_only=True)]
+        workbook.close()
+        return rows
+
+    def test_creates_file_with_headers(self):
+        with ExcelWriter(self.file_path, HEADERS, batch_size=2) as writer:
+            for number in range(5):
+                writer.write_row(make_row(number))
+
+        rows = self.read_rows()
+        self.assertEqual(rows[0], HEADERS)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[3][2], "Title 2")
+        self.assertEqual(writer.rows_written, 5)
+
+    def test_appends_to_existing_file(self):
+        with ExcelWriter(self.file_path, HEADERS) as writer:
+            writer.write_row(make_row(1))
+        with ExcelWriter(self.file_path, HEADERS) as writer:
+            writer.write_row(make_row(2))
+
+        rows = self.read_rows()
+        self.assertEqual(rows[0], HEADERS)
+        self.assertEqual([row[2] for row in rows[1:]], ["Title 1", "Title 2"])
+
+    def test_discard_keeps_the_saved_file(self):
+        with ExcelWriter(self.file_path, HEADERS) as writer:
+            writer.write_row(make_row(0))
+        writer = ExcelWriter(self.file_path, HEADERS, batch_size=1)
+        writer.open()
+        writer.write_row(make_row(1))
+        writer.discard()
+
+        self.assertEqual(len(self.read_rows()), 2)
+        self.assertEqual(os.listdir(os.path.dirname(self.file_path)), ["scraped.xlsx"])
+
+    def test_keeps_header_order(self):
+        shuffled = dict(reversed(list(make_row(7).items())))
+        with ExcelWriter(self.file_path, HEADERS) as writer:
+            writer.write_row(shuffled)
+
+        rows = self.read_rows()
+        self.assertEqual(rows[1], [False, 7, "Title 7", "image_7.png", "2023-07-10T20:00:00Z"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from src.http_scraper import HttpScraper
+from src.page_archive import PageRecorder, read_archive
+from src.replay_scraper import ReplayScraper
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+PAGE_SIZE = 3
+
+
+class FixtureSiteHandler(BaseHTTPRequestHandler):
+    requested = []
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        FixtureSiteHandler.requested.append(self.path)
+        if parts.path == "/":
+            body = b"<html><body>Home</body></html>"
+        elif parts.path == "/site-search/":
+            offset = int(parse_qs(parts.query).get("offset", ["0"])[0])
+            page_path = os.path.join(
+                FIXTURES_DIR, f"search_page_{offset // PAGE_SIZE + 1}.html"
+            )
+            if not os.path.exists(page_path):
+                self.send_error(404)
+                return
+            with open(page_path, "rb") as f:
+                body = f.read()
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpScraper(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureSiteHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}/"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        FixtureSiteHandler.requested = []
+        self.scraper = HttpScraper(
+            {"base_url": self.base_url, "wait_time": 5, "page_size": PAGE_SIZE}
+        )
+
+    def tearDown(self):
+        self.scraper.close_browser()
+
+    def test_items_match_bulk_extraction_format(self):
+        self.scraper.open_website()
+        self.scraper.search_for_term_by_category("apple", "all")
+        items = self.scraper.get_page_items()
+
+        self.assertEqual(
+            items[0],
+            {
+                "title": "Apple pays 10 dollars per share",
+                "category": "Business",
+                "url": f"{self.base_url}business/apple-pays-10-dollars/",
+                "datetime": "2023-07-10T20:00:00Z",
+                "src": f"{self.base_url}images/apple-1.jpg",
+            },
+        )
+        self.assertEqual(items[1]["src"], "")
+        self.assertEqual(items[2]["datetime"], "")
+        self.assertEqual(items[2]["src"], "https://cdn.example.com/apple-3.png")
+
+    def test_pagination_until_next_button_is_disabled(self):
+        self.scraper.search_for_term_by_category("apple", "all")
+        titles = [item["title"] for item in self.scraper.get_page_items()]
+        while self.scraper.go_to_next_page():
+            titles.extend(item["title"] for item in self.scraper.get_page_items())
+
+        self.assertEqual(len(titles), 5)
+        self.assertEqual(titles[-1], "Apple older news")
+        self.assertEqual(self.scraper.offset, PAGE_SIZE)
+        self.assertIn("query=apple", FixtureSiteHandler.requested[0])
+
+    def test_count_skipped_pages(self):
+        self.scraper.search_for_term_by_category("apple", "all")
+        self.assertEqual(self.scraper.count_skipped_pages(1, PAGE_SIZE), 1)
+
+    def test_iter_pages_loads_pages_on_demand(self):
+        self.scraper.search_for_term_by_category("apple", "all")
+        pages = self.scraper.iter_pages()
+        self.assertEqual(len(next(pages)), PAGE_SIZE)
+        self.assertEqual(self.scraper.offset, 0)
+        self.assertEqual(len(next(pages)), 2)
+        self.assertEqual(self.scraper.offset, PAGE_SIZE)
+        self.assertEqual(list(pages), [])
+
+    def test_go_to_page_resumes_by_offset(self):
+        self.scraper.search_for_term_by_category("apple", "all")
+        self.assertTrue(self.scraper.go_to_page(1))
+        self.assertEqual(self.scraper.get_page_items()[-1]["title"], "Apple older news")
+        self.assertFalse(self.scraper.go_to_next_page())
+
+    def test_records_and_replays_pages(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            archive_path = os.path.join(tmp_dir, "pages.jsonl.gz")
+            with PageRecorder(archive_path, {"term": "apple", "category": "all"}) as recorder:
+                self.scraper.recorder = recorder
+                self.scraper.search_for_term_by_category("apple", "all")
+                recorded = list(self.scraper.iter_pages())
+            requests_made = len(FixtureSiteHandler.requested)
+
+            header, pages = read_archive(archive_path)
+            self.assertEqual(header["term"], "apple")
+            self.assertEqual(len(pages), 2)
+            self.assertIn(f"{self.base_url}images/apple-1.jpg", pages[0]["images"])
+
+            replay = ReplayScraper({"replay_archive": archive_path, "wait_time": 5})
+            replay.open_website()
+            replay.search_for_term_by_category("apple", "all")
+            self.assertEqual(list(replay.iter_pages()), recorded)
+            self.assertTrue(replay.go_to_page(1))
+            self.assertEqual(replay.get_page_items(), recorded[1])
+            self.assertFalse(replay.go_to_page(2))
+            replay.close_browser()
+        self.assertEqual(len(FixtureSiteHandler.requested), requests_made)
+
+
+if __name__ == "__main__":
+    unittest.main()
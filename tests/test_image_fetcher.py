@@ -0,0 +1,165 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.image_fetcher import ImageFetcher
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path.startswith("/slow"):
+            time.sleep(0.5)
+        if self.path.startswith("/missing"):
+            self.send_error(404)
+            return
+        if self.path.startswith("/shared"):
+            body = b"\xff\xd8\xff\xe0shared_jpeg_data"
+        else:
+            body = b"fake_img_data" + self.path.encode()
+        etag = f'"{len(body)}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestImageFetcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), ImageHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        ImageHandler.requests.clear()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_fills_image_column_when_done(self):
+        rows = [{"title": f"News {number}"} for number in range(10)]
+        with ImageFetcher(self.tmp_dir.name, max_workers=4, host_limit=2) as fetcher:
+            for number, row in enumerate(rows):
+                fetcher.submit(f"{self.base_url}/image_{number}.jpg", row)
+
+        for number, row in enumerate(rows):
+            self.assertTrue(row["image"].startswith("image_"))
+            with open(os.path.join(self.tmp_dir.name, row["image"]), "rb") as f:
+                self.assertEqual(f.read(), f"fake_img_data/image_{number}.jpg".encode())
+
+    def test_failed_download_leaves_column_empty(self):
+        row = {"title": "News"}
+        with ImageFetcher(self.tmp_dir.name) as fetcher:
+            fetcher.submit(f"{self.base_url}/missing.jpg", row)
+        self.assertEqual(row["image"], "")
+
+    def test_wait_for_a_single_row(self):
+        rows = [{"title": f"News {number}"} for number in range(3)]
+        with ImageFetcher(self.tmp_dir.name) as fetcher:
+            for number, row in enumerate(rows):
+                fetcher.submit(f"{self.base_url}/image_{number}.jpg", row)
+            fetcher.wait_for(rows[1])
+            self.assertTrue(rows[1]["image"].startswith("image_"))
+            # Rows without a pending download return right away
+            fetcher.wait_for({"title": "No image"})
+
+    def test_drain_skips_downloads_past_the_deadline(self):
+        rows = [{"title": f"News {number}"} for number in range(5)]
+        fetcher = ImageFetcher(self.tmp_dir.name, max_workers=1)
+        for number, row in enumerate(rows):
+            fetcher.submit(f"{self.base_url}/slow_{number}.jpg", row)
+
+        start = time.perf_counter()
+        skipped = fetcher.drain(0.2)
+        fetcher.wait_for(rows[-1])
+        fetcher.close()
+
+        self.assertEqual(skipped, 5)
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual(fetcher.timeout, 1)
+        self.assertEqual([row["image"] for row in rows[1:]], [""] * 4)
+
+    def test_reuses_images_already_downloaded(self):
+        url = f"{self.base_url}/image_1.jpg"
+        with ImageFetcher(self.tmp_dir.name) as fetcher:
+            file_name = fetcher.download(url)
+        with open(os.path.join(self.tmp_dir.name, file_name), "wb") as f:
+            f.write(b"kept")
+
+        with ImageFetcher(self.tmp_dir.name, downloaded={url: file_name}) as fetcher:
+            self.assertEqual(fetcher.download(url), file_name)
+            # A file removed since is downloaded again
+            os.remove(os.path.join(self.tmp_dir.name, file_name))
+            self.assertEqual(fetcher.download(url), file_name)
+        with open(os.path.join(self.tmp_dir.name, file_name), "rb") as f:
+            self.assertEqual(f.read(), b"fake_img_data/image_1.jpg")
+        self.assertEqual(len(ImageHandler.requests), 2)
+
+    def test_deduplicates_images_by_content(self):
+        with ImageFetcher(self.tmp_dir.name) as fetcher:
+            names = {fetcher.download(f"{self.base_url}/shared_{number}.jpg") for number in range(3)}
+        self.assertEqual(len(names), 1)
+        file_name = names.pop()
+        self.assertTrue(file_name.startswith("image_") and file_name.endswith(".jpg"))
+        images = [name for name in os.listdir(self.tmp_dir.name) if name.startswith("image_")]
+        self.assertEqual(images, [file_name])
+
+    def test_revalidates_images_of_previous_runs(self):
+        url = f"{self.base_url}/image_1.jpg"
+        with ImageFetcher(self.tmp_dir.name) as fetcher:
+            file_name = fetcher.download(url)
+        with ImageFetcher(self.tmp_dir.name) as fetcher:
+            self.assertEqual(fetcher.download(url), file_name)
+        self.assertEqual(ImageHandler.requests[1], ("/image_1.jpg", '"25"'))
+        # Within max_age the cached image is used without a request
+        with ImageFetcher(self.tmp_dir.name, max_age=60) as fetcher:
+            self.assertEqual(fetcher.download(url), file_name)
+        self.assertEqual(len(ImageHandler.requests), 2)
+
+    def test_downloads_images_evicted_while_revalidated(self):
+        url = f"{self.base_url}/image_1.jpg"
+        with ImageFetcher(self.tmp_dir.name) as fetcher:
+            file_name = fetcher.download(url)
+        with ImageFetcher(self.tmp_dir.name) as fetcher:
+            # Another session evicts the image once it is looked up
+            with patch.object(fetcher.store, "touch", return_value=None):
+                self.assertEqual(fetcher.download(url), file_name)
+        self.assertEqual(
+            ImageHandler.requests,
+            [("/image_1.jpg", None), ("/image_1.jpg", '"25"'), ("/image_1.jpg", None)],
+        )
+
+    def test_offline_uses_cached_images_only(self):
+        url = f"{self.base_url}/image_1.jpg"
+        with ImageFetcher(self.tmp_dir.name) as fetcher:
+            file_name = fetcher.download(url)
+        with ImageFetcher(self.tmp_dir.name, offline=True) as fetcher:
+            self.assertEqual(fetcher.download(url), file_name)
+            self.assertEqual(fetcher.download(f"{self.base_url}/image_2.jpg"), "")
+        self.assertEqual(len(ImageHandler.requests), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
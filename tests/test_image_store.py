@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src import image_store
+from src.image_store import ImageStore, sniff_extension
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 20
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 20
+WEBP = b"RIFF\x00\x00\x00\x00WEBPVP8 "
+
+
+class TestSniffExtension(unittest.TestCase):
+    def test_detects_real_format(self):
+        self.assertEqual(sniff_extension(PNG, "image/jpeg"), ".png")
+        self.assertEqual(sniff_extension(JPEG), ".jpg")
+        self.assertEqual(sniff_extension(WEBP), ".webp")
+        self.assertEqual(sniff_extension(b"GIF89a..."), ".gif")
+        self.assertEqual(sniff_extension(b'<?xml version="1.0"?><svg/>'), ".svg")
+
+    def test_falls_back_on_content_type(self):
+        self.assertEqual(sniff_extension(b"????", "image/jpeg; charset=binary"), ".jpg")
+        self.assertEqual(sniff_extension(b"????"), ".bin")
+
+
+class TestImageStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_same_content_is_stored_once(self):
+        with ImageStore(self.tmp_dir.name) as store:
+            first = store.put("https://a/1", PNG, etag='"a"')
+            second = store.put("https://b/2", PNG)
+            self.assertEqual(first, second)
+            self.assertTrue(first.endswith(".png"))
+            entry = store.lookup("https://a/1")
+            self.assertEqual(entry["file_name"], first)
+            self.assertEqual(store.conditional_headers(entry), {"If-None-Match": '"a"'})
+            self.assertIsNone(store.lookup("https://c/3"))
+        images = [name for name in os.listdir(self.tmp_dir.name) if name.startswith("image_")]
+        self.assertEqual(images, [first])
+
+    def test_evicts_least_recently_used_images(self):
+        with ImageStore(self.tmp_dir.name) as store:
+            old = store.put("https://a/old", PNG)
+            kept = store.put("https://a/kept", JPEG)
+        # A new session over the size limit evicts images it did not use
+        with ImageStore(self.tmp_dir.name, max_bytes=2 * len(PNG)) as store:
+            store.touch("https://a/kept")
+            new = store.put("https://a/new", WEBP)
+            self.assertIsNone(store.lookup("https://a/old"))
+            self.assertIsNotNone(store.lookup("https://a/kept"))
+            self.assertIsNotNone(store.lookup("https://a/new"))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir.name, old)))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, kept)))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, new)))
+
+    def test_total_size_follows_the_images(self):
+        def sizes(store):
+            total = store.connection.execute("SELECT size FROM totals").fetchone()[0]
+            summed = store.connection.execute("SELECT SUM(size) FROM images").fetchone()[0]
+            return total, summed
+
+        with ImageStore(self.tmp_dir.name) as store:
+            store.put("https://a/1", PNG)
+            store.put("https://b/1", PNG)
+            store.put("https://a/2", JPEG)
+            self.assertEqual(sizes(store), (len(PNG) + len(JPEG),) * 2)
+        with ImageStore(self.tmp_dir.name, max_bytes=len(PNG) + len(WEBP)) as store:
+            store.put("https://a/3", WEBP)
+            self.assertEqual(sizes(store), (len(JPEG) + len(WEBP),) * 2)
+
+    def test_touch_an_evicted_image(self):
+        with ImageStore(self.tmp_dir.name) as store:
+            file_name = store.put("https://a/1", PNG)
+            self.assertEqual(store.touch("https://a/1"), file_name)
+            store.connection.execute("DELETE FROM images")
+            self.assertIsNone(store.touch("https://a/1"))
+            self.assertIsNone(store.touch("https://a/unknown"))
+
+    def test_keeps_images_of_other_open_sessions(self):
+        other = ImageStore(self.tmp_dir.name)
+        try:
+            used = other.put("https://a/used", PNG)
+            with ImageStore(self.tmp_dir.name, max_bytes=len(PNG)) as store:
+                store.put("https://a/new", JPEG)
+                self.assertEqual(store.evict(), 0)
+            self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, used)))
+        finally:
+            other.close()
+
+    def test_nothing_to_evict_when_only_session_images_are_over_the_limit(self):
+        with ImageStore(self.tmp_dir.name, max_bytes=1) as store:
+            with patch.object(image_store.logger, "info") as mock_info:
+                store.put("https://a/1", PNG)
+                store.put("https://a/2", JPEG)
+                self.assertEqual(store.evict(), 0)
+            mock_info.assert_not_called()
+            self.assertIsNotNone(store.lookup("https://a/1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+from src.main import resolve_settings, create_scraper
+
+
+class TestMain(unittest.TestCase):
+    def test_stop_when_out_of_range_sorts_by_date(self):
+        settings = {"stop_when_out_of_range": True}
+        self.assertTrue(resolve_settings(settings)["sort_by_date"])
+        self.assertNotIn("sort_by_date", settings)
+
+    def test_settings_left_alone(self):
+        settings = {"stop_when_out_of_range": False}
+        self.assertIs(resolve_settings(settings), settings)
+
+    def test_scraper_searches_sorted_by_date(self):
+        scraper = create_scraper(
+            {"backend": "http", "base_url": "https://www.reuters.com/", "stop_when_out_of_range": True}
+        )
+        try:
+            self.assertTrue(scraper.config["sort_by_date"])
+        finally:
+            scraper.close_browser()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import threading
+import unittest
+from src.excel_writer import ExcelWriter
+from src.output_sink import OutputSink
+
+
+class ListWriter:
+    def __init__(self, fail_on=None):
+        self.rows = []
+        self.saved = False
+        self.discarded = False
+        self.fail_on = fail_on
+        self.release = threading.Event()
+        self.release.set()
+
+    def open(self):
+        pass
+
+    def write_row(self, row):
+        self.release.wait()
+        if row.get("title") == self.fail_on:
+            raise ValueError("Cannot write row")
+        self.rows.append(row)
+
+    def close(self):
+        self.saved = True
+
+    def discard(self):
+        self.discarded = True
+
+
+class TestOutputSink(unittest.TestCase):
+    def test_writes_rows_in_order(self):
+        writer = ListWriter()
+        with OutputSink(writer, queue_size=2) as sink:
+            for number in range(10):
+                sink.put({"title": f"News {number}"})
+        self.assertTrue(writer.saved)
+        self.assertEqual([row["title"] for row in writer.rows], [f"News {n}" for n in range(10)])
+        self.assertEqual(sink.rows_written, 10)
+
+    def test_put_blocks_while_queue_is_full(self):
+        writer = ListWriter()
+        writer.release.clear()
+        sink = OutputSink(writer, queue_size=2)
+        sink.open()
+        # One row is held by the writer thread and two fill the queue
+        for number in range(3):
+            sink.put({"title": f"News {number}"})
+        blocked = threading.Thread(target=sink.put, args=({"title": "News 3"},))
+        blocked.start()
+        blocked.join(0.2)
+        self.assertTrue(blocked.is_alive())
+        writer.release.set()
+        blocked.join(2)
+        self.assertFalse(blocked.is_alive())
+        sink.close()
+        self.assertEqual(len(writer.rows), 4)
+
+    def test_write_error_is_raised_to_the_producer(self):
+        writer = ListWriter(fail_on="News 1")
+        with self.assertRaises(ValueError):
+            with OutputSink(writer, queue_size=1) as sink:
+                for number in range(100):
+                    sink.put({"title": f"News {number}"})
+        self.assertTrue(writer.discarded)
+        self.assertFalse(writer.saved)
+
+    def test_exception_discards_the_output(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "scraped_data.xlsx")
+            with self.assertRaises(RuntimeError):
+                with OutputSink(ExcelWriter(file_path, ["title"])) as sink:
+                    sink.put({"title": "News"})
+                    raise RuntimeError("Browser died")
+            self.assertFalse(os.path.exists(file_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
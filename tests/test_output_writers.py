@@ -0,0 +1,145 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from src.output_writers import (
+    AppendWriter,
+    CsvWriter,
+    JsonlWriter,
+    MultiWriter,
+    ParquetWriter,
+    create_output_writer,
+)
+from src.excel_writer import ExcelWriter
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+HEADERS = ["money_pattern", "count_term", "title", "image", "date"]
+ROWS = [
+    {
+        "money_pattern": True,
+        "count_term": 2,
+        "title": "Apple pays $10, apple says",
+        "image": "image_1.png",
+        "date": "2023-07-10T20:00:00Z",
+    },
+    {"money_pattern": "", "count_term": "", "title": "", "image": "", "date": ""},
+]
+
+
+class TestOutputWriters(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.base_path = os.path.join(self.tmp_dir.name, "data", "scraped_data")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_jsonl_appends_across_sessions(self):
+        for _ in range(2):
+            with JsonlWriter(f"{self.base_path}.jsonl", HEADERS, batch_size=1) as writer:
+                for row in ROWS:
+                    writer.write_row(row)
+        with open(f"{self.base_path}.jsonl") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0], ROWS[0])
+        self.assertEqual(list(rows[1]), HEADERS)
+
+    def test_csv_writes_header_once(self):
+        for _ in range(2):
+            with CsvWriter(f"{self.base_path}.csv", HEADERS) as writer:
+                writer.write_row(ROWS[0])
+        with open(f"{self.base_path}.csv", newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], HEADERS)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][2], "Apple pays $10, apple says")
+
+    def test_append_writer_is_abstract(self):
+        with self.assertRaises(TypeError):
+            AppendWriter(f"{self.base_path}.txt", HEADERS)
+
+    def test_discard_truncates_the_session(self):
+        file_path = f"{self.base_path}.jsonl"
+        with JsonlWriter(file_path, HEADERS) as writer:
+            writer.write_row(ROWS[0])
+        writer = JsonlWriter(file_path, HEADERS, batch_size=1)
+        writer.open()
+        writer.write_row(ROWS[1])
+        writer.discard()
+        with open(file_path) as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+        csv_writer = CsvWriter(f"{self.base_path}.csv", HEADERS)
+        csv_writer.open()
+        csv_writer.write_row(ROWS[0])
+        csv_writer.discard()
+        self.assertFalse(os.path.exists(f"{self.base_path}.csv"))
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_parquet_has_typed_columns(self):
+        dataset = f"{self.base_path}.parquet"
+        for _ in range(2):
+            with ParquetWriter(dataset, HEADERS, batch_size=1) as writer:
+                for row in ROWS:
+                    writer.write_row(row)
+            self.assertTrue(os.path.exists(writer.part_path))
+
+        table = pq.read_table(dataset)
+        self.assertEqual(table.num_rows, 4)
+        self.assertEqual(str(table.schema.field("money_pattern").type), "bool")
+        self.assertEqual(str(table.schema.field("count_term").type), "int64")
+        self.assertEqual(str(table.schema.field("date").type), "timestamp[ms, tz=UTC]")
+        rows = pq.read_table(writer.part_path).to_pylist()
+        self.assertEqual(rows[0]["date"], datetime(2023, 7, 10, 20, tzinfo=timezone.utc))
+        self.assertIsNone(rows[1]["count_term"])
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_parquet_reads_iso_dates_with_fraction_and_offset(self):
+        row = dict(ROWS[0], date="2024-02-01T04:50:24.123+00:00")
+        with ParquetWriter(f"{self.base_path}.parquet", HEADERS) as writer:
+            writer.write_row(row)
+            writer.write_row(dict(ROWS[0], date="2024-02-01T06:50:24+02:00"))
+
+        rows = pq.read_table(writer.part_path).to_pylist()
+        expected = datetime(2024, 2, 1, 4, 50, 24, 123000, tzinfo=timezone.utc)
+        self.assertEqual(rows[0]["date"], expected)
+        self.assertEqual(rows[1]["date"], expected.replace(microsecond=0))
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_parquet_close_error_removes_the_part_file(self):
+        dataset = f"{self.base_path}.parquet"
+        writer = ParquetWriter(dataset, HEADERS)
+        writer.open()
+        writer.write_row(dict(ROWS[0], count_term="two"))
+        with self.assertRaises(ValueError):
+            writer.close()
+        self.assertEqual(os.listdir(dataset), [])
+
+    def test_create_output_writer(self):
+        writer = create_output_writer(self.base_path, HEADERS, ["excel"])
+        # The writers are imported by the src modules as top-level modules
+        self.assertEqual(type(writer).__name__, ExcelWriter.__name__)
+        self.assertEqual(writer.file_path, f"{self.base_path}.xlsx")
+
+        writer = create_output_writer(self.base_path, HEADERS, ["jsonl", "csv", "jsonl"])
+        self.assertEqual(type(writer).__name__, MultiWriter.__name__)
+        with writer:
+            writer.write_row(ROWS[0])
+        self.assertTrue(os.path.exists(f"{self.base_path}.jsonl"))
+        self.assertTrue(os.path.exists(f"{self.base_path}.csv"))
+        self.assertFalse(os.path.exists(f"{self.base_path}.xlsx"))
+
+        with self.assertRaises(ValueError):
+            create_output_writer(self.base_path, HEADERS, ["xml"])
+
+
+if __name__ == "__main__":
+    unittest.main()
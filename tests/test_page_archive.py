@@ -0,0 +1,59 @@
+import gzip
+import os
+import tempfile
+import unittest
+from src.page_archive import PageRecorder, page_image_urls, read_archive
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class TestPageArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.archive_path = os.path.join(self.tmp_dir.name, "pages.jsonl.gz")
+        with open(os.path.join(FIXTURES_DIR, "search_page_1.html"), encoding="utf-8") as f:
+            self.html = f.read()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_page_image_urls(self):
+        urls = page_image_urls(self.html, "https://example.com/site-search/")
+        self.assertEqual(
+            urls,
+            ["https://example.com/images/apple-1.jpg", "https://cdn.example.com/apple-3.png"],
+        )
+
+    def test_round_trip(self):
+        with PageRecorder(self.archive_path, {"term": "apple"}) as recorder:
+            recorder.record("https://example.com/a", self.html)
+            recorder.record("https://example.com/b", "<html></html>")
+        header, pages = read_archive(self.archive_path)
+        self.assertEqual(header["term"], "apple")
+        self.assertEqual([page["url"] for page in pages], ["https://example.com/a", "https://example.com/b"])
+        self.assertEqual(pages[0]["html"], self.html)
+        self.assertEqual(pages[1]["images"], [])
+
+    def test_reads_the_pages_recorded_before_a_crash(self):
+        recorder = PageRecorder(self.archive_path, {"term": "apple"})
+        recorder.open()
+        recorder.record("https://example.com/a", self.html)
+        # The process dies without closing the archive
+        with open(self.archive_path, "rb") as f:
+            data = f.read()
+        recorder.close()
+        with open(self.archive_path, "wb") as f:
+            f.write(data)
+
+        header, pages = read_archive(self.archive_path)
+        self.assertEqual(len(pages), 1)
+
+    def test_rejects_other_files(self):
+        with gzip.open(self.archive_path, "wt") as f:
+            f.write('{"format": 99}\n')
+        with self.assertRaises(ValueError):
+            read_archive(self.archive_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
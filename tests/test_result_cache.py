@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from src.result_cache import ResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        self.cache = ResultCache(
+            os.path.join(self.tmp_dir.name, "result_cache.db"),
+            ttl=60,
+            max_pages=2,
+            clock=self.clock,
+        )
+        self.items = [{"title": "News", "category": "World", "datetime": "2023-07-10T20:00:00Z"}]
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_get_cached_page_by_term_and_index(self):
+        self.cache.put("site", "Apple", 0, self.items)
+        self.assertEqual(self.cache.get("site", "apple ", 0), (self.items, False))
+        self.assertIsNone(self.cache.get("site", "apple", 1))
+        self.assertIsNone(self.cache.get("other site", "apple", 0))
+
+    def test_pages_expire_after_ttl(self):
+        self.cache.put("site", "apple", 0, self.items)
+        self.clock.now += 60
+        self.assertIsNone(self.cache.get("site", "apple", 0))
+
+    def test_evicts_least_recently_used_pages(self):
+        self.cache.put("site", "apple", 0, self.items)
+        self.clock.now += 1
+        self.cache.put("site", "apple", 1, self.items)
+        self.clock.now += 1
+        self.cache.get("site", "apple", 0)
+        self.clock.now += 1
+        self.cache.put("site", "apple", 2, self.items)
+
+        self.assertIsNotNone(self.cache.get("site", "apple", 0))
+        self.assertIsNone(self.cache.get("site", "apple", 1))
+        self.assertIsNotNone(self.cache.get("site", "apple", 2))
+
+    def test_mark_last_page(self):
+        self.cache.put("site", "apple", 3, self.items)
+        self.cache.mark_last("site", "apple", 3)
+        self.assertEqual(self.cache.get("site", "apple", 3), (self.items, True))
+
+    def test_scope_depends_on_sort_order(self):
+        config = {"base_url": "https://example.com", "page_size": 20}
+        self.assertNotEqual(
+            ResultCache.make_scope(config),
+            ResultCache.make_scope(dict(config, sort_by_date=True)),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,8 @@
 import unittest
 from unittest.mock import patch, Mock
 from src.scraper import Scraper
-from selenium.common.exceptions import TimeoutException
+from src.result_page import ResultPage
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
 
 class TestScraper(unittest.TestCase):
@@ -48,6 +49,140 @@ class TestScraper(unittest.TestCase):
         with self.assertRaises(TimeoutException):
             self.scraper.go_to_next_page()
 
+    def test_url_pagination_keeps_page_order(self):
+        config = {
+            "base_url": "https://example.com",
+            "pagination_mode": "url",
+            "page_size": 2,
+            "concurrent_pages": 3,
+        }
+        scraper = Scraper(config, browser=Mock())
+        scraper.result_page = Mock()
+        scraper.result_page.extract_items.return_value = [{"title": "1"}, {"title": "2"}]
+        scraper.result_page.extract_pages.side_effect = [
+            [[{"title": "3"}, {"title": "4"}], [{"title": "5"}, {"title": "6"}]],
+            [[{"title": "7"}], []],
+        ]
+        scraper.search_url = "https://example.com/site-search/?query=term"
+
+        titles = [item["title"] for item in scraper.get_page_items()]
+        while scraper.go_to_next_page():
+            titles.extend(item["title"] for item in scraper.get_page_items())
+
+        self.assertEqual(titles, ["1", "2", "3", "4", "5", "6", "7"])
+        self.assertEqual(scraper.extraction_mode, "bulk")
+        self.assertEqual(scraper.result_page.extract_pages.call_count, 2)
+
+    def test_open_website_attaches_to_running_browser(self):
+        config = {"base_url": "https://example.com", "attach_chrome_port": "9222"}
+        browser = Mock()
+        browser.get_browser_ids.return_value = []
+        scraper = Scraper(config, browser=browser)
+
+        scraper.open_website()
+
+        browser.attach_chrome_browser.assert_called_once_with(9222)
+        browser.go_to.assert_called_once_with("https://example.com")
+        browser.open_available_browser.assert_not_called()
+
+    def test_iter_pages_skips_filtered_items(self):
+        config = {"base_url": "https://example.com", "extraction_mode": "elements"}
+        scraper = Scraper(config, browser=Mock())
+        scraper.result_page = Mock(field_wait_seconds=0.0)
+        scraper.result_page.get_item_list.return_value = ["new", "old", "undated"]
+        scraper.result_page.get_item_filter_fields.return_value = [
+            {"category": "Business", "datetime": "2024"},
+            {"category": "Business", "datetime": "2020"},
+            {"category": "Business", "datetime": ""},
+        ]
+        scraper.result_page.click_next_button.return_value = False
+
+        pages = list(
+            scraper.iter_pages(item_filter=lambda items: [i["datetime"] == "2024" for i in items])
+        )
+
+        self.assertEqual(len(pages[0]), 1)
+        self.assertEqual(pages[0][0]["datetime"], "2024")
+        # Counted before the filter, like the items of a bulk page
+        self.assertEqual(scraper.items_seen, 3)
+        self.assertNotIn("time_element", pages[0][0])
+        scraper.result_page.get_item_filter_fields.assert_called_once_with(
+            ["new", "old", "undated"]
+        )
+        self.assertEqual(scraper.result_page.get_title_item.call_count, 1)
+        self.assertEqual(scraper.result_page.get_image_item.call_count, 1)
+        scraper.result_page.get_category_item.assert_not_called()
+        scraper.result_page.get_time_item.assert_not_called()
+
+    def test_open_website_with_lean_profile(self):
+        browser = Mock()
+        browser.get_browser_ids.return_value = []
+        config = {"base_url": "https://example.com", "browser_profile": "lean"}
+        scraper = Scraper(config, browser=browser)
+        scraper.open_website()
+
+        options = browser.open_available_browser.call_args.kwargs["options"]
+        self.assertEqual(options.page_load_strategy, "eager")
+        self.assertIn("--disable-extensions", options.arguments)
+        browser.set_window_size.assert_called_once_with(1024, 768)
+        browser.driver.execute_cdp_cmd.assert_called_with(
+            "Network.setBlockedURLs", {"urls": Scraper.LEAN_BLOCKED_URLS}
+        )
+        browser.go_to.assert_called_once_with("https://example.com")
+
+
+class TestResultPage(unittest.TestCase):
+    def test_extract_items_single_round_trip(self):
+        browser = Mock()
+        browser.driver.execute_script.return_value = [
+            {"title": "T", "category": "C", "datetime": "D", "src": "S"}
+        ]
+        result_page = ResultPage(browser, {"wait_time": 1})
+        items = result_page.extract_items()
+        self.assertEqual(items[0]["title"], "T")
+        browser.driver.execute_script.assert_called_once()
+        args = browser.driver.execute_script.call_args[0]
+        self.assertEqual(args[1], ResultPage.IL)
+        self.assertIn(ResultPage.TITLE_ITEM, args)
+        self.assertIn(ResultPage.DIV_IMAGE_ITEM, args)
+
+    @patch("page.WebDriverWait")
+    def test_fail_fast_missing_field(self, MockWebDriverWait):
+        browser = Mock()
+        item = Mock()
+        item.find_element.side_effect = NoSuchElementException()
+        config = {"wait_time": 10, "presence_strategy": "fail_fast"}
+        result_page = ResultPage(browser, config)
+        self.assertIsNone(result_page.get_time_item(item, 1))
+        self.assertFalse(MockWebDriverWait.called)
+        self.assertGreaterEqual(result_page.field_wait_seconds, 0)
+
+        config["field_grace_time"] = 0.5
+        MockWebDriverWait.return_value.until.side_effect = TimeoutException()
+        self.assertIsNone(result_page.get_time_item(item, 1))
+        MockWebDriverWait.assert_called_once_with(browser.driver, 0.5)
+
+    def test_extract_pages_in_tabs(self):
+        browser = Mock()
+        driver = browser.driver
+        driver.current_window_handle = "main"
+        driver.window_handles = ["main", "tab-1", "tab-2"]
+        result_page = ResultPage(browser, {"wait_time": 1})
+        result_page.has_items = Mock(side_effect=[True, False])
+        result_page.extract_items = Mock(return_value=[{"title": "T"}])
+
+        urls = [
+            result_page.page_url("https://example.com/?query=term", index, 20)
+            for index in (1, 2)
+        ]
+        pages = result_page.extract_pages(urls)
+
+        self.assertEqual(pages, [[{"title": "T"}], []])
+        self.assertIn("offset=20", urls[0])
+        self.assertEqual(driver.execute_script.call_count, 2)
+        self.assertEqual(driver.close.call_count, 2)
+        driver.switch_to.window.assert_called_with("main")
+
 
 if __name__ == "__main__":
     unittest.main()
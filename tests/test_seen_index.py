@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from src.seen_index import SeenIndex
+from src.data_extractor import DataExtractor
+
+
+def iso(date_time):
+    return date_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class TestSeenIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "data", "seen_index.db")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_mark_seen_is_committed_only_on_commit(self):
+        with SeenIndex(self.db_path) as index:
+            index.mark_seen("http://news/1", "apple", "all", "2023-07-10T20:00:00Z")
+            self.assertTrue(index.is_seen("http://news/1"))
+        with SeenIndex(self.db_path) as index:
+            self.assertFalse(index.is_seen("http://news/1"))
+            index.mark_seen("http://news/1", "apple", "all", "2023-07-10T20:00:00Z")
+            index.commit()
+        with SeenIndex(self.db_path) as index:
+            self.assertTrue(index.is_seen("http://news/1"))
+
+    def test_high_water_mark_only_moves_forward(self):
+        with SeenIndex(self.db_path) as index:
+            index.update_high_water_mark("Apple", "All", "2023-07-10T20:00:00Z")
+            index.update_high_water_mark("apple", "all", "2023-06-10T20:00:00Z")
+            self.assertEqual(
+                index.get_high_water_mark("apple", "all"), "2023-07-10T20:00:00Z"
+            )
+            self.assertIsNone(index.get_high_water_mark("apple", "sports"))
+
+    def test_evict_older_than(self):
+        with SeenIndex(self.db_path) as index:
+            index.mark_seen("http://news/1", "apple", "all", "2023-07-10T20:00:00Z")
+            index.commit()
+            index.connection.execute(
+                "UPDATE articles SET seen_at = ?",
+                ((datetime.now(timezone.utc) - timedelta(days=10)).isoformat(),),
+            )
+            self.assertEqual(index.evict_older_than(5), 1)
+            index.compact()
+            self.assertFalse(index.is_seen("http://news/1"))
+
+    def test_incremental_extraction(self):
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        items = [
+            {"title": f"News {number}", "url": f"http://news/{number}", "datetime": iso(now - timedelta(hours=number))}
+            for number in range(4)
+        ]
+
+        with SeenIndex(self.db_path) as index:
+            extractor = DataExtractor("news", "all", 2, seen_index=index)
+            self.assertEqual(len(extractor.extract_from_items(items[1:])), 3)
+            extractor.save_seen_index()
+
+        with SeenIndex(self.db_path) as index:
+            extractor = DataExtractor("news", "all", 2, seen_index=index, sorted_by_date=True)
+            self.assertEqual(extractor.high_water_mark, now - timedelta(hours=1))
+            result = extractor.extract_from_items(items)
+            self.assertEqual([row["title"] for row in result], ["News 0"])
+            self.assertTrue(extractor.reached_high_water_mark)
+
+    def test_unsorted_results_ignore_the_high_water_mark(self):
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        items = [
+            {"title": f"News {number}", "url": f"http://news/{number}", "datetime": iso(now - timedelta(hours=number))}
+            for number in range(4)
+        ]
+
+        with SeenIndex(self.db_path) as index:
+            extractor = DataExtractor("news", "all", 2, seen_index=index)
+            self.assertEqual(len(extractor.extract_from_items(items[:2])), 2)
+            extractor.save_seen_index()
+
+        with SeenIndex(self.db_path) as index:
+            extractor = DataExtractor("news", "all", 2, seen_index=index)
+            self.assertIsNone(extractor.high_water_mark)
+            # Older articles not seen yet are still collected
+            result = extractor.extract_from_items(items)
+            self.assertEqual([row["title"] for row in result], ["News 2", "News 3"])
+            self.assertEqual(extractor.skipped_seen, 2)
+            self.assertFalse(extractor.reached_high_water_mark)
+
+
+if __name__ == "__main__":
+    unittest.main()
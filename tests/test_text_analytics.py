@@ -0,0 +1,69 @@
+import unittest
+from src.text_analytics import TermMatcher, TextAnalyzer
+from src.data_extractor import DataExtractor
+
+
+class TestTermMatcher(unittest.TestCase):
+    def test_counts_like_str_count(self):
+        matcher = TermMatcher({"aa": []})
+        for text in ["aaaa", "aaa", "AaA aA", "", "bab"]:
+            self.assertEqual(matcher.count(text)["aa"], text.lower().count("aa"))
+
+    def test_counts_terms_and_synonyms_in_one_pass(self):
+        matcher = TermMatcher({"Apple": ["AAPL", "iPhone maker"], "Tesla": ["TSLA"]})
+        counts = matcher.count("Apple and aapl rise as the iPhone maker beats Tesla")
+        self.assertEqual(counts, {"Apple": 3, "Tesla": 1})
+
+    def test_longest_spelling_counts_once(self):
+        matcher = TermMatcher({"apple": ["Apple Inc"], "inc": []})
+        self.assertEqual(matcher.count("Apple Inc and apple"), {"apple": 2, "inc": 0})
+
+
+class TestTextAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = TextAnalyzer({"apple": ["aapl"]})
+
+    def test_money_matches(self):
+        self.assertEqual(
+            self.analyzer.money_matches("Apple pays $1,234.56 and 10 dollars, not $5"),
+            ["$1,234.56", "10 dollars"],
+        )
+        self.assertTrue(self.analyzer.contains_money("It costs 11 USD"))
+        self.assertFalse(self.analyzer.contains_money("It costs 11 euros"))
+
+    def test_classify_matches_single_title_results(self):
+        titles = [
+            "Apple pays $10.00 per AAPL share",
+            "",
+            "No amount here but apple twice: apple",
+            "Markets rise 5 USD",
+        ]
+        results = self.analyzer.classify(titles, with_matches=True)
+        self.assertEqual(len(results), len(titles))
+        for title, result in zip(titles, results):
+            self.assertEqual(result["money_pattern"], self.analyzer.contains_money(title))
+            self.assertEqual(result["term_counts"], self.analyzer.count_terms(title))
+        self.assertEqual(results[0]["money_matches"], ["$10.00"])
+        self.assertEqual(results[0]["term_counts"], {"apple": 2})
+        self.assertEqual(results[2]["term_counts"], {"apple": 2})
+
+        results = self.analyzer.classify(titles, term="apple")
+        self.assertEqual([result["term_count"] for result in results], [2, 0, 2, 0])
+        self.assertNotIn("money_matches", results[0])
+
+    def test_classify_a_single_term_among_others(self):
+        analyzer = TextAnalyzer({"apple": [], "apple inc": []})
+        results = analyzer.classify(["Apple Inc and apple"], term="apple")
+        self.assertEqual(results[0]["term_count"], 1)
+        single = TextAnalyzer({"apple": []}).classify(["Apple, apple pie"], term="apple")
+        self.assertEqual(single[0]["term_count"], 2)
+
+
+class TestExtractorSynonyms(unittest.TestCase):
+    def test_count_term_includes_synonyms(self):
+        extractor = DataExtractor("apple", "all", 1, synonyms=["AAPL"])
+        self.assertEqual(extractor.count_searched_term("Apple (AAPL) gains"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
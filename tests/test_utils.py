@@ -0,0 +1,228 @@
+import unittest
+from unittest.mock import patch, Mock
+from selenium.common.exceptions import (
+    StaleElementReferenceException,
+    InvalidSessionIdException,
+    TimeoutException,
+)
+from src.utils import (
+    resilient_action,
+    retry_state,
+    RetryPolicy,
+    MaxRetriesReachedError,
+    CircuitOpenError,
+    set_url_params,
+    Metrics,
+    ScreenshotCapturer,
+    start_queue_logging,
+    stop_queue_logging,
+)
+from logging.handlers import QueueHandler
+import json
+import logging
+import os
+import tempfile
+import threading
+
+
+class FakePage:
+    def __init__(self, side_effect):
+        self.browser = Mock()
+        self.action = Mock(side_effect=side_effect)
+
+    @resilient_action
+    def act(self):
+        return self.action()
+
+    @resilient_action(circuit_breaker=False)
+    def close(self):
+        return "closed"
+
+
+class TestResilientAction(unittest.TestCase):
+    def setUp(self):
+        retry_state.configure()
+
+    def test_retry_policy_backoff_is_bounded(self):
+        policy = RetryPolicy(retries=5, base_delay=0.01, max_delay=0.05)
+        for attempt in range(1, 6):
+            delay = policy.delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(0.05, 0.01 * 2 ** (attempt - 1)))
+
+    @patch("src.utils.time.sleep")
+    def test_retries_and_records_statistics(self, mock_sleep):
+        page = FakePage([StaleElementReferenceException(), "ok"])
+        self.assertEqual(page.act(), "ok")
+        self.assertEqual(retry_state.retries, 1)
+        self.assertEqual(
+            retry_state.summary()["retries_by_exception"],
+            {"StaleElementReferenceException": 1},
+        )
+        # Stale elements are retried within milliseconds
+        self.assertLessEqual(mock_sleep.call_args[0][0], 0.01)
+
+    @patch("src.utils.time.sleep")
+    def test_retry_budget(self, mock_sleep):
+        retry_state.configure(max_retries=1)
+        page = FakePage(TimeoutException())
+        with self.assertRaises(MaxRetriesReachedError):
+            page.act()
+        with self.assertRaises(MaxRetriesReachedError):
+            page.act()
+        self.assertEqual(page.action.call_count, 3)
+        self.assertEqual(retry_state.retries, 1)
+
+    @patch("src.utils.time.sleep")
+    def test_circuit_breaker_on_lost_session(self, mock_sleep):
+        page = FakePage(InvalidSessionIdException())
+        with self.assertRaises(CircuitOpenError):
+            page.act()
+        with self.assertRaises(CircuitOpenError):
+            page.act()
+        self.assertEqual(page.action.call_count, 1)
+        self.assertFalse(mock_sleep.called)
+        self.assertEqual(page.close(), "closed")
+
+
+class TestSetUrlParams(unittest.TestCase):
+    def test_adds_and_replaces_params(self):
+        url = set_url_params("https://example.com/search/?query=a+b&offset=0", offset=20)
+        self.assertEqual(url, "https://example.com/search/?query=a+b&offset=20")
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        retry_state.configure()
+        self.metrics = Metrics()
+
+    def test_timed_records_every_call(self):
+        @self.metrics.timed("step")
+        def step(value):
+            return value * 2
+
+        self.assertEqual(step(2), 4)
+        step(3)
+        timing = self.metrics.summary()["timings"]["step"]
+        self.assertEqual(timing["count"], 2)
+        self.assertGreaterEqual(timing["max_seconds"], timing["mean_seconds"])
+
+    def test_timer_records_failed_blocks(self):
+        with self.assertRaises(ValueError):
+            with self.metrics.timer("failing"):
+                raise ValueError()
+        self.assertEqual(self.metrics.summary()["timings"]["failing"]["count"], 1)
+
+    def test_instrument_webdriver(self):
+        driver = Mock()
+        execute = driver.command_executor.execute
+        execute.return_value = {"value": None}
+        self.metrics.instrument_webdriver(driver)
+        self.metrics.instrument_webdriver(driver)
+        driver.command_executor.execute("get", {"url": "https://example.com"})
+        execute.assert_called_once_with("get", {"url": "https://example.com"})
+        self.assertEqual(self.metrics.summary()["timings"]["webdriver.get"]["count"], 1)
+
+    def test_write_json_and_prometheus(self):
+        self.metrics.observe("page.wait_for", 0.5)
+        self.metrics.increment("pages", 2)
+        with tempfile.TemporaryDirectory() as dir_path:
+            json_path, prometheus_path = self.metrics.write(dir_path)
+            with open(json_path) as f:
+                summary = json.load(f)
+            with open(prometheus_path) as f:
+                prometheus = f.read()
+        self.assertEqual(summary["counters"], {"pages": 2})
+        self.assertIn("retries", summary)
+        self.assertIn(
+            'newsscraper_duration_seconds_sum{name="page.wait_for"} 0.5', prometheus
+        )
+        self.assertIn('newsscraper_events_total{name="pages"} 2', prometheus)
+
+
+class TestScreenshotCapturer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.capturer = ScreenshotCapturer(self.tmp_dir.name)
+        self.capturer.configure(min_interval=0, max_bytes=25)
+        self.driver = Mock()
+        self.driver.get_screenshot_as_png.return_value = b"png" * 4
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_one_screenshot_per_call_site(self):
+        self.capturer.capture(self.driver, "extract:10")
+        self.capturer.capture(self.driver, "extract:10")
+        self.capturer.capture(self.driver, "scrape:20")
+        self.capturer.wait()
+        self.assertEqual(len(self.capturer.file_paths), 2)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), sorted(
+            os.path.basename(path) for path in self.capturer.file_paths
+        ))
+
+    def test_same_error_is_captured_once(self):
+        error = ValueError("boom")
+        self.capturer.capture(self.driver, "inner:1", error)
+        self.capturer.capture(self.driver, "outer:2", error)
+        self.capturer.wait()
+        self.assertEqual(self.driver.get_screenshot_as_png.call_count, 1)
+
+    def test_rate_and_size_limits(self):
+        for line in range(5):
+            self.capturer.capture(self.driver, f"site:{line}")
+            self.capturer.wait()
+        # 12 bytes each with a 25 bytes budget
+        self.assertEqual(self.capturer.bytes_saved, 24)
+        self.assertEqual(len(self.capturer.file_paths), 2)
+
+        self.capturer.configure(min_interval=60, max_bytes=1000)
+        self.capturer.capture(self.driver, "a:1")
+        self.capturer.capture(self.driver, "b:2")
+        self.capturer.wait()
+        self.assertEqual(len(self.capturer.file_paths), 1)
+
+    def test_does_not_block_the_caller(self):
+        release = threading.Event()
+        self.driver.get_screenshot_as_png.side_effect = lambda: release.wait(5) and b"png"
+        future = self.capturer.capture(self.driver, "slow:1")
+        self.assertFalse(future.done())
+        release.set()
+        self.capturer.wait()
+        self.assertEqual(len(self.capturer.file_paths), 1)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.records.append(record.getMessage())
+        self.threads.add(threading.current_thread().name)
+
+
+class TestQueueLogging(unittest.TestCase):
+    def setUp(self):
+        self.root = logging.getLogger()
+        self.saved_handlers = self.root.handlers[:]
+        self.handler = ListHandler()
+        self.root.handlers = [self.handler]
+
+    def tearDown(self):
+        stop_queue_logging()
+        self.root.handlers = self.saved_handlers
+
+    def test_records_are_written_by_the_listener(self):
+        listener = start_queue_logging()
+        self.assertIsInstance(self.root.handlers[0], QueueHandler)
+        self.assertIs(start_queue_logging(), listener)
+        logging.getLogger("queued").warning("written %s", "later")
+        stop_queue_logging()
+        self.assertEqual(self.handler.records, ["written later"])
+        self.assertNotIn(threading.current_thread().name, self.handler.threads)
+
+
+if __name__ == "__main__":
+    unittest.main()